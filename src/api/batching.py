@@ -0,0 +1,162 @@
+"""
+Micro-batching asíncrono delante de los modelos de scoring.
+
+Los requests concurrentes a un mismo router se encolan y un único worker
+los agrupa durante hasta `max_wait_ms` o hasta `max_batch_size` filas; luego
+corre un solo scoring vectorizado en el threadpool y devuelve a cada request
+su fila del resultado.
+"""
+
+import asyncio
+import os
+import time
+
+import numpy as np
+
+# Límites superiores del histograma de tamaños de batch
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    score_fn(X, cascade) recibe la matriz (n, n_features) y un array booleano
+    por fila, y devuelve una tupla de arrays con n filas cada uno (p. ej.
+    probs_p1, probs_p2). submit() devuelve la fila correspondiente de cada
+    array.
+
+    Con max_batch_size <= 1 el batcher queda desactivado: cada request se
+    evalúa solo, en el threadpool, sin esperar.
+    """
+
+    def __init__(
+        self, score_fn, max_wait_ms: float = 2.0, max_batch_size: int = 64, name=""
+    ):
+        self.score_fn = score_fn
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.name = name
+
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+        self.batches_total = 0
+        self.rows_total = 0
+        self.last_batch_size = 0
+        self.max_seen_batch_size = 0
+        self.batch_size_hist = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.wait_seconds_total = 0.0
+
+    @classmethod
+    def from_env(cls, prefix: str, score_fn) -> "MicroBatcher":
+        """Lee {prefix}_BATCH_MAX_WAIT_MS y {prefix}_BATCH_MAX_ROWS."""
+        return cls(
+            score_fn,
+            max_wait_ms=float(os.getenv(f"{prefix}_BATCH_MAX_WAIT_MS", "2")),
+            max_batch_size=int(os.getenv(f"{prefix}_BATCH_MAX_ROWS", "64")),
+            name=prefix.lower(),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, x: np.ndarray, cascade: bool = False):
+        """Encola una fila (1, n_features) y espera su resultado."""
+        if not self.enabled:
+            out = await asyncio.to_thread(self.score_fn, x, np.array([cascade]))
+            self._record([time.perf_counter()])
+            return tuple(a[0] for a in out)
+
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((x, cascade, future, time.perf_counter()))
+        return await future
+
+    def _ensure_worker(self):
+        # El worker vive en el event loop que atiende los requests; si cambia
+        # (p. ej. otro TestClient) se recrea la cola en el loop nuevo.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        X = np.vstack([x for x, _, _, _ in batch])
+        cascade = np.array([c for _, c, _, _ in batch], dtype=bool)
+        self._record([t for _, _, _, t in batch])
+        try:
+            out = await asyncio.to_thread(self.score_fn, X, cascade)
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for i, (_, _, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result(tuple(a[i] for a in out))
+
+    def _record(self, enqueued_at: list[float]):
+        now = time.perf_counter()
+        size = len(enqueued_at)
+        self.batches_total += 1
+        self.rows_total += size
+        self.last_batch_size = size
+        self.max_seen_batch_size = max(self.max_seen_batch_size, size)
+        self.wait_seconds_total += sum(now - t for t in enqueued_at)
+        bucket = next(
+            (i for i, b in enumerate(BATCH_SIZE_BUCKETS) if size <= b),
+            len(BATCH_SIZE_BUCKETS),
+        )
+        self.batch_size_hist[bucket] += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self.queue_depth,
+            "batches_total": self.batches_total,
+            "rows_total": self.rows_total,
+            "avg_batch_size": (
+                round(self.rows_total / self.batches_total, 2)
+                if self.batches_total
+                else 0.0
+            ),
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size_seen": self.max_seen_batch_size,
+            "avg_queue_wait_ms": (
+                round(self.wait_seconds_total / self.rows_total * 1000, 3)
+                if self.rows_total
+                else 0.0
+            ),
+            "batch_size_histogram": {
+                **{
+                    f"le_{b}": n
+                    for b, n in zip(BATCH_SIZE_BUCKETS, self.batch_size_hist)
+                },
+                f"gt_{BATCH_SIZE_BUCKETS[-1]}": self.batch_size_hist[-1],
+            },
+        }
@@ -0,0 +1,72 @@
+"""
+Formato binario para scoring masivo: una matriz float32 con sus columnas.
+
+Layout (little-endian):
+    [0:8)    magic b"EQLMAT1\\0"
+    [8:16)   largo del header (uint64)
+    [16:..)  header JSON utf-8: {"shape": [n, f], "columns": [...], ...}
+    datos    n·f float32 row-major, desde el primer offset múltiplo de ALIGN
+
+El header puede llevar claves extra (p. ej. los errores por fila de la
+respuesta). decode_matrix() devuelve una vista np.frombuffer sobre el body:
+la matriz de entrada al modelo no se copia.
+
+Ejemplo de cliente:
+    body = encode_matrix(X.astype(np.float32), feature_names)
+    r = requests.post(url, data=body, headers={"Content-Type": MEDIA_TYPE})
+    probs, columns, meta = decode_matrix(r.content)
+"""
+
+import json
+import struct
+
+import numpy as np
+from fastapi import HTTPException
+
+MEDIA_TYPE = "application/x-equinelead-matrix"
+MAGIC = b"EQLMAT1\0"
+ALIGN = 64
+DTYPE = np.dtype("<f4")
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def encode_matrix(X: np.ndarray, columns, **meta) -> bytes:
+    X = np.ascontiguousarray(X, dtype=DTYPE)
+    if X.ndim != 2 or X.shape[1] != len(columns):
+        raise ValueError(f"Shape {X.shape} no coincide con {len(columns)} columnas")
+    header = json.dumps(
+        {"shape": list(X.shape), "columns": [str(c) for c in columns], **meta}
+    ).encode()
+    data_start = _align(16 + len(header))
+    prefix = MAGIC + struct.pack("<Q", len(header)) + header
+    return prefix + b"\0" * (data_start - len(prefix)) + X.tobytes()
+
+
+def decode_matrix(body: bytes) -> tuple[np.ndarray, list[str], dict]:
+    """
+    (X, columns, meta) a partir de un body binario. X es una vista de solo
+    lectura sobre `body`. Cualquier inconsistencia del formato → 422.
+    """
+    try:
+        if body[:8] != MAGIC:
+            raise ValueError("magic inválido")
+        (header_len,) = struct.unpack("<Q", body[8:16])
+        meta = json.loads(body[16 : 16 + header_len])
+        if not isinstance(meta, dict):
+            raise ValueError("el header debe ser un objeto JSON")
+        n_rows, n_cols = (int(v) for v in meta.pop("shape"))
+        columns = meta.pop("columns")
+        if len(columns) != n_cols:
+            raise ValueError(f"{len(columns)} columnas para shape[1]={n_cols}")
+
+        offset = _align(16 + header_len)
+        count = n_rows * n_cols
+        if len(body) != offset + count * DTYPE.itemsize:
+            raise ValueError(f"se esperaban {count} float32 después del header")
+        X = np.frombuffer(body, dtype=DTYPE, count=count, offset=offset)
+    except (ValueError, KeyError, TypeError, struct.error) as e:
+        raise HTTPException(status_code=422, detail=f"Body binario inválido: {e}")
+    return X.reshape(n_rows, n_cols), columns, meta
@@ -0,0 +1,115 @@
+"""
+Cache de respuestas en proceso con tamaño acotado, desalojo LRU y TTL.
+
+Cada entrada queda asociada a una versión creciente (p. ej. la generación de
+carga del modelo en el registry): la primera consulta con una versión más
+nueva vacía el cache entero, así nunca devuelve resultados de un modelo
+anterior. Un request en vuelo que todavía trae una versión vieja se trata
+como miss y lo que calcule no se guarda (ni vacía las entradas nuevas).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    maxsize <= 0 desactiva el cache (get siempre es miss y put no guarda).
+    ttl_s <= 0 desactiva la expiración por tiempo.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_s: float = 300.0, name: str = ""):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.name = name
+        self.version = None
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "ResponseCache":
+        """Lee {prefix}_CACHE_SIZE y {prefix}_CACHE_TTL_S."""
+        return cls(
+            maxsize=int(os.getenv(f"{prefix}_CACHE_SIZE", "1024")),
+            ttl_s=float(os.getenv(f"{prefix}_CACHE_TTL_S", "300")),
+            name=prefix.lower(),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def _check_version(self, version) -> bool:
+        """
+        True si `version` es la actual; una más nueva vacía el cache y pasa a
+        ser la actual. False si es más vieja. Llamar con el lock tomado.
+        """
+        if version == self.version:
+            return True
+        if self.version is not None and (version is None or version < self.version):
+            return False
+        if self._data:
+            self.invalidations += 1
+        self._data.clear()
+        self.version = version
+        return True
+
+    def get(self, key, version=None):
+        """Valor cacheado para `key`, o None (miss / expirado / versión vieja)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key) if self._check_version(version) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if self.ttl_s > 0 and time.monotonic() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl_s)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl_s,
+            "size": len(self._data),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
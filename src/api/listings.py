@@ -0,0 +1,234 @@
+"""
+Tabla de listings en memoria para enriquecer las recomendaciones.
+
+Los índices que devuelve el recomendador son posiciones de fila en
+horses_listings_limpio.parquet (la matriz de items se arma con las primeras
+filas del dataset, en orden; ver src/experiments/engine/features.py). La
+tabla se lee una sola vez, solo con las columnas que devuelve la API, y
+cada columna queda como lista de valores Python listos para serializar.
+
+Para las recomendaciones filtradas la tabla precalcula índices sobre el
+catálogo: un bitmap (máscara booleana) por valor de location y de gender, y
+el orden de los precios para resolver un rango con dos búsquedas binarias.
+ListingTable.candidates() combina los filtros con AND de bitmaps y devuelve
+las filas candidatas: el KNN solo calcula distancias sobre esas.
+
+En producción la tabla viaja dentro del model pack (sección PACK_SECTION,
+la arma build_model_pack con las columnas de LISTING_COLUMNS), así que el
+contenedor no necesita el parquet; LISTINGS_PATH es el fallback sin pack.
+
+Los índices del recomendador solo valen contra el mismo dataset con el que
+se entrenó: la tabla guarda el SHA-256 del parquet de origen y
+check_catalog() lo compara con dataset_sha256 / n_items del export del
+recomendador (al armar el pack, al cargarlo y en cada request que la usa).
+
+Variables de entorno:
+    LISTINGS_PATH   parquet de listings (./data/clean/horses_listings_limpio.parquet)
+"""
+
+import hashlib
+import json
+import math
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pyarrow.parquet as pq
+
+LISTINGS_PATH = os.getenv(
+    "LISTINGS_PATH", "./data/clean/horses_listings_limpio.parquet"
+)
+
+# Columna del parquet → clave en la respuesta
+LISTING_COLUMNS = {
+    "Horse_ID": "horse_id",
+    "Price": "price",
+    "Breed": "breed",
+    "Location": "location",
+    "Gender": "gender",
+}
+# Columnas con un bitmap por valor (normalizado)
+PARTITION_KEYS = ("location", "gender")
+# Sección del model pack con las columnas como JSON
+PACK_SECTION = "listings/columns"
+
+
+def normalize(value) -> str:
+    """Minúsculas y espacios simples, para comparar valores de filtros."""
+    return " ".join(str(value).lower().split())
+
+
+class ListingFilter(NamedTuple):
+    """Filtros de una query, normalizados (hashable: sirve de clave)."""
+
+    price_min: float | None = None
+    price_max: float | None = None
+    location: str | None = None
+    gender: str | None = None
+
+    @classmethod
+    def from_request(cls, data) -> "ListingFilter":
+        return cls(
+            price_min=data.price_min,
+            price_max=data.price_max,
+            location=normalize(data.location) if data.location else None,
+            gender=normalize(data.gender) if data.gender else None,
+        )
+
+    @property
+    def active(self) -> bool:
+        return any(v is not None for v in self)
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _clean(value):
+    # NaN no es JSON válido
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class ListingTable:
+    def __init__(self, columns: dict[str, list], sha256: str | None = None):
+        self.columns = columns
+        # SHA-256 del parquet del que salió la tabla (None si no se conoce)
+        self.sha256 = sha256
+        self.keys = tuple(columns)
+        self.n_rows = len(next(iter(columns.values()))) if columns else 0
+
+        self.bitmaps = {
+            key: self._bitmaps(columns[key]) for key in PARTITION_KEYS if key in columns
+        }
+        price = np.array(columns.get("price", []), dtype=np.float64)
+        # NaN queda al final del orden y fuera de cualquier rango
+        self.price_order = np.argsort(price, kind="stable")
+        self.price_sorted = price[self.price_order]
+
+    def _bitmaps(self, values: list) -> dict[str, np.ndarray]:
+        """
+        Un bitmap por valor. Para location también uno por el último tramo
+        separado por coma ("Austin, Texas" → "texas"), así se filtra por
+        estado o región.
+        """
+        rows = {}
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            value = normalize(value)
+            rows.setdefault(value, []).append(i)
+            region = value.rsplit(",", 1)[-1].strip()
+            if region != value:
+                rows.setdefault(region, []).append(i)
+
+        bitmaps = {}
+        for value, idx in rows.items():
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[np.unique(idx)] = True
+            bitmaps[value] = mask
+        return bitmaps
+
+    @classmethod
+    def from_parquet(
+        cls, path: str = LISTINGS_PATH, columns: dict = LISTING_COLUMNS
+    ) -> "ListingTable":
+        """
+        Lee solo `columns` del parquet. Los nombres se buscan sin distinguir
+        mayúsculas (el entrenamiento los pasa a minúsculas).
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No se encontró la tabla de listings en '{path}' (LISTINGS_PATH)"
+            )
+        available = {name.lower(): name for name in pq.read_schema(path).names}
+        missing = [c for c in columns if c.lower() not in available]
+        if missing:
+            raise ValueError(f"Columnas faltantes en {path}: {missing}")
+
+        table = pq.read_table(path, columns=[available[c.lower()] for c in columns])
+        return cls(
+            {
+                key: [_clean(v) for v in table.column(i).to_pylist()]
+                for i, key in enumerate(columns.values())
+            },
+            sha256=file_sha256(path),
+        )
+
+    @classmethod
+    def from_pack(cls, pack) -> "ListingTable":
+        return cls(
+            json.loads(bytes(pack.bytes(PACK_SECTION))),
+            sha256=pack.models.get("listings", {}).get("sha256"),
+        )
+
+    def to_bytes(self) -> bytes:
+        """Columnas como JSON, para guardarlas en el model pack."""
+        return json.dumps(self.columns).encode()
+
+    def check_catalog(self, meta: dict):
+        """
+        Verifica que la tabla sea el dataset de entrenamiento del recomendador
+        (`meta` de export_arrays): dataset_sha256 igual al de la tabla y
+        n_items dentro de sus filas. ValueError si no. Un export sin
+        dataset_sha256 (bundle legacy) solo se verifica por n_items.
+        """
+        expected = meta.get("dataset_sha256")
+        if expected is not None and self.sha256 != expected:
+            raise ValueError(
+                f"La tabla de listings (sha256 {self.sha256}) no es el dataset "
+                f"con el que se entrenó el recomendador (sha256 {expected})"
+            )
+        n_items = meta.get("n_items")
+        if n_items is not None and n_items > self.n_rows:
+            raise ValueError(
+                f"El recomendador tiene {n_items} items y la tabla de listings "
+                f"solo {self.n_rows} filas"
+            )
+
+    def candidates(self, filters: ListingFilter, n_rows: int | None = None):
+        """
+        Filas que cumplen todos los filtros (AND de bitmaps), limitadas a las
+        primeras `n_rows` (los items del recomendador). Índices ordenados.
+        """
+        n = self.n_rows if n_rows is None else min(n_rows, self.n_rows)
+        mask = np.ones(n, dtype=bool)
+        for key in PARTITION_KEYS:
+            value = getattr(filters, key)
+            if value is None:
+                continue
+            bitmap = self.bitmaps.get(key, {}).get(value)
+            if bitmap is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= bitmap[:n]
+
+        if filters.price_min is not None or filters.price_max is not None:
+            lo = (
+                np.searchsorted(self.price_sorted, filters.price_min, side="left")
+                if filters.price_min is not None
+                else 0
+            )
+            hi = np.searchsorted(
+                self.price_sorted,
+                np.inf if filters.price_max is None else filters.price_max,
+                side="right",
+            )
+            in_range = np.zeros(self.n_rows, dtype=bool)
+            in_range[self.price_order[lo:hi]] = True
+            mask &= in_range[:n]
+        return np.flatnonzero(mask)
+
+    def record(self, index: int) -> dict:
+        return {key: self.columns[key][index] for key in self.keys}
+
+    def stats(self) -> dict:
+        return {
+            "n_rows": self.n_rows,
+            "columns": list(self.keys),
+            "partitions": {key: len(values) for key, values in self.bitmaps.items()},
+        }
@@ -1,5 +1,15 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+import hmac
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import HTMLResponse, Response
+from metrics import CONTENT_TYPE, MetricsMiddleware, register_collector, render
+from utils import registry, reload_model
 
 from .docs import (
     get_horse_html,
@@ -9,14 +19,39 @@ from .docs import (
 )
 from .routers import engine, horse, prods
 
+# "" → carga lazy pura; "all" o lista separada por comas → pre-carga en background
+PREWARM_MODELS = os.getenv("PREWARM_MODELS", "")
+
+# Token para POST /models/{name}/reload. Sin definir (por defecto) el endpoint
+# no se registra: la API se despliega sin autenticación y cada reload
+# deserializa el modelo, reconstruye sus índices y vacía el cache.
+MODEL_RELOAD_TOKEN = os.getenv("MODEL_RELOAD_TOKEN", "")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PREWARM_MODELS == "all":
+        registry.prewarm()
+    else:
+        # La tabla de listings se lee siempre al arrancar (una vez, en
+        # background). Si falla la API arranca igual: solo /recommend con
+        # filtros y /recommend/batch la usan, y responden 503
+        names = [name for name in PREWARM_MODELS.split(",") if name]
+        registry.prewarm([*names, "listings"])
+    yield
+
+
 app = FastAPI(
     title="EquineLead API",
     description="""API de lead scoring y recomendación
     de caballos para e-commerce ecuestre.""",
     version="1.0.0",
     docs_url="/docs",  # podés cambiar la ruta si querés
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.add_route("/docs/overview", lambda r: HTMLResponse(get_overview_html()))
 app.add_route("/docs/horse", lambda r: HTMLResponse(get_horse_html()))
 app.add_route("/docs/prods", lambda r: HTMLResponse(get_prods_html()))
@@ -30,3 +65,103 @@ app.include_router(engine.router)
 @app.get("/", response_class=HTMLResponse)
 def api_root():
     return get_overview_html()
+
+
+@register_collector
+def _model_metrics():
+    status = registry.status()
+    return [
+        (
+            "equinelead_model_loaded",
+            "gauge",
+            "1 si el modelo está cargado en memoria",
+            [({"model": m}, int(s["loaded"])) for m, s in status.items()],
+        ),
+        (
+            "equinelead_model_load_seconds",
+            "gauge",
+            "Duración de la última carga de cada modelo",
+            [({"model": m}, t) for m, t in registry.load_times.items()],
+        ),
+        (
+            "equinelead_model_generation",
+            "gauge",
+            "Cantidad de cargas de cada modelo (sube con cada reload)",
+            [({"model": m}, s["generation"]) for m, s in status.items()],
+        ),
+        (
+            "equinelead_model_predict_calls_total",
+            "counter",
+            "Predicts por modelo y camino (chico / grande) de la política de threads",
+            [
+                ({"model": m, "threads": path}, stats[f"{path}_calls"])
+                for m, stats in registry.thread_stats().items()
+                for path in ("small", "large")
+            ],
+        ),
+    ]
+
+
+@register_collector
+def _batcher_metrics():
+    stats = {"horse": horse.batcher.stats(), "prods": prods.batcher.stats()}
+    return [
+        (
+            f"equinelead_batcher_{key}",
+            type_,
+            help_,
+            [({"router": r}, s[key]) for r, s in stats.items()],
+        )
+        for key, type_, help_ in [
+            ("queue_depth", "gauge", "Requests esperando en la cola del batcher"),
+            ("batches_total", "counter", "Batches evaluados por el batcher"),
+            ("rows_total", "counter", "Filas evaluadas por el batcher"),
+        ]
+    ]
+
+
+@register_collector
+def _cache_metrics():
+    stats = engine.response_cache.stats()
+    return [
+        (f"equinelead_recommender_cache_{key}", type_, help_, [({}, stats[stat])])
+        for key, stat, type_, help_ in [
+            ("hits_total", "hits", "counter", "Hits del cache de /recommend"),
+            ("misses_total", "misses", "counter", "Misses del cache de /recommend"),
+            ("evictions_total", "evictions", "counter", "Desalojos LRU del cache"),
+            ("size", "size", "gauge", "Entradas en el cache de /recommend"),
+        ]
+    ]
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/models/status")
+def models_status():
+    """Estado de carga y tiempo de deserialización de cada modelo."""
+    return registry.status()
+
+
+def models_reload(name: str, x_reload_token: str = Header(default="")):
+    """
+    Recarga un modelo desde ./models/production (p. ej. después de correr
+    download_production_models.py). Invalida los caches que dependen de él.
+    Requiere el header X-Reload-Token igual a MODEL_RELOAD_TOKEN.
+    """
+    if not hmac.compare_digest(x_reload_token.encode(), MODEL_RELOAD_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de reload inválido")
+    try:
+        reload_model(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return registry.status()[name]
+
+
+if MODEL_RELOAD_TOKEN:
+    app.post("/models/{name}/reload", include_in_schema=False)(models_reload)
@@ -0,0 +1,304 @@
+"""
+Métricas en formato de texto de Prometheus, sin dependencias externas.
+
+- Counter / Gauge / Histogram con labels, thread-safe y de bajo costo
+  (un lock, un bisect y un incremento por observación)
+- MetricsMiddleware: middleware ASGI puro que cuenta requests por ruta y
+  status, mide la latencia de punta a punta y lleva el gauge de requests en
+  curso
+- StageTimer: desglose por etapa dentro de un endpoint
+  (validate / featurize / model / format). "format" es el armado del dict
+  de respuesta; el encoding a JSON lo hace FastAPI después de que el handler
+  devuelve y queda dentro de la latencia total del middleware
+- register_collector(): métricas que se leen recién al hacer scrape (tiempos
+  de carga de modelos, stats del micro-batcher y del cache)
+
+Las rutas se etiquetan con su template ("/horse/predict"), no con el path
+real, para que la cardinalidad quede acotada.
+
+Con varios workers (serve.py) cada proceso tiene sus propios contadores. Si
+METRICS_DIR está seteado, cada worker vuelca un snapshot de sus métricas a
+METRICS_DIR/<pid>.json cada METRICS_FLUSH_S segundos, todas las series
+llevan el label worker="<pid>" y /metrics devuelve las de todos los workers
+vivos, no solo las del que atendió el scrape.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Latencia de requests completos (segundos)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Etapas internas: del orden de microsegundos a milisegundos
+STAGE_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.05)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Snapshots por worker (serve.py lo setea con más de un worker)
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_S = float(os.getenv("METRICS_FLUSH_S", "5"))
+
+
+def _labels(names: tuple, values: tuple, *extra: str) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [e for e in extra if e]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self, worker: str = "") -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_labels(self.labelnames, k, worker)} {_fmt(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [conteos por bucket (+Inf al final), suma]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][i] += 1
+            state[1] += value
+
+    def samples(self, worker: str = "") -> list[str]:
+        with self._lock:
+            items = [
+                (k, list(counts), total) for k, (counts, total) in self._values.items()
+            ]
+        lines = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, worker, le)} "
+                    f"{cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels, worker)
+            lines.append(f"{self.name}_sum{suffix} {total!r}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+_COLLECTORS = []
+
+
+def register_collector(fn):
+    """
+    `fn()` se llama en cada scrape y devuelve una lista de
+    (name, type, help, [(labels_dict, value), ...]).
+    """
+    _COLLECTORS.append(fn)
+    return fn
+
+
+def _families() -> list[tuple[str, list[str], list[str]]]:
+    """(nombre, líneas HELP/TYPE, samples) de cada métrica de este proceso."""
+    worker = f'worker="{os.getpid()}"' if METRICS_DIR else ""
+    families = [(m.name, m.header(), m.samples(worker)) for m in REGISTRY]
+    for collector in _COLLECTORS:
+        for name, type_, help_, samples in collector():
+            families.append(
+                (
+                    name,
+                    [f"# HELP {name} {help_}", f"# TYPE {name} {type_}"],
+                    [
+                        f"{name}{_labels(tuple(lbl), tuple(lbl.values()), worker)} "
+                        f"{_fmt(value)}"
+                        for lbl, value in samples
+                    ],
+                )
+            )
+    return families
+
+
+def _snapshot_path(pid: int | None = None) -> str:
+    return os.path.join(METRICS_DIR, f"{pid or os.getpid()}.json")
+
+
+def write_snapshot(families=None):
+    """Vuelca las métricas de este worker a METRICS_DIR (escritura atómica)."""
+    path = _snapshot_path()
+    # Un tmp por thread: el scrape y el flush periódico pueden coincidir
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(families if families is not None else _families(), f)
+    os.replace(tmp_path, path)
+
+
+def _merge_workers(own: list) -> list:
+    """
+    Agrega a las familias de este proceso los samples de los snapshots de
+    los demás workers. Los snapshots más viejos que 3 × METRICS_FLUSH_S son
+    de workers que ya no existen y se ignoran.
+    """
+    write_snapshot(own)
+    merged = {name: (header, list(samples)) for name, header, samples in own}
+    now = time.time()
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        if path == _snapshot_path():
+            continue
+        try:
+            if now - os.path.getmtime(path) > 3 * METRICS_FLUSH_S:
+                continue
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, header, samples in snapshot:
+            merged.setdefault(name, (header, []))[1].extend(samples)
+    return [(name, header, samples) for name, (header, samples) in merged.items()]
+
+
+def render() -> str:
+    families = _families()
+    if METRICS_DIR:
+        families = _merge_workers(families)
+    lines = []
+    for _, header, samples in families:
+        lines += header + samples
+    return "\n".join(lines) + "\n"
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_S)
+        try:
+            write_snapshot()
+        except Exception as e:
+            print(f"⚠️  No se pudo escribir el snapshot de métricas: {e}")
+
+
+if METRICS_DIR:
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+# ── Métricas de la API ────────────────────────────────────────────────────────
+
+REQUESTS = Counter(
+    "equinelead_http_requests_total",
+    "Requests HTTP por ruta, método y status",
+    ("route", "method", "status"),
+)
+LATENCY = Histogram(
+    "equinelead_http_request_duration_seconds",
+    "Latencia de punta a punta por ruta",
+    ("route", "method"),
+)
+IN_FLIGHT = Gauge("equinelead_http_requests_in_flight", "Requests HTTP en curso")
+STAGES = Histogram(
+    "equinelead_stage_duration_seconds",
+    "Duración de cada etapa dentro de un endpoint",
+    ("route", "stage"),
+    buckets=STAGE_BUCKETS,
+)
+
+
+class StageTimer:
+    """
+    timer = StageTimer("/horse/predict")
+    ...; timer.mark("validate")
+    ...; timer.mark("model")
+
+    Cada mark() observa el tiempo desde el mark anterior (o la creación).
+    """
+
+    __slots__ = ("route", "t")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.t = time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        STAGES.observe(now - self.t, self.route, stage)
+        self.t = now
+
+
+class MetricsMiddleware:
+    """Middleware ASGI puro (sin BaseHTTPMiddleware, que agrega un task)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            IN_FLIGHT.dec()
+            # Starlette deja la ruta matcheada en el scope después del routing
+            path = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            REQUESTS.inc(path, method, str(status[0]))
+            LATENCY.observe(elapsed, path, method)
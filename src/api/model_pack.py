@@ -0,0 +1,223 @@
+"""
+Model pack: un único archivo con todos los artefactos de producción.
+
+Layout:
+    [0:8)    magic b"EQLPACK1"
+    [8:16)   largo del manifest (uint64 little-endian)
+    [16:..)  manifest JSON (utf-8)
+    secciones binarias, cada una alineada a ALIGN bytes
+
+El manifest guarda metadatos por modelo (`models`) y, por sección, su offset
+relativo al inicio de datos, dtype y shape. La API abre el archivo con mmap y
+expone cada sección como un np.ndarray de solo lectura sin copiarlo, de modo
+que varios workers de uvicorn comparten las mismas páginas del page cache y
+el arranque no pasa por pickle.
+"""
+
+import datetime
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+import cloudpickle
+import numpy as np
+import xgboost as xgb
+from listings import PACK_SECTION, ListingTable
+from recommender import EXPORT_ARRAYS_FILE, load_export
+from tree_engine import NumpyForest
+
+# Código de entrenamiento del recomendador (export_arrays para bundles legacy)
+ENGINE_SRC = Path(__file__).resolve().parents[1] / "experiments" / "engine"
+
+MAGIC = b"EQLPACK1"
+ALIGN = 64
+PACK_VERSION = 1
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_pack(path: str, sections: dict, models: dict) -> str:
+    """
+    Escribe un pack.
+
+    Args:
+        sections: nombre → np.ndarray o bytes (p. ej. "HORSE_P1/booster")
+        models:   metadatos JSON-serializables por modelo
+
+    Se escribe a un archivo temporal y se renombra, para que un worker que
+    esté leyendo el pack anterior nunca vea uno a medio escribir.
+    """
+    index = {}
+    blobs = []
+    offset = 0
+    for name, data in sections.items():
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            blob, dtype, shape = bytes(data), "bytes", [len(data)]
+        else:
+            arr = np.ascontiguousarray(data)
+            blob, dtype, shape = arr.tobytes(), arr.dtype.str, list(arr.shape)
+        offset = _align(offset)
+        index[name] = {
+            "offset": offset,
+            "nbytes": len(blob),
+            "dtype": dtype,
+            "shape": shape,
+        }
+        blobs.append((offset, blob))
+        offset += len(blob)
+
+    manifest = json.dumps(
+        {
+            "pack_version": PACK_VERSION,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "models": models,
+            "sections": index,
+        }
+    ).encode()
+    data_start = _align(16 + len(manifest))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(manifest)) + manifest)
+        for rel_offset, blob in blobs:
+            f.seek(data_start + rel_offset)
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ModelPack:
+    """Lectura de un pack vía mmap; las secciones se devuelven sin copiar."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f"{path} no es un model pack válido")
+        (manifest_len,) = struct.unpack("<Q", self._mm[8:16])
+        manifest = json.loads(self._mm[16 : 16 + manifest_len])
+
+        self.manifest = manifest
+        self.models = manifest["models"]
+        self.sections = manifest["sections"]
+        self._data_start = _align(16 + manifest_len)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def bytes(self, name: str) -> memoryview:
+        sec = self.sections[name]
+        start = self._data_start + sec["offset"]
+        return memoryview(self._mm)[start : start + sec["nbytes"]]
+
+    def array(self, name: str) -> np.ndarray:
+        sec = self.sections[name]
+        if sec["dtype"] == "bytes":
+            raise TypeError(f"La sección '{name}' es binaria, usar .bytes()")
+        dtype = np.dtype(sec["dtype"])
+        count = sec["nbytes"] // dtype.itemsize
+        arr = np.frombuffer(
+            self._mm, dtype=dtype, count=count, offset=self._data_start + sec["offset"]
+        )
+        return arr.reshape(sec["shape"])
+
+    def arrays(self, prefix: str) -> dict:
+        """Todas las secciones `prefix/<clave>` como {clave: array}."""
+        head = f"{prefix}/"
+        return {
+            name[len(head) :]: self.array(name)
+            for name, sec in self.sections.items()
+            if name.startswith(head) and sec["dtype"] != "bytes"
+        }
+
+
+# ── Construcción desde ./models/production ────────────────────────────────────
+
+
+def build_model_pack(
+    models_dir: str,
+    out_path: str,
+    versions: dict | None = None,
+    listings_path: str | None = None,
+) -> str:
+    """
+    Arma el pack a partir de los artefactos descargados del registry:
+    - XGBoost (model.ubj): bytes del booster + arrays de NumpyForest
+    - model_engine (artifacts_bundle): la salida de export_arrays tal cual
+      (arrays → secciones, meta → models["model_engine"]); la lee
+      NumpyRecommender.from_pack
+    - listings_path: parquet de listings, reducido a las columnas que usa la
+      API (ListingTable); falla si no existe o si no es el dataset con el que
+      se entrenó model_engine (ListingTable.check_catalog)
+    """
+    versions = versions or {}
+    sections, models = {}, {}
+
+    for ubj_path in sorted(glob.glob(os.path.join(models_dir, "*", "model.ubj"))):
+        name = os.path.basename(os.path.dirname(ubj_path))
+        with open(ubj_path, "rb") as f:
+            raw = f.read()
+        booster = xgb.Booster()
+        booster.load_model(bytearray(raw))
+        arrays, meta = NumpyForest.from_booster(booster).to_arrays()
+
+        sections[f"{name}/booster"] = raw
+        for key, arr in arrays.items():
+            sections[f"{name}/forest/{key}"] = arr
+        models[name] = {"kind": "xgboost", "version": versions.get(name), **meta}
+
+    engine_dir = os.path.join(models_dir, "model_engine", "artifacts_bundle")
+    engine = _load_engine_arrays(engine_dir)
+    if engine is not None:
+        arrays, meta = engine
+        for key, arr in arrays.items():
+            sections[f"model_engine/{key}"] = arr
+        models["model_engine"] = {
+            "kind": "knn",
+            "version": versions.get("model_engine"),
+            **meta,
+        }
+
+    if listings_path is not None:
+        table = ListingTable.from_parquet(listings_path)
+        if "model_engine" in models:
+            table.check_catalog(models["model_engine"])
+        sections[PACK_SECTION] = table.to_bytes()
+        models["listings"] = {
+            "kind": "table",
+            "n_rows": table.n_rows,
+            "sha256": table.sha256,
+        }
+
+    return write_pack(out_path, sections, models)
+
+
+def _load_engine_arrays(bundle_dir: str) -> tuple[dict, dict] | None:
+    """
+    Salida de export_arrays del recomendador, sin tocarla. Usa los archivos
+    exportados por train.py si están; si no, deserializa una única vez el
+    bundle cloudpickle legacy y le aplica el mismo export_arrays (solo acá,
+    al armar el pack: la API después solo hace mmap).
+    """
+    if os.path.exists(os.path.join(bundle_dir, EXPORT_ARRAYS_FILE)):
+        return load_export(bundle_dir)
+
+    bundles = glob.glob(os.path.join(bundle_dir, "*.pkl"))
+    if not bundles:
+        return None
+
+    # Import diferido: model.py trae sklearn / scipy, que la API no necesita
+    sys.path.append(str(ENGINE_SRC))
+    from model import export_arrays
+
+    with open(bundles[0], "rb") as f:
+        bundle = cloudpickle.load(f)
+    return export_arrays(bundle["model"], bundle["vectorizer"], bundle["scaler"])
@@ -0,0 +1,562 @@
+"""
+Motor de recomendación sin pickle ni sklearn.
+
+Reimplementa en NumPy lo que hace el bundle cloudpickle de model_engine:
+- transform_input: TF-IDF de "breed color" + precio escalado (MinMaxScaler)
+- kneighbors: KNN coseno brute-force sobre la matriz de items (CSR), con un
+  TopKIndex opcional que precalcula candidatos por breed/color y precio, o
+  aproximado con las listas invertidas del IVFIndex exportado (IVFProbe)
+- kneighbors_batch: muchas queries con un solo producto de matrices sobre la
+  factorización de los items en combinaciones breed/color × precio
+- kneighbors_subset: lo mismo restringido a un subconjunto de items (los
+  candidatos de un filtro del catálogo, ver listings.py)
+
+Los arrays salen del model pack (mmap) o de los archivos exportados por
+src/experiments/engine/train.py, así que la matriz de items no se copia.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+# Arrays mínimos de export_arrays (el pack y el .npz guardan todos los que exporta)
+ARRAY_KEYS = (
+    "idf",
+    "scaler_min",
+    "scaler_scale",
+    "items_data",
+    "items_indices",
+    "items_indptr",
+)
+# Opciones del TfidfVectorizer que solo se soportan con su valor por defecto
+# (export_arrays ya falla al exportar si el vectorizador usa otro)
+TFIDF_DEFAULTS = {
+    "analyzer": "word",
+    "ngram_range": [1, 1],
+    "stop_words": None,
+    "strip_accents": None,
+}
+# Listas invertidas que export_arrays agrega si el backend es "ivf"
+IVF_ARRAY_KEYS = ("ivf_centroids", "ivf_list_offsets", "ivf_list_items")
+KNN_BACKENDS = ("brute", "ivf")
+EXPORT_ARRAYS_FILE = "recommender_arrays.npz"
+EXPORT_META_FILE = "recommender_meta.json"
+
+# Tamaño del memo de vectores TF-IDF por "breed color" normalizado
+TEXT_CACHE_SIZE = int(os.getenv("RECOMMENDER_TEXT_CACHE_SIZE", "4096"))
+# Celdas (queries × items) de la matriz de distancias por bloque en batch
+BATCH_BLOCK_CELLS = 1 << 22
+
+
+def load_export(export_dir: str) -> tuple[dict, dict]:
+    """(arrays, meta) de export_arrays guardados por train.py en `export_dir`."""
+    with np.load(os.path.join(export_dir, EXPORT_ARRAYS_FILE)) as npz:
+        arrays = {k: npz[k] for k in npz.files}
+    with open(os.path.join(export_dir, EXPORT_META_FILE)) as f:
+        meta = json.load(f)
+    return arrays, meta
+
+
+def _row_dot(data, indices, indptr, Q: np.ndarray) -> np.ndarray:
+    """Producto Q @ items.T para una matriz CSR dada por sus arrays."""
+    prod = Q[:, indices] * data
+    # reduceat no soporta filas vacías: se agrega un 0 final y se las anula
+    prod = np.concatenate([prod, np.zeros((len(Q), 1))], axis=1)
+    out = np.add.reduceat(prod, indptr[:-1], axis=1)
+    out[:, indptr[1:] == indptr[:-1]] = 0.0
+    return out
+
+
+class NumpyRecommender:
+    def __init__(self, arrays: dict, meta: dict, knn_backend: str | None = None):
+        self.meta = meta
+        self.vocabulary = {t: i for i, t in enumerate(meta["vocabulary"])}
+        self.token_re = re.compile(meta["token_pattern"])
+        self.lowercase = meta["lowercase"]
+        self.norm = meta["norm"]
+        self.use_idf = meta["use_idf"]
+        self.binary = meta["binary"]
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.n_neighbors = meta["n_neighbors"]
+        self.n_text = len(self.vocabulary)
+        self.n_features = meta["n_features"]
+
+        self.idf = arrays["idf"]
+        self.scaler_min = arrays["scaler_min"]
+        self.scaler_scale = arrays["scaler_scale"]
+        self.items_data = arrays["items_data"]
+        self.items_indices = arrays["items_indices"]
+        self.items_indptr = arrays["items_indptr"]
+        self.n_items = len(self.items_indptr) - 1
+
+        if meta.get("metric", "cosine") != "cosine":
+            raise ValueError(f"Métrica no soportada: {meta['metric']}")
+        unsupported = {
+            key: meta[key]
+            for key, default in TFIDF_DEFAULTS.items()
+            if key in meta and meta[key] != default
+        }
+        if unsupported:
+            raise ValueError(
+                f"Opciones del TfidfVectorizer no soportadas: {unsupported}"
+            )
+        # Exports anteriores no guardaban clip: MinMaxScaler() no recorta
+        self.clip = meta.get("scaler_clip", False)
+        self.feature_range = meta.get("scaler_feature_range", [0.0, 1.0])
+
+        sq = self.items_data.astype(np.float64) ** 2
+        starts, ends = self.items_indptr[:-1], self.items_indptr[1:]
+        sums = np.add.reduceat(np.append(sq, 0.0), starts)
+        sums[starts == ends] = 0.0
+        self.item_norms = np.sqrt(sums)
+        self.index = None
+
+        # "brute" → scan exacto; "ivf" → IVFProbe. Por defecto, el backend con
+        # el que se entrenó (knn_backend del export)
+        self.knn_backend = knn_backend or meta.get("knn_backend", "brute")
+        if self.knn_backend not in KNN_BACKENDS:
+            raise ValueError(
+                f"Backend KNN desconocido '{self.knn_backend}'. "
+                f"Opciones: {KNN_BACKENDS}"
+            )
+        self.ivf = None
+        if self.knn_backend == "ivf":
+            self.ivf = IVFProbe.from_arrays(arrays, meta)
+
+        # El espacio breed × color es chico: el vector de cada texto se
+        # calcula una vez y se reutiliza (acotado, LRU)
+        self.text_vector = lru_cache(maxsize=TEXT_CACHE_SIZE)(self._text_vector)
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict, meta: dict, knn_backend: str | None = None
+    ) -> "NumpyRecommender":
+        """
+        Desde la salida de export_arrays (src/experiments/engine/model.py),
+        tal cual: es el único formato que leen el pack y el .npz exportado.
+        """
+        missing = [k for k in ARRAY_KEYS if k not in arrays]
+        if missing:
+            raise ValueError(f"Faltan arrays del recomendador: {missing}")
+        return cls(arrays, meta, knn_backend)
+
+    @classmethod
+    def from_pack(
+        cls, pack, name: str = "model_engine", knn_backend: str | None = None
+    ) -> "NumpyRecommender":
+        return cls.from_arrays(pack.arrays(name), pack.models[name], knn_backend)
+
+    @classmethod
+    def from_export(
+        cls, export_dir: str, knn_backend: str | None = None
+    ) -> "NumpyRecommender":
+        return cls.from_arrays(*load_export(export_dir), knn_backend)
+
+    # ── Features ──────────────────────────────────────────────────────────────
+
+    def _text_vector(self, text: str) -> np.ndarray:
+        """Equivalente a TfidfVectorizer.transform([text]) denso (solo lectura)."""
+        if self.lowercase:
+            text = text.lower()
+        counts = Counter(
+            self.vocabulary[t]
+            for t in self.token_re.findall(text)
+            if t in self.vocabulary
+        )
+        vec = np.zeros(self.n_text)
+        for idx, n in counts.items():
+            tf = 1.0 if self.binary else float(n)
+            vec[idx] = 1.0 + math.log(tf) if self.sublinear_tf else tf
+        if self.use_idf:
+            vec *= self.idf
+        if self.norm == "l2":
+            norm = np.sqrt(vec @ vec)
+            if norm > 0:
+                vec /= norm
+        elif self.norm == "l1":
+            norm = np.abs(vec).sum()
+            if norm > 0:
+                vec /= norm
+        vec.setflags(write=False)
+        return vec
+
+    def scale_price(self, price) -> np.ndarray:
+        price = np.asarray(price, dtype=np.float64)
+        price = np.where(np.isnan(price), 0.0, price)
+        scaled = price * self.scaler_scale[0] + self.scaler_min[0]
+        if self.clip:
+            scaled = np.clip(scaled, *self.feature_range)
+        return scaled
+
+    def transform_input(self, data: dict | list[dict]) -> np.ndarray:
+        """
+        Mismas reglas que transform_input de features.py: breed/color nulos →
+        "desconocido", texto en minúsculas, precio no numérico → 0.
+        Devuelve una matriz densa (n, n_features).
+        """
+        rows = [data] if isinstance(data, dict) else data
+        X = np.empty((len(rows), self.n_features))
+        for i, row in enumerate(rows):
+            breed = _fill_text(row.get("breed"))
+            color = _fill_text(row.get("color"))
+            X[i, : self.n_text] = self.text_vector(f"{breed} {color}".lower())
+        X[:, self.n_text] = self.scale_price(
+            [_to_float(row.get("price")) for row in rows]
+        )
+        return X
+
+    # ── KNN ───────────────────────────────────────────────────────────────────
+
+    def cosine_distances(self, X: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(X)
+        dots = _row_dot(self.items_data, self.items_indices, self.items_indptr, X)
+        norms = np.sqrt(np.einsum("ij,ij->i", X, X))[:, None] * self.item_norms
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sims = np.where(norms > 0, dots / norms, 0.0)
+        return np.clip(1.0 - sims, 0.0, 2.0)
+
+    @cached_property
+    def item_factors(self) -> "ItemFactors":
+        return ItemFactors(self)
+
+    def kneighbors_batch(self, X: np.ndarray, n_neighbors: int | None = None):
+        """
+        kneighbors para muchas queries: el texto de todo el batch se
+        multiplica una sola vez contra las combinaciones breed/color del
+        catálogo (ItemFactors) y el precio se suma como producto externo.
+        Exacto, en bloques de BATCH_BLOCK_CELLS para acotar la memoria.
+        """
+        X = np.atleast_2d(X)
+        k = min(n_neighbors or self.n_neighbors, self.n_items)
+        return self._rank(X, k)
+
+    def kneighbors_subset(
+        self, X: np.ndarray, candidates: np.ndarray, n_neighbors: int | None = None
+    ):
+        """
+        Como kneighbors_batch pero calculando distancias solo contra
+        `candidates` (índices de items). Devuelve hasta n_neighbors vecinos
+        por query: menos si hay menos candidatos. Los índices devueltos son
+        del catálogo completo.
+        """
+        X = np.atleast_2d(X)
+        # Ordenados: los empates se resuelven por índice de item (ver _top_k)
+        candidates = np.sort(np.asarray(candidates, dtype=np.int64))
+        k = min(n_neighbors or self.n_neighbors, len(candidates))
+        if k == 0:
+            return np.empty((len(X), 0)), np.empty((len(X), 0), dtype=np.int64)
+        distances, pos = self._rank(X, k, candidates)
+        return distances, candidates[pos]
+
+    def _rank(self, X: np.ndarray, k: int, items: np.ndarray | None = None):
+        """Top-k de X contra `items` (todos si es None): (distancias, posiciones)."""
+        f = self.item_factors
+        combo_of_item, price, item_norms = f.combo_of_item, f.price, self.item_norms
+        if items is not None:
+            combo_of_item, price = combo_of_item[items], price[items]
+            item_norms = item_norms[items]
+
+        text_dots = X[:, : self.n_text] @ f.combos.T
+        q_norms = np.sqrt(np.einsum("ij,ij->i", X, X))
+        distances = np.empty((len(X), k))
+        positions = np.empty((len(X), k), dtype=np.int64)
+        block = max(1, BATCH_BLOCK_CELLS // len(combo_of_item))
+        for start in range(0, len(X), block):
+            rows = slice(start, start + block)
+            dots = text_dots[rows][:, combo_of_item]
+            dots += X[rows, self.n_text, None] * price
+            norms = q_norms[rows, None] * item_norms
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sims = np.where(norms > 0, dots / norms, 0.0)
+            dist = np.clip(1.0 - sims, 0.0, 2.0)
+            distances[rows], positions[rows] = _top_k(dist, k)
+        return distances, positions
+
+    def build_index(self, n_buckets: int = 32) -> "TopKIndex | None":
+        """Construye el TopKIndex para n_neighbors (None si no aplica)."""
+        if n_buckets > 0 and self.n_items > self.n_neighbors:
+            self.index = TopKIndex(self, self.n_neighbors, n_buckets)
+        return self.index
+
+    def kneighbors(self, X: np.ndarray, n_neighbors: int | None = None):
+        """
+        Misma salida que NearestNeighbors.kneighbors: (distances, indices).
+        Si hay TopKIndex, cada fila se resuelve sobre su lista de candidatos y
+        solo las combinaciones breed/color no vistas hacen el scan completo;
+        con el backend "ivf" esas filas se rankean solo contra los items de
+        las listas que sondea IVFProbe (aproximado).
+        """
+        X = np.atleast_2d(X)
+        k = min(n_neighbors or self.n_neighbors, self.n_items)
+        distances = np.empty((len(X), k))
+        indices = np.empty((len(X), k), dtype=np.int64)
+
+        pending = np.arange(len(X))
+        if self.index is not None and k <= self.index.k:
+            hits = [self.index.query(x, k) for x in X]
+            pending = np.array([i for i, h in enumerate(hits) if h is None], int)
+            for i, h in enumerate(hits):
+                if h is not None:
+                    distances[i], indices[i] = h
+
+        if len(pending) and self.ivf is not None:
+            for i, cand in zip(pending, self.ivf.candidates(X[pending], k)):
+                dist, idx = self.kneighbors_subset(X[i], cand, k)
+                distances[i], indices[i] = dist[0], idx[0]
+        elif len(pending):
+            dist = self.cosine_distances(X[pending])
+            distances[pending], indices[pending] = _top_k(dist, k)
+        return distances, indices
+
+
+def _top_k(dist: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Los k menores por fila, ordenados por (distancia, columna). El desempate
+    por columna es determinista: con columnas en orden de índice de item
+    (scan completo, candidatos ordenados) /recommend, /recommend/batch y el
+    TopKIndex devuelven los mismos vecinos empatados en el mismo orden.
+    """
+    rows = np.arange(len(dist))[:, None]
+    kth = np.take_along_axis(
+        dist, np.argpartition(dist, k - 1, axis=1)[:, k - 1 : k], axis=1
+    )
+    # Todos los < kth entran; los == kth completan los k por orden de columna
+    less, tied = dist < kth, dist == kth
+    room = k - less.sum(axis=1, keepdims=True)
+    take = less | (tied & (np.cumsum(tied, axis=1) <= room))
+    idx = np.nonzero(take)[1].reshape(len(dist), k)
+    idx = idx[rows, np.argsort(dist[rows, idx], axis=1, kind="stable")]
+    return dist[rows, idx], idx
+
+
+class ItemFactors:
+    """
+    La matriz de items factorizada como combos[combo_of_item] (parte de texto:
+    hay pocas combinaciones breed/color distintas) más la columna de precio.
+    La comparten TopKIndex y kneighbors_batch.
+    """
+
+    # Redondeo para usar el vector TF-IDF como clave de dict
+    KEY_DECIMALS = 9
+
+    def __init__(self, rec: NumpyRecommender):
+        n = rec.n_items
+        dense = np.zeros((n, rec.n_features))
+        rows = np.repeat(np.arange(n), np.diff(rec.items_indptr))
+        dense[rows, rec.items_indices] = rec.items_data
+        T, self.price = dense[:, : rec.n_text], dense[:, rec.n_text].copy()
+
+        keys = self._keys(T)
+        _, first, combo_of_item = np.unique(
+            keys, axis=0, return_index=True, return_inverse=True
+        )
+        self.combo_of_item = combo_of_item.ravel()
+        self.combos = T[first]
+        self.combo_key = {keys[i].tobytes(): c for c, i in enumerate(first)}
+
+    def _keys(self, T: np.ndarray) -> np.ndarray:
+        # + 0.0 normaliza -0.0 para que tobytes() coincida
+        return np.round(T, self.KEY_DECIMALS) + 0.0
+
+    def combo(self, t: np.ndarray) -> int | None:
+        """Combinación del catálogo con vector de texto `t` (None si no hay)."""
+        return self.combo_key.get(self._keys(t).tobytes())
+
+
+class TopKIndex:
+    """
+    Índice precalculado de candidatos por (breed, color) × bucket de precio.
+
+    Cada item es (t_i, p_i): vector TF-IDF de su breed/color y precio escalado.
+    Para una query (t, p) con t igual al de una combinación del catálogo, la
+    similitud coseno con el item i es proporcional a
+        f_i(p) = (t·t_i + p·p_i) / |x_i|
+    que es lineal en p. Dentro de un bucket [lo, hi], si L es el k-ésimo mayor
+    de min(f_i(lo), f_i(hi)), ningún item con max(f_i(lo), f_i(hi)) < L puede
+    entrar al top-k. Los sobrevivientes son la lista de candidatos: el
+    re-rank exacto sobre ellos da el mismo resultado que el scan completo.
+
+    Queries con breed/color fuera del catálogo o precio fuera de rango
+    devuelven None (→ scan completo).
+    """
+
+    COMBO_CHUNK = 256
+
+    def __init__(self, rec: NumpyRecommender, k: int, n_buckets: int = 32):
+        self.k = k
+        self.n_text = rec.n_text
+        self.factors = f = rec.item_factors
+        self.combo_of_item = f.combo_of_item
+        self.price = f.price
+        # Producto t_c · t_c' entre combinaciones: el dot de texto sin tocar items
+        self.gram = f.combos @ f.combos.T
+        self.norms = rec.item_norms
+
+        self.edges = np.unique(
+            np.quantile(self.price, np.linspace(0, 1, n_buckets + 1))
+        )
+        self.candidates = self._build_candidates()
+
+    def _build_candidates(self) -> list[list[np.ndarray]]:
+        inv = np.divide(
+            1.0, self.norms, out=np.zeros_like(self.norms), where=self.norms > 0
+        )
+        slope = self.price * inv
+        n_combos = len(self.gram)
+        candidates = [[None] * (len(self.edges) - 1) for _ in range(n_combos)]
+
+        for start in range(0, n_combos, self.COMBO_CHUNK):
+            chunk = range(start, min(start + self.COMBO_CHUNK, n_combos))
+            # intercept[i, j] = t_{chunk j} · t_i / |x_i|
+            intercept = self.gram[list(chunk)][:, self.combo_of_item].T * inv[:, None]
+            for b, (lo, hi) in enumerate(zip(self.edges[:-1], self.edges[1:])):
+                f_lo = intercept + lo * slope[:, None]
+                f_hi = intercept + hi * slope[:, None]
+                kth = -np.partition(-np.minimum(f_lo, f_hi), self.k - 1, axis=0)[
+                    self.k - 1
+                ]
+                mask = np.maximum(f_lo, f_hi) >= kth - 1e-12
+                for j, c in enumerate(chunk):
+                    candidates[c][b] = np.flatnonzero(mask[:, j]).astype(np.int32)
+        return candidates
+
+    def query(self, x: np.ndarray, k: int):
+        t, p = x[: self.n_text], x[self.n_text]
+        combo = self.factors.combo(t)
+        if combo is None or not self.edges[0] <= p <= self.edges[-1]:
+            return None
+
+        b = min(np.searchsorted(self.edges, p, side="right") - 1, len(self.edges) - 2)
+        cand = self.candidates[combo][b]
+        dots = self.gram[combo, self.combo_of_item[cand]] + p * self.price[cand]
+        denom = np.sqrt(t @ t + p * p) * self.norms[cand]
+        sims = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+        dist, pos = _top_k(np.clip(1.0 - sims, 0.0, 2.0)[None, :], k)
+        return dist[0], cand[pos[0]]
+
+    def stats(self) -> dict:
+        sizes = [len(c) for lists in self.candidates for c in lists]
+        return {
+            "combos": len(self.candidates),
+            "price_buckets": len(self.edges) - 1,
+            "avg_candidates": round(float(np.mean(sizes)), 1) if sizes else 0.0,
+            "max_candidates": int(max(sizes, default=0)),
+        }
+
+
+class IVFProbe:
+    """
+    Listas invertidas del IVFIndex de entrenamiento (ann.py), tal como las
+    exporta export_arrays: centroides unitarios y, por celda c, los items
+    list_items[list_offsets[c]:list_offsets[c + 1]]. Para cada query elige
+    las n_probe celdas de centroide más cercano (más, si no suman k items),
+    igual que IVFIndex.kneighbors; el ranking sobre esos candidatos lo hace
+    NumpyRecommender de forma exacta.
+    """
+
+    def __init__(self, centroids, list_offsets, list_items, n_probe: int):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_items = list_items
+        self.n_probe = min(n_probe, len(centroids))
+        self.sizes = np.diff(list_offsets)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict) -> "IVFProbe":
+        missing = [k for k in IVF_ARRAY_KEYS if k not in arrays]
+        if missing:
+            raise ValueError(
+                f"Backend 'ivf' sin listas invertidas exportadas: faltan {missing}"
+            )
+        return cls(
+            arrays["ivf_centroids"],
+            arrays["ivf_list_offsets"],
+            arrays["ivf_list_items"],
+            meta["n_probe"],
+        )
+
+    def candidates(self, X: np.ndarray, k: int) -> list[np.ndarray]:
+        """Índices de items a rankear para cada fila de X."""
+        X = np.atleast_2d(X)
+        norms = np.sqrt(np.einsum("ij,ij->i", X, X))[:, None]
+        Q = np.divide(X, norms, out=np.zeros_like(X), where=norms > 0)
+        cell_order = np.argsort(-(Q @ self.centroids.T), axis=1)
+
+        out = []
+        for order in cell_order:
+            covered = np.searchsorted(np.cumsum(self.sizes[order]), k)
+            n_cells = max(self.n_probe, int(covered) + 1)
+            out.append(
+                np.concatenate(
+                    [
+                        self.list_items[self.list_offsets[c] : self.list_offsets[c + 1]]
+                        for c in order[:n_cells]
+                    ]
+                )
+            )
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "n_lists": len(self.centroids),
+            "n_probe": self.n_probe,
+            "avg_list_size": round(float(self.sizes.mean()), 1),
+        }
+
+
+class BundleRecommender:
+    """Adaptador del bundle cloudpickle legacy a la interfaz de arriba."""
+
+    def __init__(self, bundle: dict):
+        self.bundle = bundle
+        self.model = bundle["model"]
+        self._transform_fn = bundle["transform_fn"]
+        self.n_items = self.model._fit_X.shape[0]
+        # El bundle no guarda dataset_sha256: la tabla de listings solo se
+        # puede verificar por cantidad de items
+        self.meta = {"n_items": self.n_items}
+
+    def transform_input(self, data: dict | list[dict]):
+        if isinstance(data, list):
+            import pandas as pd
+
+            data = pd.DataFrame(data)
+        return self._transform_fn(
+            data, self.bundle["vectorizer"], self.bundle["scaler"]
+        )
+
+    def kneighbors(self, X, n_neighbors: int | None = None):
+        return self.model.kneighbors(X, n_neighbors)
+
+    # NearestNeighbors ya resuelve el batch con un producto sparse
+    kneighbors_batch = kneighbors
+
+    def kneighbors_subset(self, X, candidates, n_neighbors: int | None = None):
+        from sklearn.metrics.pairwise import cosine_distances
+
+        candidates = np.sort(np.asarray(candidates, dtype=np.int64))
+        k = min(n_neighbors or self.model.n_neighbors, len(candidates))
+        if k == 0:
+            return np.empty((X.shape[0], 0)), np.empty((X.shape[0], 0), dtype=int)
+        dist = cosine_distances(X, self.model._fit_X[candidates])
+        distances, pos = _top_k(dist, k)
+        return distances, candidates[pos]
+
+
+def _fill_text(value) -> str:
+    # Igual que .fillna("desconocido"): solo reemplaza None / NaN
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "desconocido"
+    return value
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
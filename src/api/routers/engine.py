@@ -1,45 +1,201 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import math
+import os
+
+from cache import ResponseCache
 from fastapi import APIRouter, HTTPException
-from schemas import HorseRecommendRequest
-from utils import load_bundle
+from listings import ListingFilter
+from metrics import StageTimer
+from schemas import HorseRecommendBatchRequest, HorseRecommendRequest
+from utils import registry
 
 router = APIRouter(prefix="/recommender", tags=["Recommender"])
 
-bundle = load_bundle("model_engine")
-model = bundle["model"]
-vectorizer = bundle["vectorizer"]
-scaler = bundle["scaler"]
-transform_input = bundle["transform_fn"]  # cloudpickle serializa el bytecode completo
+# LRU + TTL de respuestas (RECOMMENDER_CACHE_SIZE / RECOMMENDER_CACHE_TTL_S)
+response_cache = ResponseCache.from_env("RECOMMENDER")
+
+# Ancho en USD de los buckets de precio de la clave del cache (0 = precio
+# exacto). Solo afecta la clave: la query siempre se evalúa con el precio
+# exacto, pero con un bucket > 0 un hit puede devolver los vecinos calculados
+# para otro precio del mismo bucket.
+PRICE_BUCKET_USD = float(os.getenv("RECOMMENDER_CACHE_PRICE_BUCKET", "0"))
+
+
+def normalize_query(breed: str | None, color: str | None, price: float) -> tuple:
+    """(breed, color, precio) normalizados: minúsculas, sin espacios extra."""
+    return (
+        " ".join(breed.lower().split()) if breed is not None else None,
+        " ".join(color.lower().split()) if color is not None else None,
+        float(price),
+    )
+
+
+def cache_key(query: tuple) -> tuple:
+    """Query normalizada con el precio redondeado a PRICE_BUCKET_USD."""
+    breed, color, price = query
+    if PRICE_BUCKET_USD > 0 and math.isfinite(price):
+        price = round(price / PRICE_BUCKET_USD) * PRICE_BUCKET_USD
+    return breed, color, price
+
+
+def get_listings(recommender):
+    """
+    Tabla de listings, verificada contra el dataset con el que se entrenó
+    `recommender`: sus índices son posiciones de fila en esa tabla.
+    """
+    # Pre-cargada en background al arrancar (main.lifespan); si no se pudo
+    # leer, solo los endpoints que la usan responden 503
+    try:
+        listings = registry.get("listings")
+        listings.check_catalog(recommender.meta)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return listings
+
+
+def filtered_neighbors(recommender, X, filters: ListingFilter):
+    """
+    KNN restringido a las filas del catálogo que cumplen `filters`: las
+    candidatas salen de los bitmaps de la tabla de listings y las distancias
+    se calculan solo contra ellas (nunca over-fetch + post-filtrado).
+    """
+    candidates = get_listings(recommender).candidates(filters, recommender.n_items)
+    return recommender.kneighbors_subset(X, candidates)
 
 
 @router.post("/recommend")
 def recommend(data: HorseRecommendRequest):
     """
     Recibe breed, color y price y devuelve los caballos más similares.
+    Filtros opcionales: price_min / price_max, location (valor exacto o
+    estado) y gender. Con filtros puede devolver menos de k vecinos si no hay
+    suficientes caballos que los cumplan.
 
     Request body:
         {
             "breed": "Thoroughbred",
             "color": "bay",
-            "price": 5000.0
+            "price": 5000.0,
+            "price_max": 8000.0,
+            "location": "texas"
         }
     """
     try:
-        X = transform_input(
-            {"breed": data.breed, "color": data.color, "price": data.price},
-            vectorizer,
-            scaler,
+        # Etapas: cache (clave + lookup) / featurize / model / format; la
+        # validación del body la hace pydantic antes de entrar acá
+        timer = StageTimer("/recommender/recommend")
+        # NumpyRecommender (pack / arrays exportados) o bundle legacy
+        # Modelo y generación de la misma carga: un reload entre medio no
+        # guarda resultados del modelo viejo con la versión nueva
+        recommender, version = registry.get_versioned("model_engine")
+
+        query = normalize_query(data.breed, data.color, data.price)
+        key = cache_key(query)
+        filters = ListingFilter.from_request(data)
+        cached = response_cache.get((key, filters), version)
+        timer.mark("cache")
+        if cached is not None:
+            return cached
+
+        breed, color, price = query
+        X = recommender.transform_input(
+            {"breed": breed, "color": color, "price": price}
         )
+        timer.mark("featurize")
 
-        distances, indices = model.kneighbors(X)
+        if filters.active:
+            distances, indices = filtered_neighbors(recommender, X, filters)
+        else:
+            distances, indices = recommender.kneighbors(X)
+        timer.mark("model")
 
-        return {
+        response = {
             "neighbors": [
                 {"index": int(idx), "distance": round(float(dist), 4)}
                 for idx, dist in zip(indices[0], distances[0])
             ]
         }
+        response_cache.put((key, filters), response, version)
+        timer.mark("format")
+        return response
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/recommend/batch")
+def recommend_batch(data: HorseRecommendBatchRequest):
+    """
+    Muchas queries (breed, color, price) en una llamada: un solo producto de
+    matrices por cada combinación de filtros del batch y cada vecino unido
+    con su fila de la tabla de listings (horse_id, price, breed, location,
+    gender). Las queries se normalizan igual que en /recommend, así que cada
+    resultado coincide con el de la query individual.
+    """
+    try:
+        timer = StageTimer("/recommender/recommend/batch")
+        recommender = registry.get("model_engine")
+        listings = get_listings(recommender)
+
+        queries = [normalize_query(q.breed, q.color, q.price) for q in data.queries]
+        X = recommender.transform_input(
+            [{"breed": b, "color": c, "price": p} for b, c, p in queries]
+        )
+        timer.mark("featurize")
+
+        # Las queries con los mismos filtros comparten candidatos y producto
+        groups = {}
+        for q, query in enumerate(data.queries):
+            groups.setdefault(ListingFilter.from_request(query), []).append(q)
+
+        neighbors = [None] * len(queries)
+        for filters, rows in groups.items():
+            if filters.active:
+                distances, indices = filtered_neighbors(recommender, X[rows], filters)
+            else:
+                distances, indices = recommender.kneighbors_batch(X[rows])
+            if indices.size and indices.max() >= listings.n_rows:
+                raise ValueError(
+                    f"La tabla de listings tiene {listings.n_rows} filas y el "
+                    f"recomendador devolvió el índice {int(indices.max())}"
+                )
+            for j, q in enumerate(rows):
+                neighbors[q] = zip(indices[j], distances[j])
+        timer.mark("model")
+
+        response = {
+            "n_queries": len(queries),
+            "results": [
+                {
+                    "index": q,
+                    "neighbors": [
+                        {
+                            "index": int(idx),
+                            "distance": round(float(dist), 4),
+                            "listing": listings.record(idx),
+                        }
+                        for idx, dist in pairs
+                    ],
+                }
+                for q, pairs in enumerate(neighbors)
+            ],
+        }
+        timer.mark("format")
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache")
+def recommender_cache_stats():
+    """Hits, misses y desalojos del cache de respuestas de /recommend."""
+    return response_cache.stats()
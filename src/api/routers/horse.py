@@ -1,72 +1,134 @@
 import sys
+from functools import cache
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-import pandas as pd
-from fastapi import APIRouter, HTTPException
-from schemas import HorsePredictRequest
-from utils import load_model
+from batching import MicroBatcher
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from metrics import StageTimer
+from schemas import (
+    HorsePredictBatchRequest,
+    HorsePredictRequest,
+    batch_openapi,
+    stream_openapi,
+)
+from scoring import (
+    FeatureOrder,
+    format_result,
+    predict_probs,
+    resolve_cached,
+    score_batch_body,
+)
+from streaming import NDJSONStreamingResponse, stream_predictions
+from utils import registry
+from validation import FeatureSchema
 
 router = APIRouter(prefix="/horse", tags=["Horse"])
 
-model_p1 = load_model("HORSE_P1")
-model_p2 = load_model("HORSE_P2")
 
+def get_models():
+    """P1 y P2 desde el registry: se cargan recién en el primer request."""
+    return registry.get("HORSE_P1"), registry.get("HORSE_P2")
 
-def validate_features(features: dict, expected_features):
-    expected = set(expected_features)
-    received = set(features.keys())
 
-    extra = received - expected
-    missing = expected - received
+@cache
+def get_feature_order() -> FeatureOrder:
+    # P1 y P2 se entrenan sobre las mismas columnas: un solo orden sirve a ambos
+    return FeatureOrder(registry.get("HORSE_P1").feature_names_in_)
 
-    if extra:
-        raise HTTPException(
-            status_code=422, detail=f"Features no soportadas: {sorted(extra)}"
-        )
-    if missing:
-        raise HTTPException(
-            status_code=422, detail=f"Features faltantes: {sorted(missing)}"
-        )
 
-    nulls = [k for k, v in features.items() if v is None]
-    if nulls:
-        raise HTTPException(
-            status_code=422, detail=f"Features con valor nulo: {sorted(nulls)}"
-        )
+@cache
+def get_feature_schema() -> FeatureSchema:
+    return FeatureSchema(get_feature_order().names)
 
-    string_errors = [k for k, v in features.items() if isinstance(v, str)]
-    if string_errors:
-        raise HTTPException(
-            status_code=422,
-            detail=f"Features con tipo string no permitido: {sorted(string_errors)}",
-        )
+
+# Agrupa requests concurrentes de /predict (HORSE_BATCH_MAX_WAIT_MS / _MAX_ROWS)
+batcher = MicroBatcher.from_env(
+    "HORSE", lambda X, cascade: predict_probs(*get_models(), X, cascade)
+)
 
 
-def run_prediction(features: dict):
-    df = pd.DataFrame([features])
-    df = df[model_p1.feature_names_in_]
-    probs_p1 = model_p1.predict_proba(df)[0]
-    probs_p2 = model_p2.predict_proba(df)[0]
-    return {
-        "paso1": {
-            "prob_bronce": round(float(probs_p1[0]), 4),
-            "prob_plata_oro": round(float(probs_p1[1]), 4),
-        },
-        "paso2": {
-            "prob_plata": round(float(probs_p2[0]), 4),
-            "prob_oro": round(float(probs_p2[1]), 4),
-        },
-    }
+async def run_prediction(features: dict, cascade: bool = False):
+    timer = StageTimer("/horse/predict")
+    schema = await resolve_cached(get_feature_schema)
+    schema.validate(features)
+    timer.mark("validate")
+    X = get_feature_order().row(features)
+    timer.mark("featurize")
+    probs_p1, probs_p2 = await batcher.submit(X, cascade)
+    timer.mark("model")
+    result = format_result(probs_p1, probs_p2)
+    timer.mark("format")
+    return result
 
 
 @router.post("/predict")
-def predict_horse(data: HorsePredictRequest):
+async def predict_horse(data: HorsePredictRequest, cascade: bool = False):
+    """
+    Con `?cascade=true` P2 solo se evalúa si P1 clasifica al usuario como
+    Plata/Oro; para leads Bronce `paso2` vuelve en null.
+    """
     try:
-        validate_features(data.features, model_p1.feature_names_in_)
-        return run_prediction(data.features)
+        return await run_prediction(data.features, cascade=cascade)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/predict/batch", openapi_extra=batch_openapi(HorsePredictBatchRequest))
+async def predict_horse_batch(request: Request, cascade: bool = True):
+    """
+    Scoring de muchos usuarios en una sola llamada: un predict_proba de P1 y
+    otro de P2 para todo el batch. Los errores de validación se reportan por
+    fila en `results[i].error` sin afectar al resto.
+
+    Por defecto corre en cascada (P2 solo sobre no-Bronce); `?cascade=false`
+    devuelve `paso2` para todas las filas.
+
+    Con `Content-Type: application/x-equinelead-matrix` acepta y devuelve la
+    matriz float32 de binary_format.py en lugar de JSON.
+    """
+    try:
+        body = await request.body()
+        return await run_in_threadpool(
+            score_batch_body,
+            body,
+            request.headers.get("content-type", ""),
+            HorsePredictBatchRequest,
+            get_models,
+            get_feature_schema,
+            cascade=cascade,
+        )
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/predict/stream", openapi_extra=stream_openapi())
+async def predict_horse_stream(request: Request, cascade: bool = True):
+    """
+    Scoring en streaming: el body es NDJSON con un dict de features por línea
+    y la respuesta es NDJSON con un resultado por línea (mismo formato que
+    `results` de /predict/batch), que se va enviando a medida que se
+    puntúan chunks de STREAM_CHUNK_ROWS filas. La memoria no crece con la
+    cantidad de usuarios.
+    """
+    try:
+        models = await run_in_threadpool(get_models)
+        schema = await run_in_threadpool(get_feature_schema)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return NDJSONStreamingResponse(
+        stream_predictions(request.stream(), models, schema, cascade=cascade)
+    )
+
+
+@router.get("/predict/batcher")
+def horse_batcher_stats():
+    """Profundidad de cola y tamaños de batch del micro-batcher de /predict."""
+    return batcher.stats()
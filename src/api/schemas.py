@@ -1,10 +1,48 @@
-from pydantic import BaseModel
+from binary_format import MEDIA_TYPE
+from pydantic import BaseModel, Field, model_validator
+
+MAX_BATCH_ROWS = 10_000
 
 
 class InputData(BaseModel):
     features: dict
 
 
+def batch_openapi(request_model) -> dict:
+    """
+    requestBody de /predict/batch para la documentación: JSON (por defecto)
+    o la matriz float32 de binary_format. El endpoint parsea el body a mano
+    según el Content-Type, así que FastAPI no lo infiere solo.
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": request_model.model_json_schema()},
+                MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    }
+
+
+def stream_openapi() -> dict:
+    """requestBody de /predict/stream: NDJSON, un dict de features por línea."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"type": "string", "format": "binary"},
+                }
+            },
+        }
+    }
+
+
+class InputBatchData(BaseModel):
+    rows: list[dict] = Field(min_length=1, max_length=MAX_BATCH_ROWS)
+
+
 class HorsePredictRequest(InputData):
     model_config = {
         "json_schema_extra": {
@@ -76,11 +114,55 @@ class ProdsPredictRequest(InputData):
     }
 
 
+class HorsePredictBatchRequest(InputBatchData):
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "rows": [
+                    HorsePredictRequest.model_config["json_schema_extra"]["example"][
+                        "features"
+                    ]
+                ]
+            }
+        }
+    }
+
+
+class ProdsPredictBatchRequest(InputBatchData):
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "rows": [
+                    ProdsPredictRequest.model_config["json_schema_extra"]["example"][
+                        "features"
+                    ]
+                ]
+            }
+        }
+    }
+
+
 class HorseRecommendRequest(BaseModel):
     breed: str
     color: str
     price: float
 
+    # Filtros opcionales sobre el catálogo (ver listings.py)
+    price_min: float | None = None
+    price_max: float | None = None
+    location: str | None = Field(default=None, description="Ubicación o estado")
+    gender: str | None = None
+
+    @model_validator(mode="after")
+    def check_price_range(self):
+        if (
+            self.price_min is not None
+            and self.price_max is not None
+            and self.price_min > self.price_max
+        ):
+            raise ValueError("price_min no puede ser mayor que price_max")
+        return self
+
     model_config = {
         "json_schema_extra": {
             "example": {
@@ -90,3 +172,26 @@ class HorseRecommendRequest(BaseModel):
             }
         }
     }
+
+
+class HorseRecommendBatchRequest(BaseModel):
+    queries: list[HorseRecommendRequest] = Field(
+        min_length=1, max_length=MAX_BATCH_ROWS
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "queries": [
+                    {"breed": "andalusian", "color": "bay", "price": 22000.0},
+                    {
+                        "breed": "quarter horse",
+                        "color": "sorrel",
+                        "price": 8500.0,
+                        "price_max": 10000.0,
+                        "location": "texas",
+                    },
+                ]
+            }
+        }
+    }
@@ -0,0 +1,194 @@
+"""
+Scoring vectorizado de la cascada P1 → P2, compartido por los routers
+horse y prods.
+"""
+
+import numpy as np
+from binary_format import MEDIA_TYPE, decode_matrix, encode_matrix
+from fastapi import HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from schemas import MAX_BATCH_ROWS
+from validation import feature_error
+
+# Mismo umbral que usa XGBClassifier.predict() para la clase positiva
+P1_THRESHOLD = 0.5
+
+# Columnas de la respuesta binaria (paso2 en NaN si la cascada no evaluó P2)
+OUTPUT_COLUMNS = ("prob_bronce", "prob_plata_oro", "prob_plata", "prob_oro")
+
+
+class FeatureOrder:
+    """
+    Orden de features precalculado para un modelo. Convierte el dict validado
+    del request directamente en una fila float32 contigua, sin pasar por
+    pd.DataFrame ni reindexar por feature_names_in_ en cada llamada.
+    """
+
+    def __init__(self, feature_names):
+        self.names = tuple(feature_names)
+        self.n_features = len(self.names)
+
+    def row(self, features: dict) -> np.ndarray:
+        """Matriz (1, n_features) lista para predict_proba."""
+        return np.fromiter(
+            (features[k] for k in self.names), dtype=np.float32, count=self.n_features
+        ).reshape(1, self.n_features)
+
+
+async def resolve_cached(fn):
+    """
+    Resultado de una función @cache sin bloquear el event loop: la primera
+    llamada (p. ej. el primer request sin prewarm, que carga el modelo) corre
+    en el threadpool; las siguientes se leen del cache directamente.
+    """
+    if fn.cache_info().currsize:
+        return fn()
+    return await run_in_threadpool(fn)
+
+
+def predict_probs(model_p1, model_p2, X, cascade=False):
+    """
+    Corre P1 sobre todo X y P2 sobre las filas que corresponda.
+
+    Con cascade=True, P2 solo se evalúa sobre las filas que P1 clasifica como
+    Plata/Oro (igual que predict_cascade() de monitoring); las filas Bronce
+    quedan con NaN en probs_p2. `cascade` también acepta un array booleano por
+    fila, para batches que mezclan requests con y sin cascada.
+    """
+    probs_p1 = model_p1.predict_proba(X)
+    need_p2 = (probs_p1[:, 1] > P1_THRESHOLD) | ~np.asarray(cascade, dtype=bool)
+    if need_p2.all():
+        return probs_p1, model_p2.predict_proba(X)
+
+    probs_p2 = np.full(probs_p1.shape, np.nan)
+    if need_p2.any():
+        probs_p2[need_p2] = model_p2.predict_proba(X[need_p2])
+    return probs_p1, probs_p2
+
+
+def format_result(probs_p1, probs_p2) -> dict:
+    """
+    Arma la respuesta de un usuario a partir de sus filas de predict_proba.
+    `paso2` es None cuando la cascada no evaluó P2 (lead Bronce).
+    """
+    return {
+        "paso1": {
+            "prob_bronce": round(float(probs_p1[0]), 4),
+            "prob_plata_oro": round(float(probs_p1[1]), 4),
+        },
+        "paso2": (
+            None
+            if np.isnan(probs_p2[1])
+            else {
+                "prob_plata": round(float(probs_p2[0]), 4),
+                "prob_oro": round(float(probs_p2[1]), 4),
+            }
+        ),
+    }
+
+
+def run_batch_prediction(
+    rows: list[dict],
+    model_p1,
+    model_p2,
+    schema,
+    cascade: bool = True,
+) -> dict:
+    """
+    Valida todas las filas con `schema` (validation.FeatureSchema) y corre un
+    único predict_proba de P1 y de P2 sobre las que pasaron la validación.
+
+    Las filas inválidas no cortan el batch: se reportan en su posición con
+    el error estructurado (code, features, error), cuyo mensaje es el mismo
+    que devolvería /predict para ese usuario.
+    """
+    X, valid_idx, errors = schema.validate_batch(rows)
+    results = [None] * len(rows)
+    for i, error in errors.items():
+        results[i] = {"index": i, **error}
+
+    if valid_idx:
+        probs_p1, probs_p2 = predict_probs(model_p1, model_p2, X, cascade=cascade)
+        for j, i in enumerate(valid_idx):
+            results[i] = {"index": i, **format_result(probs_p1[j], probs_p2[j])}
+
+    return {
+        "n_rows": len(rows),
+        "n_errors": len(errors),
+        "results": results,
+    }
+
+
+def run_binary_prediction(
+    body: bytes, model_p1, model_p2, schema, cascade: bool = True
+) -> bytes:
+    """
+    Igual que run_batch_prediction pero sobre el formato de binary_format:
+    la matriz del request se usa tal cual como input del modelo (si ya viene
+    en el orden de feature_names_in_ no se copia) y la respuesta es otra
+    matriz float32 con OUTPUT_COLUMNS. Las filas con NaN se reportan en
+    `errors` del header, igual que los nulos en JSON, y vuelven en NaN.
+    """
+    X, columns, _ = decode_matrix(body)
+    if not 1 <= len(X) <= MAX_BATCH_ROWS:
+        raise HTTPException(
+            status_code=422, detail=f"El batch debe tener de 1 a {MAX_BATCH_ROWS} filas"
+        )
+    order = schema.column_order(columns)
+    if order is not None:
+        X = X[:, order]
+
+    nulls = np.isnan(X)
+    bad = nulls.any(axis=1)
+    out = np.full((len(X), len(OUTPUT_COLUMNS)), np.nan, dtype=np.float32)
+    if not bad.all():
+        X_ok = X[~bad] if bad.any() else X
+        probs_p1, probs_p2 = predict_probs(model_p1, model_p2, X_ok, cascade=cascade)
+        out[~bad, :2] = probs_p1
+        out[~bad, 2:] = probs_p2
+
+    errors = [
+        {
+            "index": int(i),
+            **feature_error(
+                "null", [schema.names[j] for j in np.flatnonzero(nulls[i])]
+            ),
+        }
+        for i in np.flatnonzero(bad)
+    ]
+    return encode_matrix(
+        out, OUTPUT_COLUMNS, n_rows=len(X), n_errors=len(errors), errors=errors
+    )
+
+
+def score_batch_body(
+    body: bytes,
+    content_type: str,
+    request_model,
+    get_models,
+    get_schema,
+    cascade: bool = True,
+):
+    """
+    Atiende /predict/batch según el Content-Type: binary_format.MEDIA_TYPE
+    → run_binary_prediction; cualquier otro → JSON con `request_model`
+    (mismos errores 422 que el parseo automático de FastAPI).
+    Pensada para correr en el threadpool.
+    """
+    if content_type.split(";")[0].strip() == MEDIA_TYPE:
+        out = run_binary_prediction(body, *get_models(), get_schema(), cascade=cascade)
+        return Response(content=out, media_type=MEDIA_TYPE)
+
+    try:
+        data = request_model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**err, "loc": ("body", *err["loc"])}
+                for err in e.errors(include_url=False)
+            ],
+            body=body,
+        )
+    return run_batch_prediction(data.rows, *get_models(), get_schema(), cascade=cascade)
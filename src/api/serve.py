@@ -0,0 +1,107 @@
+"""
+Servidor de la API con N procesos worker, cada uno con pocos threads.
+
+Variables de entorno:
+    API_HOST                 (0.0.0.0)
+    API_PORT                 (8080)
+    API_WORKERS              procesos uvicorn; "auto" = un worker por core (1)
+    API_THREADS_PER_WORKER   threads nativos por worker (OpenMP / BLAS /
+                             XGBoost); por defecto cores // workers
+    METRICS_DIR              snapshots de métricas por worker (ver metrics.py)
+
+Con más de un worker el backend de los modelos pasa a ser "numpy" salvo que
+MODEL_BACKEND venga seteado. Lo que se comparte entre workers es solo lo que
+queda como vista sobre el model pack mmap: los arrays de NumpyForest y los
+arrays exportados del recomendador (matriz de items, listas IVF) usan las
+mismas páginas del page cache. Cada worker arma igual su propia copia de:
+- el booster, con el backend "xgboost"
+- ItemFactors (matrices densas) y TopKIndex del recomendador
+- la tabla de listings, el cache de respuestas y los micro-batchers
+así que la memoria sigue creciendo con N workers, aunque menos que sin pack.
+
+Estado por worker: /recommender/cache, /models/status y las stats de los
+batchers reflejan solo al worker que atendió el request. Para /metrics,
+configure() setea METRICS_DIR a un directorio temporal (si no viene dado):
+cada worker vuelca ahí sus métricas y /metrics devuelve las de todos, con el
+label worker="<pid>" (sumar por ese label para el total).
+
+Los límites de threads se exportan antes de que uvicorn levante los workers
+(este módulo no importa numpy / xgboost), que los heredan por el entorno.
+
+Con varios workers uvicorn crea el socket de escucha él mismo y asyncio deja
+de activar TCP_NODELAY en las conexiones aceptadas: con keep-alive cada
+respuesta se demora ~40 ms (Nagle + delayed ACK). NoDelayHTTPProtocol lo
+activa por conexión.
+
+Uso (desde la raíz donde está ./models/production):
+    python src/api/serve.py
+    API_WORKERS=4 API_THREADS_PER_WORKER=1 python src/api/serve.py
+"""
+
+import os
+import socket
+import tempfile
+from pathlib import Path
+
+import uvicorn
+from uvicorn.protocols.http.auto import AutoHTTPProtocol
+
+ROOT = Path(__file__).resolve().parents[2]
+THREAD_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+class NoDelayHTTPProtocol(AutoHTTPProtocol):
+    def connection_made(self, transport):
+        sock = transport.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().connection_made(transport)
+
+
+def resolve_workers(value: str | None, cores: int) -> int:
+    if not value:
+        return 1
+    if value == "auto":
+        return cores
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"API_WORKERS debe ser >= 1 (recibido {value})")
+    return workers
+
+
+def configure(workers: int, threads: int):
+    """Exporta el presupuesto de threads al entorno que heredan los workers."""
+    for var in THREAD_VARS:
+        os.environ[var] = str(threads)
+    os.environ["API_THREADS_PER_WORKER"] = str(threads)
+    if workers > 1:
+        os.environ.setdefault("MODEL_BACKEND", "numpy")
+        if not os.getenv("METRICS_DIR"):
+            os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="equinelead-metrics-")
+
+
+def main():
+    cores = os.cpu_count() or 1
+    workers = resolve_workers(os.getenv("API_WORKERS"), cores)
+    threads = int(os.getenv("API_THREADS_PER_WORKER", "0")) or max(1, cores // workers)
+    configure(workers, threads)
+
+    backend = os.getenv("MODEL_BACKEND", "xgboost")
+    print(f"workers={workers} threads/worker={threads} backend={backend}")
+    uvicorn.run(
+        "src.api.main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8080")),
+        workers=workers,
+        http="src.api.serve:NoDelayHTTPProtocol",
+        app_dir=str(ROOT),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Scoring en streaming con NDJSON para listas de usuarios de cualquier tamaño.
+
+El request trae una fila de features por línea (el mismo dict que cada
+elemento de `rows` en /predict/batch) y la respuesta devuelve una línea por
+fila, en el mismo orden y con el mismo formato que `results` del batch. Las
+filas se puntúan de a chunks de STREAM_CHUNK_ROWS a medida que llegan, así
+que la memoria del servidor depende del tamaño del chunk y no de la
+cantidad de usuarios.
+
+La respuesta empieza a salir antes de que termine el body del request: el
+cliente tiene que leerla mientras envía (full duplex, como el cliente de
+src/benchmarks/bench_stream.py). Un cliente que primero manda todo y después
+lee (requests, httpx) sirve para listas chicas, pero con listas grandes se
+traba cuando se llenan los buffers del socket.
+
+Variables de entorno:
+    STREAM_CHUNK_ROWS       filas por llamada a la cascada (1000)
+    STREAM_MAX_LINE_BYTES   largo máximo de una línea (1 MiB)
+"""
+
+import json
+import os
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from scoring import run_batch_prediction
+from starlette.requests import ClientDisconnect
+
+MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "1000"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", str(1 << 20)))
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False) + "\n"
+
+
+def line_error(message: str) -> dict:
+    """Error de una línea que no llega a ser un dict de features."""
+    return {"code": "json", "features": [], "error": f"Fila NDJSON inválida: {message}"}
+
+
+class LineReader:
+    """
+    Corta los chunks del body en líneas completas. Las líneas vacías se
+    ignoran; una línea de más de `max_bytes` se descarta y se reporta como
+    None (sin acumularla en memoria).
+    """
+
+    def __init__(self, max_bytes: int = STREAM_MAX_LINE_BYTES):
+        self.max_bytes = max_bytes
+        self.pending = bytearray()
+        self.skipping = False
+
+    def feed(self, data: bytes) -> list[bytes | None]:
+        lines = []
+        while data:
+            newline = data.find(b"\n")
+            if newline < 0:
+                if not self.skipping:
+                    self.pending += data
+                    if len(self.pending) > self.max_bytes:
+                        lines.append(None)
+                        self.pending.clear()
+                        self.skipping = True
+                break
+            if self.skipping:
+                self.skipping = False
+            else:
+                self.pending += data[:newline]
+                lines.append(self._take())
+            data = data[newline + 1 :]
+        return [line for line in lines if line is None or line.strip()]
+
+    def close(self) -> list[bytes | None]:
+        line = self._take()
+        return [line] if line is None or line.strip() else []
+
+    def _take(self) -> bytes | None:
+        if len(self.pending) > self.max_bytes:
+            self.pending.clear()
+            return None
+        line = bytes(self.pending)
+        self.pending.clear()
+        return line
+
+
+def score_lines(
+    lines: list[bytes | None], start: int, model_p1, model_p2, schema, cascade=True
+) -> bytes:
+    """
+    Puntúa un chunk de líneas NDJSON y devuelve las líneas de respuesta.
+    `start` es la posición global de la primera línea (el `index` de salida).
+    """
+    results = [None] * len(lines)
+    rows, positions = [], []
+    for i, line in enumerate(lines):
+        if line is None:
+            error = line_error(f"más de {STREAM_MAX_LINE_BYTES} bytes")
+        else:
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                error = line_error(str(e))
+            else:
+                if isinstance(row, dict):
+                    rows.append(row)
+                    positions.append(i)
+                    continue
+                error = line_error("se esperaba un objeto con las features")
+        results[i] = {"index": start + i, **error}
+
+    if rows:
+        batch = run_batch_prediction(rows, model_p1, model_p2, schema, cascade)
+        for i, result in zip(positions, batch["results"]):
+            result["index"] = start + i
+            results[i] = result
+
+    return "".join(_dumps(r) for r in results).encode()
+
+
+async def stream_predictions(
+    chunks, models, schema, cascade=True, chunk_rows: int = STREAM_CHUNK_ROWS
+):
+    """
+    Generador async de la respuesta: lee `chunks` (request.stream()), junta
+    `chunk_rows` líneas y las puntúa en el threadpool. Un error inesperado a
+    mitad del stream (el status 200 ya salió) se informa como última línea.
+    """
+    reader = LineReader()
+    lines, start = [], 0
+    try:
+        async for data in chunks:
+            lines += reader.feed(data)
+            while len(lines) >= chunk_rows:
+                chunk, lines = lines[:chunk_rows], lines[chunk_rows:]
+                yield await run_in_threadpool(
+                    score_lines, chunk, start, *models, schema, cascade
+                )
+                start += len(chunk)
+        lines += reader.close()
+        if lines:
+            yield await run_in_threadpool(
+                score_lines, lines, start, *models, schema, cascade
+            )
+    except ClientDisconnect:
+        raise
+    except Exception as e:
+        yield _dumps({"code": "internal", "error": str(e)}).encode()
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que no escucha http.disconnect en paralelo: con ASGI
+    < 2.4 Starlette lanza una tarea que llama a receive() mientras se envía
+    la respuesta y se comería los chunks del body que el generador todavía
+    está leyendo. Una desconexión se detecta igual al leer el request.
+    """
+
+    media_type = MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
@@ -0,0 +1,128 @@
+"""
+Política de threads para la inferencia con XGBoost según el tamaño del batch.
+
+Los modelos se entrenan con n_jobs=-1 y el booster cargado usa todos los
+cores en cada predict. En la API cada request corre en un thread del
+threadpool de FastAPI, así que con requests concurrentes cada predict abre
+su propio equipo de OpenMP con todos los cores: oversubscription y picos en
+la latencia de cola.
+
+ThreadGovernedModel carga un solo booster (con nthread sin fijar, así usa el
+máximo de OpenMP del thread que llama) y por llamada limita los threads de
+OpenMP con threadpoolctl:
+- batches chicos (<= small_batch_rows filas) → small_threads (1 por
+  defecto): muchos requests concurrentes, uno por core
+- batches grandes → large_threads (todos los cores del worker), con a lo
+  sumo large_concurrency predicts grandes a la vez
+
+El límite de OpenMP (omp_set_num_threads) es por thread, así que requests
+concurrentes con límites distintos no se pisan y no hace falta un lock
+alrededor del predict.
+
+Configuración por entorno (ThreadPolicy.from_env):
+    INFERENCE_THREAD_POLICY       "auto" (por defecto) | "off" (un booster,
+                                  threads de XGBoost por defecto)
+    INFERENCE_SMALL_BATCH_ROWS    256
+    INFERENCE_SMALL_THREADS       1
+    INFERENCE_LARGE_THREADS       0 = API_THREADS_PER_WORKER o todos los cores
+    INFERENCE_LARGE_CONCURRENCY   1 (0 = sin límite)
+"""
+
+import os
+import threading
+from dataclasses import asdict, dataclass
+
+from threadpoolctl import ThreadpoolController
+
+
+@dataclass(frozen=True)
+class ThreadPolicy:
+    small_batch_rows: int = 256
+    small_threads: int = 1
+    large_threads: int = 0
+    large_concurrency: int = 1
+    enabled: bool = True
+
+    @classmethod
+    def from_env(cls) -> "ThreadPolicy":
+        large_threads = int(os.getenv("INFERENCE_LARGE_THREADS", "0")) or int(
+            os.getenv("API_THREADS_PER_WORKER", "0")
+        )
+        return cls(
+            small_batch_rows=int(os.getenv("INFERENCE_SMALL_BATCH_ROWS", "256")),
+            small_threads=int(os.getenv("INFERENCE_SMALL_THREADS", "1")),
+            large_threads=large_threads or (os.cpu_count() or 1),
+            large_concurrency=int(os.getenv("INFERENCE_LARGE_CONCURRENCY", "1")),
+            enabled=os.getenv("INFERENCE_THREAD_POLICY", "auto") != "off",
+        )
+
+    def describe(self) -> dict:
+        return asdict(self)
+
+
+def set_threads(model, n_threads: int):
+    """Fija los threads de un XGBClassifier ya cargado (booster y DMatrix)."""
+    model.set_params(n_jobs=n_threads)
+    model.get_booster().set_param({"nthread": n_threads})
+    return model
+
+
+class ThreadGovernedModel:
+    """
+    Envuelve un XGBClassifier y limita sus threads de OpenMP en cada llamada
+    según el tamaño del batch. Expone predict_proba / predict y delega el
+    resto de los atributos (feature_names_in_, get_booster, ...) en el modelo.
+
+    `load` es un callable sin argumentos que devuelve un XGBClassifier.
+    """
+
+    def __init__(self, load, policy: ThreadPolicy):
+        self.policy = policy
+        # nthread <= 0: XGBoost usa omp_get_max_threads() del thread que llama
+        self.model = set_threads(load(), -1)
+        # Después de cargar el modelo, para que detecte el OpenMP de XGBoost
+        self._threadpools = ThreadpoolController()
+        self._large_slots = (
+            threading.BoundedSemaphore(policy.large_concurrency)
+            if policy.large_concurrency > 0
+            else None
+        )
+        self._stats_lock = threading.Lock()
+        self.small_calls = 0
+        self.large_calls = 0
+
+    def _predict(self, method: str, X, n_threads: int):
+        with self._threadpools.limit(limits=n_threads, user_api="openmp"):
+            return getattr(self.model, method)(X)
+
+    def _run(self, method: str, X):
+        small = len(X) <= self.policy.small_batch_rows
+        with self._stats_lock:
+            if small:
+                self.small_calls += 1
+            else:
+                self.large_calls += 1
+        if small:
+            return self._predict(method, X, self.policy.small_threads)
+        if self._large_slots is None:
+            return self._predict(method, X, self.policy.large_threads)
+        with self._large_slots:
+            return self._predict(method, X, self.policy.large_threads)
+
+    def predict_proba(self, X):
+        return self._run("predict_proba", X)
+
+    def predict(self, X):
+        return self._run("predict", X)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            calls = {"small_calls": self.small_calls, "large_calls": self.large_calls}
+        return {**self.policy.describe(), **calls}
+
+    def __getattr__(self, name):
+        # Solo se llama para atributos que no están en la instancia
+        model = self.__dict__.get("model")
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
@@ -0,0 +1,188 @@
+"""
+Backend de inferencia alternativo para los campeones XGBoost.
+
+Convierte el dump JSON del booster en arrays planos de NumPy (un nodo por
+posición, todos los árboles concatenados) y evalúa el ensemble recorriendo
+todos los árboles a la vez, nivel por nivel, sobre una matriz float32.
+Evita DMatrix y la conversión de DataFrame que dominan la latencia en
+batches chicos.
+
+Solo soporta lo que usan los campeones: objective binary:logistic,
+splits numéricos y num_parallel_tree = 1.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+
+class NumpyForest:
+    """
+    Ensemble de árboles en formato plano. Expone `predict_proba` y
+    `feature_names_in_` para poder reemplazar a XGBClassifier en los routers.
+    """
+
+    def __init__(
+        self,
+        split_feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        default_left: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        base_margin: float,
+        feature_names: list[str],
+    ):
+        self.split_feature = split_feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+
+    @classmethod
+    def from_booster(cls, booster) -> "NumpyForest":
+        """Compila un xgboost.Booster (o el de un XGBClassifier ya cargado)."""
+        model = json.loads(booster.save_raw("json"))["learner"]
+
+        objective = model["objective"]["name"]
+        if objective != "binary:logistic":
+            raise ValueError(f"Objective no soportado por NumpyForest: {objective}")
+
+        gbtree = model["gradient_booster"]["model"]
+        if int(gbtree["gbtree_model_param"]["num_parallel_tree"]) != 1:
+            raise ValueError("NumpyForest no soporta num_parallel_tree > 1")
+
+        trees = gbtree["trees"]
+        # Mismo criterio que XGBClassifier.predict_proba con early stopping
+        best_iteration = booster.attr("best_iteration")
+        if best_iteration is not None:
+            trees = trees[: int(best_iteration) + 1]
+
+        split_feature, threshold, left, right, default_left, value = (
+            [] for _ in range(6)
+        )
+        roots = []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if tree["categories"]:
+                raise ValueError("NumpyForest no soporta splits categóricos")
+
+            lc = np.asarray(tree["left_children"], dtype=np.int32)
+            rc = np.asarray(tree["right_children"], dtype=np.int32)
+            cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+            is_leaf = lc == -1
+            idx = np.arange(len(lc), dtype=np.int32) + offset
+
+            # Las hojas apuntan a sí mismas: seguir iterando no las mueve
+            left.append(np.where(is_leaf, idx, lc + offset))
+            right.append(np.where(is_leaf, idx, rc + offset))
+            split_feature.append(
+                np.where(is_leaf, 0, np.asarray(tree["split_indices"], np.int32))
+            )
+            threshold.append(cond)
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            # En el dump, split_conditions de una hoja guarda el leaf value
+            value.append(np.where(is_leaf, cond, np.float32(0)))
+
+            roots.append(offset)
+            offset += len(lc)
+            max_depth = max(max_depth, _tree_depth(lc, rc))
+
+        params = model["learner_model_param"]
+        base_score = float(str(params["base_score"]).strip("[]"))
+        feature_names = booster.feature_names or [
+            f"f{i}" for i in range(int(params["num_feature"]))
+        ]
+        return cls(
+            split_feature=np.concatenate(split_feature).astype(np.int32),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            base_margin=np.log(base_score / (1.0 - base_score)),
+            feature_names=feature_names,
+        )
+
+    ARRAYS = (
+        "split_feature",
+        "threshold",
+        "left",
+        "right",
+        "default_left",
+        "value",
+        "roots",
+    )
+    META = ("max_depth", "base_margin", "feature_names")
+
+    def to_arrays(self) -> tuple[dict, dict]:
+        """Arrays y metadatos planos, para guardarlos en el model pack."""
+        arrays = {k: getattr(self, k) for k in self.ARRAYS}
+        meta = {
+            "max_depth": self.max_depth,
+            "base_margin": self.base_margin,
+            "feature_names": list(self.feature_names_in_),
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict) -> "NumpyForest":
+        """Inversa de to_arrays(). No copia: acepta vistas sobre un mmap."""
+        return cls(**{k: arrays[k] for k in cls.ARRAYS}, **meta)
+
+    def _as_matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names_in_].to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Se esperaban {self.n_features_in_} features, llegaron {X.shape[1]}"
+            )
+        return X
+
+    def predict_margin(self, X) -> np.ndarray:
+        X = self._as_matrix(X)
+        n = X.shape[0]
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.split_feature[node]]
+            go_left = np.where(
+                np.isnan(x), self.default_left[node], x < self.threshold[node]
+            )
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.value[node].sum(axis=1, dtype=np.float64) + self.base_margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        prob = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - prob, prob]).astype(np.float32)
+
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth = 0
+    level = [0]
+    while level:
+        nxt = [c for n in level for c in (left[n], right[n]) if c != -1]
+        if nxt:
+            depth += 1
+        level = nxt
+    return depth
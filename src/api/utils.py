@@ -1,26 +1,87 @@
 import glob
 import os
+import threading
+import time
+from functools import cache
 
 import cloudpickle
 import joblib
 import xgboost as xgb
+from listings import PACK_SECTION, ListingTable
+from model_pack import ModelPack
+from recommender import (
+    EXPORT_ARRAYS_FILE,
+    BundleRecommender,
+    NumpyRecommender,
+)
+from thread_policy import ThreadGovernedModel, ThreadPolicy
+from tree_engine import NumpyForest
 
 ARTIFACTS_PATH = "./models/production"
+# Pack mmap generado por src/registry/download_production_models.py
+MODEL_PACK_PATH = os.getenv(
+    "MODEL_PACK_PATH", os.path.join(ARTIFACTS_PATH, "model_pack.bin")
+)
 
+# Backend de inferencia para los modelos XGBoost: "xgboost" | "numpy"
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "xgboost")
+BACKENDS = ("xgboost", "numpy")
 
-def load_model(name: str):
+# Threads de XGBoost por tamaño de batch (ver thread_policy.py)
+THREAD_POLICY = ThreadPolicy.from_env()
+
+# Buckets de precio del índice top-K del recomendador (0 = desactivado)
+RECOMMENDER_INDEX_BUCKETS = int(os.getenv("RECOMMENDER_INDEX_BUCKETS", "32"))
+
+# KNN del recomendador: "brute" | "ivf"; vacío → el backend con el que se
+# entrenó (knn_backend del export)
+RECOMMENDER_KNN_BACKEND = os.getenv("RECOMMENDER_KNN_BACKEND") or None
+
+
+@cache
+def get_model_pack() -> ModelPack | None:
+    """Abre (una sola vez por proceso) el model pack si existe."""
+    if os.path.exists(MODEL_PACK_PATH):
+        return ModelPack(MODEL_PACK_PATH)
+    return None
+
+
+def load_model(name: str, backend: str | None = None):
     """
-    Carga un modelo desde ARTIFACTS_PATH según su formato:
+    Carga un modelo, primero desde el model pack (mmap) y si no está ahí
+    desde ARTIFACTS_PATH según su formato:
     - XGBoost  → model.ubj  (formato binario nativo)
     - Sklearn  → model.pkl  (joblib/pickle)
+
+    Para XGBoost, `backend` (por defecto MODEL_BACKEND) elige el motor:
+    - "xgboost" → XGBClassifier nativo, envuelto en ThreadGovernedModel
+                  según THREAD_POLICY (1 thread para batches chicos, todos
+                  los cores para los grandes)
+    - "numpy"   → NumpyForest compilado desde el booster (tree_engine.py)
     """
+    backend = backend or MODEL_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido '{backend}'. Opciones: {BACKENDS}")
+
+    pack = get_model_pack()
+    if pack is not None and f"{name}/booster" in pack:
+        if backend == "numpy":
+            # Vistas directas sobre el mmap: las páginas se comparten entre workers
+            return NumpyForest.from_arrays(
+                pack.arrays(f"{name}/forest"),
+                {k: pack.models[name][k] for k in NumpyForest.META},
+            )
+        return _load_xgb(bytearray(pack.bytes(f"{name}/booster")))
+
     ubj_path = os.path.join(ARTIFACTS_PATH, name, "model.ubj")
     pkl_path = os.path.join(ARTIFACTS_PATH, name, "model.pkl")
 
     if os.path.exists(ubj_path):
-        model = xgb.XGBClassifier()
-        model.load_model(ubj_path)
-        return model
+        if backend == "numpy":
+            model = xgb.XGBClassifier()
+            model.load_model(ubj_path)
+            return NumpyForest.from_booster(model.get_booster())
+        return _load_xgb(ubj_path)
 
     if os.path.exists(pkl_path):
         return joblib.load(pkl_path)
@@ -30,6 +91,19 @@ def load_model(name: str):
     )
 
 
+def _load_xgb(source, policy: ThreadPolicy = THREAD_POLICY):
+    """XGBClassifier desde un path o bytes, con la política de threads."""
+
+    def load():
+        model = xgb.XGBClassifier()
+        model.load_model(source)
+        return model
+
+    if not policy.enabled:
+        return load()
+    return ThreadGovernedModel(load, policy)
+
+
 def load_bundle(name: str) -> dict:
     """
     Carga el artifacts_bundle de un modelo (model, vectorizer, scaler, transform_fn).
@@ -46,3 +120,170 @@ def load_bundle(name: str) -> dict:
 
     with open(matches[0], "rb") as f:
         return cloudpickle.load(f)
+
+
+def load_recommender(name: str = "model_engine"):
+    """
+    Carga el motor de recomendación evitando pickle cuando se puede:
+    1. model pack (mmap)                      → NumpyRecommender
+    2. arrays exportados en artifacts_bundle/ → NumpyRecommender
+    3. bundle cloudpickle legacy              → BundleRecommender (sklearn)
+
+    A NumpyRecommender se le construye el TopKIndex con
+    RECOMMENDER_INDEX_BUCKETS buckets de precio (0 = sin índice) y usa el
+    backend RECOMMENDER_KNN_BACKEND para las queries que el índice no
+    resuelve: scan completo ("brute") o las listas del IVF exportado ("ivf").
+    """
+    pack = get_model_pack()
+    bundle_dir = os.path.join(ARTIFACTS_PATH, name, "artifacts_bundle")
+
+    if pack is not None and f"{name}/items_data" in pack:
+        recommender = NumpyRecommender.from_pack(pack, name, RECOMMENDER_KNN_BACKEND)
+    elif os.path.exists(os.path.join(bundle_dir, EXPORT_ARRAYS_FILE)):
+        recommender = NumpyRecommender.from_export(bundle_dir, RECOMMENDER_KNN_BACKEND)
+    else:
+        return BundleRecommender(load_bundle(name))
+
+    recommender.build_index(RECOMMENDER_INDEX_BUCKETS)
+    return recommender
+
+
+def load_listings() -> ListingTable:
+    """
+    Tabla de listings del model pack; sin pack, desde LISTINGS_PATH. Si el
+    pack trae model_engine, la tabla tiene que ser su dataset de entrenamiento.
+    """
+    pack = get_model_pack()
+    if pack is not None and PACK_SECTION in pack:
+        table = ListingTable.from_pack(pack)
+    else:
+        table = ListingTable.from_parquet()
+    if pack is not None and "model_engine" in pack.models:
+        table.check_catalog(pack.models["model_engine"])
+    return table
+
+
+# ── Registro central de modelos ───────────────────────────────────────────────
+
+
+class ModelRegistry:
+    """
+    Carga cada modelo recién la primera vez que se pide (lazy), con un lock
+    por modelo para que requests concurrentes no lo deserialicen dos veces.
+    Registra cuánto tardó cada carga y permite pre-cargar en background.
+
+    Cada carga incrementa la generación del modelo (`generation(name)`): los
+    caches de respuestas la usan como versión para invalidarse cuando se
+    recarga una versión nueva con `reload(name)`. El modelo y su generación
+    se guardan juntos en una tupla, así `get_versioned(name)` los lee de forma
+    atómica aunque haya un reload en curso.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._entries = {}  # nombre → (modelo, generación)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.load_times = {}
+
+    def register(self, name: str, loader):
+        """`loader` es un callable sin argumentos que devuelve el modelo."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+
+    def get(self, name: str):
+        return self.get_versioned(name)[0]
+
+    def get_versioned(self, name: str) -> tuple:
+        """(modelo, generación) de la misma carga."""
+        entry = self._entries.get(name)
+        if entry is not None:
+            return entry
+
+        if name not in self._loaders:
+            raise KeyError(f"Modelo no registrado: '{name}'")
+
+        with self._locks[name]:
+            # Otro thread pudo haberlo cargado mientras esperábamos el lock
+            if name not in self._entries:
+                self._load(name)
+        return self._entries[name]
+
+    def _load(self, name: str):
+        # Llamar con el lock del modelo tomado. El modelo anterior (si hay)
+        # sigue sirviendo hasta que el nuevo está listo.
+        t0 = time.perf_counter()
+        model = self._loaders[name]()
+        self.load_times[name] = time.perf_counter() - t0
+        self._entries[name] = (model, self.generation(name) + 1)
+        print(f"✅ {name} cargado en {self.load_times[name]:.3f}s")
+
+    def reload(self, name: str):
+        """Vuelve a cargar `name` desde sus artefactos y lo reemplaza."""
+        if name not in self._loaders:
+            raise KeyError(f"Modelo no registrado: '{name}'")
+        with self._locks[name]:
+            self._load(name)
+        return self._entries[name][0]
+
+    def generation(self, name: str) -> int:
+        """Cantidad de cargas de `name` (0 si todavía no se cargó)."""
+        entry = self._entries.get(name)
+        return entry[1] if entry is not None else 0
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._entries
+
+    def prewarm(self, names: list[str] | None = None) -> threading.Thread:
+        """Carga `names` (por defecto todos) en un thread daemon."""
+        names = list(names or self._loaders)
+
+        def _run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"⚠️  No se pudo pre-cargar {name}: {e}")
+
+        thread = threading.Thread(target=_run, name="model-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def thread_stats(self) -> dict:
+        """stats() de los modelos cargados que usan ThreadGovernedModel."""
+        return {
+            name: model.stats()
+            for name, (model, _) in list(self._entries.items())
+            if isinstance(model, ThreadGovernedModel)
+        }
+
+    def status(self) -> dict:
+        return {
+            name: {
+                "loaded": self.is_loaded(name),
+                "load_time_s": (
+                    round(self.load_times[name], 4) if name in self.load_times else None
+                ),
+                "generation": self.generation(name),
+            }
+            for name in self._loaders
+        }
+
+
+def reload_model(name: str):
+    """
+    Recarga `name` releyendo el model pack del disco: download_all() lo
+    reemplaza de forma atómica, así que el mmap anterior sigue válido para
+    los modelos que todavía lo usan.
+    """
+    get_model_pack.cache_clear()
+    return registry.reload(name)
+
+
+registry = ModelRegistry()
+for _name in ["HORSE_P1", "HORSE_P2", "PRODS_P1", "PRODS_P2"]:
+    registry.register(_name, lambda name=_name: load_model(name))
+registry.register("model_engine", lambda: load_recommender("model_engine"))
+# Horse_ID / precio / raza / ubicación de cada item (model pack o LISTINGS_PATH)
+registry.register("listings", load_listings)
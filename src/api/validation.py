@@ -0,0 +1,173 @@
+"""
+Validación de features compartida por los routers horse y prods.
+
+FeatureSchema se compila una vez a partir de feature_names_in_ del modelo y
+valida:
+- un dict (request de /predict) en una sola pasada sobre sus items
+- un batch de N dicts en forma columnar: los tipos se chequean por columna
+  y los nulos / strings se ubican con máscaras de NumPy, devolviendo la
+  matriz float32 de las filas válidas y los errores estructurados de las
+  inválidas
+
+Los errores se reportan con el mismo orden de prioridad y los mismos
+mensajes que el validate_features original (features no soportadas,
+faltantes, nulas y de tipo string), más un error "type" para valores que no
+son números (listas, dicts), que antes terminaban en un 500.
+"""
+
+from operator import itemgetter
+
+import numpy as np
+from fastapi import HTTPException
+
+NUMERIC_TYPES = (int, float, bool)
+NUMERIC_SET = frozenset(NUMERIC_TYPES)
+
+# Código de error → prefijo del mensaje, en orden de prioridad
+ERROR_MESSAGES = {
+    "extra": "Features no soportadas",
+    "missing": "Features faltantes",
+    "null": "Features con valor nulo",
+    "string": "Features con tipo string no permitido",
+    "type": "Features con tipo no numérico",
+}
+# Errores por celda en un batch (extra/missing se resuelven por fila)
+FLAGS = ("null", "string", "type")
+
+
+def feature_error(code: str, features) -> dict:
+    """Error estructurado: código, features involucradas y mensaje legible."""
+    features = sorted(features)
+    return {
+        "code": code,
+        "features": features,
+        "error": f"{ERROR_MESSAGES[code]}: {features}",
+    }
+
+
+class FeatureSchema:
+    def __init__(self, feature_names):
+        # feature_names_in_ trae np.str_: se pasan a str para los mensajes
+        self.names = tuple(str(name) for name in feature_names)
+        self.n_features = len(self.names)
+        self._name_set = frozenset(self.names)
+        self._getter = itemgetter(*self.names)
+
+    # ── Un dict ───────────────────────────────────────────────────────────────
+
+    def check(self, features: dict) -> dict | None:
+        """Primer error estructurado de un dict, o None si es válido."""
+        extra, nulls, strings, others = [], [], [], []
+        known = 0
+        for k, v in features.items():
+            if k not in self._name_set:
+                extra.append(k)
+                continue
+            known += 1
+            if type(v) in NUMERIC_SET:
+                continue
+            if v is None:
+                nulls.append(k)
+            elif isinstance(v, str):
+                strings.append(k)
+            else:
+                others.append(k)
+
+        if extra:
+            return feature_error("extra", extra)
+        if known < self.n_features:
+            return feature_error("missing", self._name_set.difference(features))
+        for code, keys in zip(FLAGS, (nulls, strings, others)):
+            if keys:
+                return feature_error(code, keys)
+        return None
+
+    def validate(self, features: dict) -> None:
+        """Lanza HTTPException 422 con el primer error del dict."""
+        error = self.check(features)
+        if error is not None:
+            raise HTTPException(status_code=422, detail=error["error"])
+
+    def column_order(self, columns) -> np.ndarray | None:
+        """
+        Índices que llevan una matriz con `columns` al orden del modelo, o
+        None si ya está en ese orden (caso sin copia). Columnas duplicadas,
+        faltantes o no soportadas → 422.
+        """
+        columns = [str(c) for c in columns]
+        if tuple(columns) == self.names:
+            return None
+        duplicated = {c for c in columns if columns.count(c) > 1}
+        if duplicated:
+            raise HTTPException(
+                status_code=422, detail=f"Columnas duplicadas: {sorted(duplicated)}"
+            )
+        self.validate(dict.fromkeys(columns, 0.0))
+        position = {c: i for i, c in enumerate(columns)}
+        return np.array([position[name] for name in self.names])
+
+    # ── Batch ─────────────────────────────────────────────────────────────────
+
+    def validate_batch(self, rows: list[dict]) -> tuple[np.ndarray, list, dict]:
+        """
+        Valida N filas de una vez.
+
+        Returns:
+            X:         matriz float32 (n_validas, n_features) en el orden del modelo
+            valid_idx: posición en `rows` de cada fila de X
+            errors:    {posición: error estructurado} de las filas inválidas
+        """
+        errors = {}
+        keyed = []
+        for i, features in enumerate(rows):
+            # Comparación de claves contra el set en C; solo las filas que no
+            # coinciden pasan por el chequeo detallado
+            if features.keys() == self._name_set:
+                keyed.append(i)
+            else:
+                errors[i] = self.check(features)
+
+        if not keyed:
+            return np.empty((0, self.n_features), dtype=np.float32), [], errors
+
+        values = list(map(self._getter, (rows[i] for i in keyed)))
+        if self.n_features == 1:
+            values = [(v,) for v in values]
+        columns = list(zip(*values))
+
+        # Tipos por columna: set(map(type, col)) corre en C y en el caso normal
+        # todas las columnas son numéricas. Solo las columnas con otros tipos
+        # se inspeccionan celda por celda con máscaras de NumPy.
+        n = len(keyed)
+        masks = {code: np.zeros((n, self.n_features), dtype=bool) for code in FLAGS}
+        for j, column in enumerate(columns):
+            present = set(map(type, column))
+            if present <= NUMERIC_SET:
+                continue
+            cells = np.array(column, dtype=object)
+            if type(None) in present:
+                masks["null"][:, j] = np.equal(cells, None)
+            if present - NUMERIC_SET - {type(None)}:
+                types = np.frompyfunc(type, 1, 1)(cells)
+                masks["string"][:, j] = np.equal(types, str)
+                masks["type"][:, j] = ~np.logical_or.reduce(
+                    [np.equal(types, t) for t in (*NUMERIC_TYPES, type(None), str)]
+                )
+
+        ok = np.ones(n, dtype=bool)
+        for code in FLAGS:
+            for r in np.flatnonzero(masks[code].any(axis=1)):
+                if ok[r]:
+                    keys = [self.names[j] for j in np.flatnonzero(masks[code][r])]
+                    errors[keyed[r]] = feature_error(code, keys)
+                    ok[r] = False
+
+        if ok.all():
+            X = np.empty((n, self.n_features), dtype=np.float32)
+            for j, column in enumerate(columns):
+                X[:, j] = np.fromiter(column, dtype=np.float32, count=n)
+            return X, keyed, errors
+
+        valid = np.flatnonzero(ok)
+        X = np.array([values[r] for r in valid], dtype=np.float32)
+        return X.reshape(-1, self.n_features), [keyed[r] for r in valid], errors
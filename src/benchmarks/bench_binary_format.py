@@ -0,0 +1,88 @@
+"""
+bench_binary_format.py
+======================
+/horse/predict/batch con JSON vs el formato binario de binary_format.py
+(matriz float32 + header con el orden de features), de punta a punta dentro
+del proceso con TestClient: encode del cliente, parseo y validación en la
+API, scoring, respuesta y decode.
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/bench_binary_format.py
+    python src/benchmarks/bench_binary_format.py --rows 100 1000 10000 --repeat 20
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import argparse
+import json
+import time
+
+import numpy as np
+from binary_format import MEDIA_TYPE, decode_matrix, encode_matrix
+from fastapi.testclient import TestClient
+from schemas import HorsePredictRequest
+from src.api.main import app
+
+
+def bench(fn, repeat: int) -> float:
+    """Mediana en milisegundos."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)) * 1e3
+
+
+def main(row_counts: list[int], repeat: int):
+    client = TestClient(app)
+    example = HorsePredictRequest.model_config["json_schema_extra"]["example"]
+    names = list(example["features"])
+    rng = np.random.default_rng(0)
+
+    print(
+        f"{'filas':>7} {'json ms':>9} {'binario ms':>11} {'json KB':>9} {'bin KB':>8}"
+    )
+    for n in row_counts:
+        X = rng.random((n, len(names)), dtype=np.float32)
+        rows = [dict(zip(names, map(float, r))) for r in X]
+
+        def via_json():
+            body = json.dumps({"rows": rows})
+            r = client.post(
+                "/horse/predict/batch",
+                content=body,
+                headers={"Content-Type": "application/json"},
+            )
+            r.json()
+            return len(body)
+
+        def via_binary():
+            body = encode_matrix(X, names)
+            r = client.post(
+                "/horse/predict/batch",
+                content=body,
+                headers={"Content-Type": MEDIA_TYPE},
+            )
+            decode_matrix(r.content)
+            return len(body)
+
+        t_json, t_binary = bench(via_json, repeat), bench(via_binary, repeat)
+        print(
+            f"{n:>7} {t_json:>9.1f} {t_binary:>11.1f} "
+            f"{via_json() / 1024:>9.0f} {via_binary() / 1024:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON vs binario en /predict/batch")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    main(args.rows, args.repeat)
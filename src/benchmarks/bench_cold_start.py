@@ -0,0 +1,92 @@
+"""
+bench_cold_start.py
+===================
+Mide el time-to-first-response de la API desde un proceso uvicorn nuevo:
+tiempo entre el spawn y la primera respuesta 200 de cada endpoint, con y
+sin pre-carga de modelos (PREWARM_MODELS).
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/bench_cold_start.py
+    python src/benchmarks/bench_cold_start.py --runs 5 --prewarm "" all
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import os
+import socket
+import subprocess
+import time
+
+import numpy as np
+import requests
+from schemas import HorsePredictRequest, HorseRecommendRequest, ProdsPredictRequest
+
+ENDPOINTS = {
+    "/recommender/recommend": HorseRecommendRequest.model_config["json_schema_extra"][
+        "example"
+    ],
+    "/horse/predict": HorsePredictRequest.model_config["json_schema_extra"]["example"],
+    "/prods/predict": ProdsPredictRequest.model_config["json_schema_extra"]["example"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_response(
+    endpoint: str, prewarm: str, timeout: float = 120.0
+) -> float:
+    port = free_port()
+    env = {**os.environ, "PREWARM_MODELS": prewarm}
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}{endpoint}"
+        while time.perf_counter() - t0 < timeout:
+            try:
+                r = requests.post(url, json=ENDPOINTS[endpoint], timeout=timeout)
+                if r.status_code == 200:
+                    return time.perf_counter() - t0
+            except requests.ConnectionError:
+                time.sleep(0.02)
+        raise TimeoutError(f"{endpoint} no respondió 200 en {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(runs: int, prewarm_modes: list[str]):
+    print(f"{'endpoint':<24} {'prewarm':<8} {'p50 s':>8} {'max s':>8}")
+    for endpoint in ENDPOINTS:
+        for prewarm in prewarm_modes:
+            times = [time_to_first_response(endpoint, prewarm) for _ in range(runs)]
+            print(
+                f"{endpoint:<24} {prewarm or '-':<8} "
+                f"{np.median(times):>8.3f} {max(times):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start de la API")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--prewarm",
+        nargs="+",
+        default=["", "all"],
+        help='Valores de PREWARM_MODELS a comparar ("" = lazy)',
+    )
+    args = parser.parse_args()
+
+    main(args.runs, args.prewarm)
@@ -0,0 +1,87 @@
+"""
+bench_fast_path.py
+==================
+Micro-benchmark del scoring de una fila: camino DataFrame (pd.DataFrame +
+reindex por feature_names_in_) vs FeatureOrder.row() (fila float32 directa).
+
+Mide por separado la construcción del input y el scoring completo
+(input + P1 + P2) para los routers horse y prods.
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/bench_fast_path.py
+    python src/benchmarks/bench_fast_path.py --repeat 5000 --backend numpy
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from schemas import HorsePredictRequest, ProdsPredictRequest
+from scoring import FeatureOrder
+from utils import load_model
+
+ROUTERS = {
+    "horse": ("HORSE_P1", "HORSE_P2", HorsePredictRequest),
+    "prods": ("PRODS_P1", "PRODS_P2", ProdsPredictRequest),
+}
+
+
+def bench(fn, repeat: int) -> tuple[float, float]:
+    """Devuelve (p50, p99) en microsegundos."""
+    fn()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - t0
+    return np.percentile(times, 50) * 1e6, np.percentile(times, 99) * 1e6
+
+
+def main(repeat: int, backend: str):
+    print(f"backend={backend}  repeat={repeat}\n")
+    print(f"{'router':<7} {'etapa':<10} {'camino':<10} {'p50 µs':>9} {'p99 µs':>9}")
+    for router, (p1_name, p2_name, schema) in ROUTERS.items():
+        model_p1 = load_model(p1_name, backend=backend)
+        model_p2 = load_model(p2_name, backend=backend)
+        features = schema.model_config["json_schema_extra"]["example"]["features"]
+        order = FeatureOrder(model_p1.feature_names_in_)
+
+        def df_input():
+            return pd.DataFrame([features])[model_p1.feature_names_in_]
+
+        def np_input():
+            return order.row(features)
+
+        def df_full():
+            X = df_input()
+            model_p1.predict_proba(X)
+            model_p2.predict_proba(X)
+
+        def np_full():
+            X = np_input()
+            model_p1.predict_proba(X)
+            model_p2.predict_proba(X)
+
+        for stage, paths in [
+            ("input", [("dataframe", df_input), ("numpy", np_input)]),
+            ("completo", [("dataframe", df_full), ("numpy", np_full)]),
+        ]:
+            for path, fn in paths:
+                p50, p99 = bench(fn, repeat)
+                print(f"{router:<7} {stage:<10} {path:<10} {p50:>9.1f} {p99:>9.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DataFrame vs fila float32")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--backend", default="xgboost", choices=["xgboost", "numpy"])
+    args = parser.parse_args()
+
+    main(args.repeat, args.backend)
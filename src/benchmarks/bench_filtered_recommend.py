@@ -0,0 +1,120 @@
+"""
+bench_filtered_recommend.py
+===========================
+Recomendaciones filtradas ("similares, de menos de $X, en el estado Y") con
+tres estrategias sobre un catálogo replicado (ver bench_recommender_index):
+
+- over-fetch: kneighbors con k × factor y post-filtrado (lo que había que
+  hacer con NearestNeighbors); puede devolver menos de k resultados
+- scan + máscara: distancias contra todo el catálogo y filtrado exacto
+- bitmaps: ListingTable.candidates() + kneighbors_subset, que solo calcula
+  distancias contra las filas que cumplen el filtro
+
+Las columnas de listings (location, gender, price) son sintéticas, con la
+cantidad de valores de un catálogo real (50 estados, 3 géneros).
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/bench_filtered_recommend.py
+    python src/benchmarks/bench_filtered_recommend.py --scales 10 100 --overfetch 20
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import time
+
+import numpy as np
+from bench_recommender_index import replicate_catalog, sample_queries
+from listings import ListingFilter, ListingTable
+from recommender import NumpyRecommender
+from utils import load_recommender
+
+STATES = [f"state {i}" for i in range(50)]
+GENDERS = ["mare", "gelding", "stallion"]
+
+
+def synthetic_listings(rec: NumpyRecommender, seed: int = 0) -> ListingTable:
+    rng = np.random.default_rng(seed)
+    price = rec.item_factors.price
+    usd = (price - rec.scaler_min[0]) / rec.scaler_scale[0]
+    return ListingTable(
+        {
+            "horse_id": [str(i) for i in range(rec.n_items)],
+            "price": usd.tolist(),
+            "location": rng.choice(STATES, rec.n_items).tolist(),
+            "gender": rng.choice(GENDERS, rec.n_items).tolist(),
+        }
+    )
+
+
+def timed(fn, X) -> tuple[float, list]:
+    times, out = [], []
+    for x in X:
+        t0 = time.perf_counter()
+        out.append(fn(x[None, :]))
+        times.append(time.perf_counter() - t0)
+    return float(np.percentile(times, 50)) * 1e6, out
+
+
+def main(scales: list[int], n_queries: int, overfetch: int):
+    base = load_recommender()
+    if not isinstance(base, NumpyRecommender):
+        sys.exit("Se necesita el recomendador NumPy (model pack o arrays exportados)")
+
+    print(
+        f"{'items':>8} {'cand':>6} {'over-fetch µs':>14} {'<k':>5} "
+        f"{'scan µs':>9} {'bitmaps µs':>11} {'iguales':>8}"
+    )
+    for scale in scales:
+        rec = NumpyRecommender(*replicate_catalog(base, scale))
+        rec.build_index()
+        listings = synthetic_listings(rec)
+        k = rec.n_neighbors
+        usd = np.array(listings.columns["price"])
+        filters = ListingFilter(
+            price_max=float(np.quantile(usd, 0.5)), location="state 7", gender="mare"
+        )
+        mask = np.zeros(rec.n_items, dtype=bool)
+        mask[listings.candidates(filters)] = True
+        X = sample_queries(rec, n_queries)
+
+        def over_fetch(x):
+            _, idx = rec.kneighbors(x, k * overfetch)
+            return idx[0][mask[idx[0]]][:k]
+
+        def scan(x):
+            dist = rec.cosine_distances(x)[0]
+            cand = np.flatnonzero(mask)
+            return cand[np.argsort(dist[cand], kind="stable")[:k]]
+
+        def bitmaps(x):
+            return rec.kneighbors_subset(x, listings.candidates(filters), k)[1][0]
+
+        t_over, res_over = timed(over_fetch, X)
+        t_scan, res_scan = timed(scan, X)
+        t_bits, res_bits = timed(bitmaps, X)
+        short = np.mean([len(r) < min(k, mask.sum()) for r in res_over])
+        dist = rec.cosine_distances(X)
+        same = np.mean(
+            [
+                np.allclose(np.sort(d[a]), np.sort(d[b]))
+                for d, a, b in zip(dist, res_scan, res_bits)
+            ]
+        )
+        print(
+            f"{rec.n_items:>8} {int(mask.sum()):>6} {t_over:>14.0f} {short:>5.0%} "
+            f"{t_scan:>9.0f} {t_bits:>11.0f} {same:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KNN filtrado: bitmaps vs over-fetch")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--overfetch", type=int, default=10)
+    args = parser.parse_args()
+
+    main(args.scales, args.queries, args.overfetch)
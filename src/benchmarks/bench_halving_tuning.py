@@ -0,0 +1,94 @@
+"""
+bench_halving_tuning.py
+=======================
+train.py --tune-mode random (RandomizedSearchCV de 15 candidatos × 3 folds,
+cada uno entrenado con todas sus rondas) vs --tune-mode halving (successive
+halving de 27 candidatos con rondas de boosting como presupuesto y early
+stopping sobre aucpr), sobre los mismos datos sintéticos que
+bench_parallel_tuning y con el mismo pool y presupuesto de threads.
+
+Para comparar la calidad, los mejores params de cada modo se vuelven a
+evaluar con el mismo CV de 3 folds sin early stopping (F2 final).
+
+Uso:
+    python src/benchmarks/bench_halving_tuning.py
+    python src/benchmarks/bench_halving_tuning.py --rows 50000 --threads 2
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "experiments" / "leads"))
+
+import argparse
+import time
+
+import numpy as np
+from bench_parallel_tuning import PARAM_DIST, PARAMS_XGB_COMUNES, make_searches
+from sklearn.metrics import fbeta_score, make_scorer
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from tuning import BUILDERS, _prefixed, run_halving, run_searches
+
+
+def final_f2(spec, params, cv, scoring, threads) -> float:
+    est = BUILDERS[spec.kind](spec.spw, PARAMS_XGB_COMUNES, threads)
+    est.set_params(**_prefixed(spec.kind, params))
+    return float(np.mean(cross_val_score(est, spec.X, spec.y, scoring=scoring, cv=cv)))
+
+
+def main(rows: int, threads: int, n_iter: int, n_candidates: int, eta: int):
+    searches = make_searches(rows)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    scoring = make_scorer(fbeta_score, beta=2)
+    max_rounds = max(PARAM_DIST["n_estimators"])
+
+    t0 = time.time()
+    random = run_searches(
+        searches, PARAM_DIST, n_iter, cv, scoring, PARAMS_XGB_COMUNES, threads
+    )
+    t_random = time.time() - t0
+
+    t0 = time.time()
+    halving = run_halving(
+        searches,
+        PARAM_DIST,
+        n_candidates,
+        cv,
+        scoring,
+        PARAMS_XGB_COMUNES,
+        max_rounds=max_rounds,
+        eta=eta,
+        threads=threads,
+    )
+    t_halving = time.time() - t0
+
+    print(
+        f"{rows:,} filas | random: {n_iter} candidatos × {max_rounds} rondas | "
+        f"halving: {n_candidates} candidatos, eta={eta}, "
+        f"escalones {[r for r, _ in halving[0].rungs]}"
+    )
+    print(f"\nrandom : {t_random:>7.1f} s")
+    print(f"halving: {t_halving:>7.1f} s ({t_random / t_halving:.1f}x)")
+    print(
+        f"\n  {'búsqueda':<10} {'CPU random':>10} {'CPU halving':>11} "
+        f"{'F2 random':>10} {'F2 halving':>11} {'rondas':>7}"
+    )
+    for spec, r, h in zip(searches, random, halving):
+        f2_r = final_f2(spec, r.best_params, cv, scoring, threads)
+        f2_h = final_f2(spec, h.best_params, cv, scoring, threads)
+        print(
+            f"  {spec.label:<10} {r.cpu_s:>10.1f} {h.cpu_s:>11.1f} "
+            f"{f2_r:>10.4f} {f2_h:>11.4f} {h.best_params['n_estimators']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tuning random vs halving")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--n-iter", type=int, default=15)
+    parser.add_argument("--candidates", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3)
+    args = parser.parse_args()
+
+    main(args.rows, args.threads, args.n_iter, args.candidates, args.eta)
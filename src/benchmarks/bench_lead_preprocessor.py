@@ -0,0 +1,139 @@
+"""
+bench_lead_preprocessor.py
+==========================
+Preprocesamiento de leads en inferencia: la cadena de preprocess_horse
+(copia → TargetEncoder.transform → capping → selección de columnas) vs
+LeadPreprocessor, que hace los tres pasos en una sola pasada sobre una
+matriz NumPy.
+
+Los datos son sintéticos con las columnas de features.py (categóricas con
+NaN y categorías que no se vieron en el fit). Antes de medir verifica:
+  - fusionado == cadena de preprocess_horse, fila a fila
+  - fusionado sobre las filas de test == X_test_horse / X_test_prods de
+    build_datasets
+  - el .npz guardado y recargado da lo mismo
+  - transform_array (matriz NumPy) == transform_frame
+
+Uso:
+    python src/benchmarks/bench_lead_preprocessor.py
+    python src/benchmarks/bench_lead_preprocessor.py --rows 1000 100000 --repeat 5
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "experiments" / "leads"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "monitoring"))
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from features import (
+    COLS_HORSE,
+    COLS_PRODS,
+    COLS_TARGET_ENCODE,
+    COLS_USER,
+    build_datasets,
+)
+from preprocess_horse import preprocess_horse
+from preprocessor import LeadPreprocessor
+
+TARGETS = ["Lead Bronce", "Lead Plata", "Lead Oro"]
+
+
+def synthetic_leads(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col in dict.fromkeys(COLS_USER + COLS_HORSE + COLS_PRODS):
+        if col in COLS_TARGET_ENCODE:
+            values = rng.choice([f"{col}_{i}" for i in range(30)], n).astype(object)
+            values[rng.random(n) < 0.02] = None
+            data[col] = values
+        else:
+            data[col] = rng.pareto(1.5, n)
+    data["horse_target"] = rng.choice(TARGETS, n, p=[0.6, 0.3, 0.1])
+    data["prods_target"] = rng.choice(TARGETS, n, p=[0.6, 0.3, 0.1])
+    return pd.DataFrame(data)
+
+
+def with_unseen(df: pd.DataFrame, seed: int = 1) -> pd.DataFrame:
+    """Copia con ~5% de categorías nunca vistas en el fit."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    for col in COLS_TARGET_ENCODE:
+        if col in df.columns:
+            df.loc[rng.random(len(df)) < 0.05, col] = f"{col}_nueva"
+    return df
+
+
+def best_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1e3
+
+
+def main(row_counts: list[int], repeat: int):
+    df_train = synthetic_leads(20_000)
+    datasets = build_datasets(df_train)
+    te, limites = datasets["te"], datasets["limites_capping"]
+    arts = {
+        "target_encoder": te,
+        "capping": (
+            np.array(list(limites), dtype=str),
+            np.array(list(limites.values()), dtype=np.float64),
+        ),
+        "cols_horse": datasets["cols_horse"],
+    }
+    fused = {
+        domain: LeadPreprocessor.from_fitted(te, limites, datasets[f"cols_{domain}"])
+        for domain in ("horse", "prods")
+    }
+
+    # Paridad con build_datasets sobre las filas de test
+    raw_test = df_train.loc[datasets["X_test_horse"].index]
+    for domain in ("horse", "prods"):
+        expected = datasets[f"X_test_{domain}"].astype(np.float64)
+        got = fused[domain].transform_frame(raw_test)
+        pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-12)
+    print("✓ fusionado == build_datasets (X_test_horse, X_test_prods)")
+
+    # Paridad con preprocess_horse (con NaN y categorías nuevas) y con el .npz
+    raw = with_unseen(synthetic_leads(5_000, seed=2))
+    chain = preprocess_horse(raw, arts).astype(np.float64)
+    with tempfile.TemporaryDirectory() as tmp:
+        fused["horse"].save(f"{tmp}/preprocessor_horse.npz")
+        reloaded = LeadPreprocessor.load(f"{tmp}/preprocessor_horse.npz")
+    for pre in (fused["horse"], reloaded):
+        pd.testing.assert_frame_equal(
+            pre.transform_frame(raw), chain, check_exact=False, rtol=1e-12
+        )
+    print("✓ fusionado == preprocess_horse (NaN, categorías nuevas, .npz)")
+
+    # Paridad de la ruta matricial (transform_array) con la de DataFrame
+    cols = fused["horse"].columns.tolist()
+    got = fused["horse"].transform_array(raw[cols].to_numpy(dtype=object))
+    np.testing.assert_allclose(got, chain.to_numpy(), rtol=1e-12)
+    print("✓ transform_array == transform_frame")
+
+    print(f"\n{'filas':>9} {'cadena ms':>10} {'fusionado ms':>13} {'speedup':>8}")
+    for n in row_counts:
+        raw = with_unseen(synthetic_leads(n, seed=3))
+        out = np.empty((n, len(fused["horse"].columns)), order="F")
+        t_chain = best_ms(lambda: preprocess_horse(raw, arts), repeat)
+        t_fused = best_ms(lambda: fused["horse"].transform(raw, out=out), repeat)
+        print(f"{n:>9,} {t_chain:>10.1f} {t_fused:>13.1f} {t_chain / t_fused:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="preprocess_horse vs fusionado")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10_000, 200_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    main(args.rows, args.repeat)
@@ -0,0 +1,147 @@
+"""
+bench_parallel_tuning.py
+========================
+Tuning de leads (train.py --tune) sobre datos sintéticos con la forma del
+df_final: las cuatro RandomizedSearchCV una tras otra (joblib n_jobs=-1 y
+XGBoost n_jobs=-1, como estaba antes) vs el planificador de tuning.py, que
+corre las cuatro a la vez en un pool compartido con un presupuesto fijo de
+threads por fold/candidato.
+
+Además verifica que los scores por candidato del planificador sean idénticos
+a los de RandomizedSearchCV con el mismo presupuesto de threads, y que no
+cambien con la cantidad de workers.
+
+Las búsquedas de paso 2 usan SMOTE + XGB si imblearn está instalado; si no,
+las cuatro son de paso 1.
+
+Uso:
+    python src/benchmarks/bench_parallel_tuning.py
+    python src/benchmarks/bench_parallel_tuning.py --rows 20000 --n-iter 15 --threads 2
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "experiments" / "leads"))
+
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.metrics import fbeta_score, make_scorer
+from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold
+from tuning import BUILDERS, SearchSpec, _prefixed, print_report, run_searches
+
+# Mismos valores que model.PARAMS_XGB_COMUNES (model.py importa imblearn)
+PARAMS_XGB_COMUNES = dict(
+    eval_metric="aucpr", tree_method="hist", random_state=42, n_jobs=-1
+)
+PARAM_DIST = {
+    "max_depth": [3, 4, 5],
+    "learning_rate": [0.01, 0.05, 0.1],
+    "n_estimators": [200, 400],
+    "subsample": [0.7, 0.9],
+    "colsample_bytree": [0.7, 0.9],
+    "reg_alpha": [0, 0.1, 1.0],
+    "reg_lambda": [1.0, 5.0],
+}
+
+
+def make_searches(rows: int) -> list[SearchSpec]:
+    p2_kind = "p2" if importlib.util.find_spec("imblearn") else "p1"
+    searches = []
+    for i, (label, kind, weight) in enumerate(
+        [
+            ("P1 horse", "p1", 0.7),
+            ("P1 prods", "p1", 0.7),
+            ("P2 horse", p2_kind, 0.85),
+            ("P2 prods", p2_kind, 0.85),
+        ]
+    ):
+        # P2 entrena sobre el subconjunto no-Bronce: menos filas, más desbalance
+        n = rows if kind == "p1" and i < 2 else rows // 3
+        X, y = make_classification(
+            n, n_features=60, n_informative=15, weights=[weight], random_state=i
+        )
+        spw = (y == 0).sum() / (y == 1).sum()
+        searches.append(SearchSpec(label, kind, X.astype(np.float32), y, spw))
+    return searches
+
+
+def sequential(searches, n_iter, cv, scoring, threads=None):
+    """RandomizedSearchCV una tras otra (threads=None: n_jobs=-1 anidado)."""
+    scores = []
+    for spec in searches:
+        est = BUILDERS[spec.kind](spec.spw, PARAMS_XGB_COMUNES, threads or -1)
+        rs = RandomizedSearchCV(
+            est,
+            _prefixed(spec.kind, PARAM_DIST),
+            n_iter=n_iter,
+            scoring=scoring,
+            cv=cv,
+            n_jobs=-1 if threads is None else 1,
+            random_state=42,
+        )
+        rs.fit(spec.X, spec.y)
+        scores.append(rs.cv_results_["mean_test_score"])
+    return scores
+
+
+def main(rows: int, n_iter: int, threads: int):
+    cores = os.cpu_count() or 1
+    searches = make_searches(rows)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    scoring = make_scorer(fbeta_score, beta=2)
+    kinds = ", ".join(s.kind for s in searches)
+    print(f"{rows:,} filas, {n_iter} candidatos × 3 folds, {kinds}, {cores} cores")
+
+    t0 = time.time()
+    sequential(searches, n_iter, cv, scoring)
+    t_seq = time.time() - t0
+    print(f"\nsecuencial (n_jobs=-1 anidado): {t_seq:.1f} s")
+
+    t0 = time.time()
+    results = run_searches(
+        searches, PARAM_DIST, n_iter, cv, scoring, PARAMS_XGB_COMUNES, threads
+    )
+    t_par = time.time() - t0
+    print(
+        f"planificador ({threads} thread/tarea): {t_par:.1f} s ({t_seq / t_par:.1f}x)"
+    )
+    print_report(results, t_par)
+
+    # Mismo presupuesto de threads en RandomizedSearchCV y otra cantidad de
+    # workers en el planificador: los scores tienen que ser idénticos
+    reference = sequential(searches, n_iter, cv, scoring, threads=threads)
+    other = run_searches(
+        searches,
+        PARAM_DIST,
+        n_iter,
+        cv,
+        scoring,
+        PARAMS_XGB_COMUNES,
+        threads,
+        max_workers=max(1, cores // threads // 2),
+    )
+    print()
+    for r, ref, o in zip(results, reference, other):
+        same_ref = np.array_equal(r.cv_scores.mean(axis=1), ref)
+        same_workers = np.array_equal(r.cv_scores, o.cv_scores)
+        print(
+            f"  {r.label}: igual a RandomizedSearchCV={same_ref} "
+            f"igual con otros workers={same_workers} "
+            f"mejor={r.best_params == o.best_params}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tuning secuencial vs en paralelo")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--n-iter", type=int, default=15)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    main(args.rows, args.n_iter, args.threads)
@@ -0,0 +1,81 @@
+"""
+bench_recommend_batch.py
+========================
+N queries al recomendador como N llamadas a /recommender/recommend (más el
+lookup de cada índice en el parquet de listings, como hacía el cliente) vs
+una sola llamada a /recommender/recommend/batch, que resuelve todo con un
+producto de matrices y devuelve los listings ya unidos. Con el cache de
+respuestas desactivado para medir el cálculo.
+
+Uso (desde la raíz donde están ./models/production y LISTINGS_PATH):
+    python src/benchmarks/bench_recommend_batch.py
+    python src/benchmarks/bench_recommend_batch.py --queries 10 100 1000
+"""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ["RECOMMENDER_CACHE_SIZE"] = "0"
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api.listings import LISTING_COLUMNS, LISTINGS_PATH
+from src.api.main import app
+
+BREEDS = ["andalusian", "quarter horse", "arabian", "thoroughbred", "friesian"]
+COLORS = ["bay", "black", "chestnut", "grey", "palomino"]
+
+
+def make_queries(n: int) -> list[dict]:
+    rng = np.random.default_rng(0)
+    return [
+        {
+            "breed": str(rng.choice(BREEDS)),
+            "color": str(rng.choice(COLORS)),
+            "price": float(rng.uniform(1_000, 100_000)),
+        }
+        for _ in range(n)
+    ]
+
+
+def main(query_counts: list[int], repeat: int):
+    client = TestClient(app)
+    listings = pd.read_parquet(LISTINGS_PATH, columns=list(LISTING_COLUMNS))
+
+    def one_by_one(queries):
+        for q in queries:
+            neighbors = client.post("/recommender/recommend", json=q).json()
+            listings.iloc[[n["index"] for n in neighbors["neighbors"]]]
+
+    def batch(queries):
+        client.post("/recommender/recommend/batch", json={"queries": queries}).json()
+
+    print(f"{'queries':>8} {'1 x 1 ms':>10} {'batch ms':>10} {'speedup':>8}")
+    for n in query_counts:
+        queries = make_queries(n)
+        times = {}
+        for name, fn in (("single", one_by_one), ("batch", batch)):
+            fn(queries)
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                fn(queries)
+            times[name] = (time.perf_counter() - t0) / repeat * 1e3
+        print(
+            f"{n:>8} {times['single']:>10.1f} {times['batch']:>10.1f} "
+            f"{times['single'] / times['batch']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/recommend vs /recommend/batch")
+    parser.add_argument("--queries", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    main(args.queries, args.repeat)
@@ -0,0 +1,117 @@
+"""
+bench_recommender_index.py
+==========================
+Latencia p50/p99 de kneighbors con TopKIndex vs scan brute-force a medida que
+crece el catálogo. El catálogo de model_engine se replica N veces con precios
+perturbados (mismas combinaciones breed/color, más items por combinación) y
+las queries usan breed/color del catálogo con precios al azar dentro del
+rango, que es el caso que cubre el índice.
+
+También verifica que ambos caminos devuelvan las mismas distancias.
+
+Uso (desde la raíz donde está ./models/production, con el model pack o los
+arrays exportados del recomendador):
+    python src/benchmarks/bench_recommender_index.py
+    python src/benchmarks/bench_recommender_index.py --scales 1 10 100 --queries 500
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import time
+
+import numpy as np
+from recommender import NumpyRecommender
+from utils import load_recommender
+
+
+def replicate_catalog(base: NumpyRecommender, scale: int, seed: int = 0):
+    """Arrays/meta de un catálogo `scale` veces más grande."""
+    rng = np.random.default_rng(seed)
+    n = base.n_items
+    dense = np.zeros((n, base.n_features))
+    rows = np.repeat(np.arange(n), np.diff(base.items_indptr))
+    dense[rows, base.items_indices] = base.items_data
+
+    big = np.tile(dense, (scale, 1))
+    price = big[:, base.n_text]
+    big[n:, base.n_text] = np.clip(
+        price[n:] + rng.normal(0, 0.02, len(price) - n), 0.0, 1.0
+    )
+
+    r, c = np.nonzero(big)
+    indptr = np.zeros(len(big) + 1, dtype=np.int64)
+    np.add.at(indptr, r + 1, 1)
+    arrays = {
+        "idf": base.idf,
+        "scaler_min": base.scaler_min,
+        "scaler_scale": base.scaler_scale,
+        "items_data": big[r, c],
+        "items_indices": c.astype(np.int32),
+        "items_indptr": np.cumsum(indptr),
+    }
+    return arrays, {**base.meta, "n_items": len(big)}
+
+
+def sample_queries(rec: NumpyRecommender, n: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    items = rng.integers(0, rec.n_items, n)
+    X = np.zeros((n, rec.n_features))
+    for q, i in enumerate(items):
+        lo, hi = rec.items_indptr[i], rec.items_indptr[i + 1]
+        X[q, rec.items_indices[lo:hi]] = rec.items_data[lo:hi]
+    X[:, rec.n_text] = rng.uniform(0.0, 1.0, n)
+    return X
+
+
+def latencies(rec: NumpyRecommender, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    times, dists = [], []
+    for x in X:
+        t0 = time.perf_counter()
+        d, _ = rec.kneighbors(x[None, :])
+        times.append(time.perf_counter() - t0)
+        dists.append(d[0])
+    return np.array(times) * 1e6, np.array(dists)
+
+
+def main(scales: list[int], n_queries: int, n_buckets: int):
+    base = load_recommender("model_engine")
+    if not isinstance(base, NumpyRecommender):
+        print("✗ No hay model pack ni arrays exportados para model_engine")
+        return
+
+    print(
+        f"{'items':>8} {'build s':>8} {'cand avg':>9} "
+        f"{'brute p50':>10} {'brute p99':>10} {'index p50':>10} {'index p99':>10} "
+        f"{'max |Δ|':>9}"
+    )
+    for scale in scales:
+        rec = NumpyRecommender(*replicate_catalog(base, scale))
+        X = sample_queries(rec, n_queries)
+
+        t_brute, d_brute = latencies(rec, X)
+        t0 = time.perf_counter()
+        index = rec.build_index(n_buckets)
+        build = time.perf_counter() - t0
+        t_index, d_index = latencies(rec, X)
+
+        b50, b99 = np.percentile(t_brute, [50, 99])
+        i50, i99 = np.percentile(t_index, [50, 99])
+        print(
+            f"{rec.n_items:>8} {build:>8.2f} {index.stats()['avg_candidates']:>9.1f} "
+            f"{b50:>8.0f}µs {b99:>8.0f}µs {i50:>8.0f}µs {i99:>8.0f}µs "
+            f"{np.abs(d_brute - d_index).max():>9.1e}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TopKIndex vs brute-force")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--buckets", type=int, default=32)
+    args = parser.parse_args()
+
+    main(args.scales, args.queries, args.buckets)
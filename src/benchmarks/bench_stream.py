@@ -0,0 +1,147 @@
+"""
+bench_stream.py
+===============
+Memoria y throughput de /horse/predict/stream (streaming.py) según la
+cantidad de usuarios enviados. Para cada tamaño levanta src/api/serve.py con
+un worker, manda las filas como NDJSON con un cliente que lee la respuesta
+mientras envía, y reporta el pico de memoria del servidor
+(VmHWM de /proc, solo Linux). Con streaming el pico no debería crecer con la
+cantidad de filas.
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/bench_stream.py
+    python src/benchmarks/bench_stream.py --rows 10000 100000 1000000
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+
+import h11
+import httpx
+from schemas import HorsePredictRequest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "API_WORKERS": "1",
+        "API_HOST": "127.0.0.1",
+        "API_PORT": str(port),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, str(ROOT / "src" / "api" / "serve.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/models/status")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("El servidor no levantó")
+
+
+def peak_rss_mb(pid: int) -> float:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+async def send_rows(port: int, line: bytes, n_rows: int) -> tuple[int, float]:
+    """
+    Cliente HTTP/1.1 full duplex (asyncio + h11): envía el body en chunks
+    mientras lee la respuesta, como tiene que hacerlo un cliente de
+    /predict/stream. httpx manda todo el body antes de leer y con listas
+    grandes se traba cuando se llenan los buffers del socket.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    conn = h11.Connection(h11.CLIENT)
+    request = h11.Request(
+        method="POST",
+        target="/horse/predict/stream",
+        headers=[
+            ("Host", "127.0.0.1"),
+            ("Content-Type", "application/x-ndjson"),
+            ("Transfer-Encoding", "chunked"),
+        ],
+    )
+
+    async def send():
+        writer.write(conn.send(request))
+        block = line * 500
+        for size in [500] * (n_rows // 500) + [n_rows % 500]:
+            if size:
+                writer.write(conn.send(h11.Data(data=block[: size * len(line)])))
+                await writer.drain()
+        writer.write(conn.send(h11.EndOfMessage()))
+        await writer.drain()
+
+    async def receive() -> int:
+        received = 0
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                conn.receive_data(await reader.read(1 << 16))
+            elif isinstance(event, h11.Data):
+                received += bytes(event.data).count(b"\n")
+            elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                return received
+
+    t0 = time.perf_counter()
+    sender = asyncio.create_task(send())
+    received = await receive()
+    await sender
+    elapsed = time.perf_counter() - t0
+    writer.close()
+    return received, elapsed
+
+
+def main(row_counts: list[int], port: int):
+    example = HorsePredictRequest.model_config["json_schema_extra"]["example"]
+    features = {
+        k: 1 if isinstance(v, str) else v for k, v in example["features"].items()
+    }
+    line = (json.dumps(features) + "\n").encode()
+
+    print(f"{'filas':>9} {'recibidas':>10} {'filas/s':>9} {'pico RSS MB':>12}")
+    for n in row_counts:
+        proc = start_server(port)
+        try:
+            asyncio.run(send_rows(port, line, 1000))  # carga de modelos
+            base = peak_rss_mb(proc.pid)
+            received, elapsed = asyncio.run(send_rows(port, line, n))
+            peak = peak_rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{n:>9} {received:>10} {n / elapsed:>9.0f} "
+            f"{peak:>8.0f} (+{peak - base:.0f})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memoria de /predict/stream")
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000]
+    )
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    main(args.rows, args.port)
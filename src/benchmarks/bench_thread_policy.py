@@ -0,0 +1,99 @@
+"""
+bench_thread_policy.py
+======================
+Latencia de predict_proba bajo carga concurrente con y sin la política de
+threads de thread_policy.py:
+
+- "off":   un XGBClassifier con los threads por defecto (todos los cores en
+           cada llamada), como antes
+- "auto":  ThreadGovernedModel (1 thread para batches chicos, todos los cores
+           para los grandes, de a uno)
+
+La carga imita al threadpool de FastAPI: `--concurrency` threads que mandan
+requests de 1 fila, con una fracción `--large-ratio` de batches grandes.
+Reporta p50 / p99 de cada tipo de request y el throughput total.
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/bench_thread_policy.py
+    python src/benchmarks/bench_thread_policy.py --model PRODS_P1 --concurrency 32
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from thread_policy import ThreadPolicy
+from utils import ARTIFACTS_PATH, _load_xgb
+
+
+def run_load(model, n_features: int, args) -> dict:
+    rng = np.random.default_rng(0)
+    sizes = np.where(
+        rng.random(args.requests) < args.large_ratio, args.large_rows, 1
+    ).astype(int)
+    X = rng.random((args.large_rows, n_features), dtype=np.float32)
+
+    def call(n: int) -> tuple[int, float]:
+        t0 = time.perf_counter()
+        model.predict_proba(X[:n])
+        return n, time.perf_counter() - t0
+
+    model.predict_proba(X)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(call, sizes))
+    wall = time.perf_counter() - t0
+
+    out = {"req/s": len(results) / wall}
+    for kind, pick in (("chico", lambda n: n == 1), ("grande", lambda n: n > 1)):
+        times = np.array([t for n, t in results if pick(n)]) * 1e3
+        if len(times):
+            out[kind] = (np.percentile(times, 50), np.percentile(times, 99))
+    return out
+
+
+def main(args):
+    source = os.path.join(ARTIFACTS_PATH, args.model, "model.ubj")
+    base = ThreadPolicy.from_env()
+    policies = {
+        "off": ThreadPolicy(enabled=False),
+        "auto": base if base.enabled else ThreadPolicy(large_threads=os.cpu_count()),
+    }
+    print(
+        f"cores={os.cpu_count()} concurrency={args.concurrency} "
+        f"requests={args.requests} large={args.large_ratio:.0%}×{args.large_rows}\n"
+    )
+    print(
+        f"{'política':<9} {'req/s':>8} {'chico p50':>10} {'chico p99':>10} "
+        f"{'grande p50':>11} {'grande p99':>11}"
+    )
+    for label, policy in policies.items():
+        model = _load_xgb(source, policy)
+        n_features = len(model.feature_names_in_)
+        r = run_load(model, n_features, args)
+        small = r.get("chico", (float("nan"),) * 2)
+        large = r.get("grande", (float("nan"),) * 2)
+        print(
+            f"{label:<9} {r['req/s']:>8.0f} {small[0]:>10.2f} {small[1]:>10.2f} "
+            f"{large[0]:>11.2f} {large[1]:>11.2f}"
+        )
+    print("\n(latencias en ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p99 con y sin política de threads")
+    parser.add_argument("--model", default="HORSE_P1")
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--large-ratio", type=float, default=0.02)
+    parser.add_argument("--large-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,132 @@
+"""
+bench_validation.py
+===================
+Costo de validar features antes y después de validation.FeatureSchema:
+
+- por request: validate_features original (sets + tres recorridos del dict)
+  vs FeatureSchema.validate (una pasada)
+- por batch: validate_features fila por fila + armado de la matriz vs
+  FeatureSchema.validate_batch (chequeo columnar con NumPy)
+
+No necesita modelos: las features salen de los ejemplos de schemas.py.
+
+Uso:
+    python src/benchmarks/bench_validation.py
+    python src/benchmarks/bench_validation.py --repeat 5000 --batch-sizes 100 1000
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import time
+
+import numpy as np
+from fastapi import HTTPException
+from schemas import HorsePredictRequest, ProdsPredictRequest
+from validation import FeatureSchema
+
+ROUTERS = {"horse": HorsePredictRequest, "prods": ProdsPredictRequest}
+
+
+def legacy_validate_features(features: dict, expected_features):
+    """Copia del validate_features que tenían horse.py y prods.py."""
+    expected = set(expected_features)
+    received = set(features.keys())
+
+    extra = received - expected
+    missing = expected - received
+
+    if extra:
+        raise HTTPException(
+            status_code=422, detail=f"Features no soportadas: {sorted(extra)}"
+        )
+    if missing:
+        raise HTTPException(
+            status_code=422, detail=f"Features faltantes: {sorted(missing)}"
+        )
+
+    nulls = [k for k, v in features.items() if v is None]
+    if nulls:
+        raise HTTPException(
+            status_code=422, detail=f"Features con valor nulo: {sorted(nulls)}"
+        )
+
+    string_errors = [k for k, v in features.items() if isinstance(v, str)]
+    if string_errors:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Features con tipo string no permitido: {sorted(string_errors)}",
+        )
+
+
+def legacy_batch(rows: list[dict], names: tuple) -> np.ndarray:
+    valid = []
+    for features in rows:
+        try:
+            legacy_validate_features(features, names)
+        except HTTPException:
+            continue
+        valid.append(features)
+    X = np.empty((len(valid), len(names)), dtype=np.float32)
+    for i, features in enumerate(valid):
+        X[i] = [features[k] for k in names]
+    return X
+
+
+def bench(fn, repeat: int) -> tuple[float, float]:
+    """Devuelve (p50, p99) en microsegundos."""
+    fn()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - t0
+    return np.percentile(times, 50) * 1e6, np.percentile(times, 99) * 1e6
+
+
+def make_rows(features: dict, n: int, invalid_ratio: float = 0.05) -> list[dict]:
+    rng = np.random.default_rng(0)
+    names = list(features)
+    rows = []
+    for _ in range(n):
+        row = {k: float(rng.random()) for k in names}
+        if rng.random() < invalid_ratio:
+            row[names[rng.integers(len(names))]] = None
+        rows.append(row)
+    return rows
+
+
+def main(repeat: int, batch_sizes: list[int]):
+    print(f"repeat={repeat}\n")
+    print(f"{'router':<7} {'filas':>6} {'camino':<8} {'p50 µs':>10} {'p99 µs':>10}")
+    for router, request in ROUTERS.items():
+        example = request.model_config["json_schema_extra"]["example"]["features"]
+        features = {k: 1 if isinstance(v, str) else v for k, v in example.items()}
+        schema = FeatureSchema(features)
+
+        cases = [
+            (1, lambda: legacy_validate_features(features, schema.names), None),
+            (1, lambda: schema.validate(features), None),
+        ]
+        for n in batch_sizes:
+            rows = make_rows(features, n)
+            cases.append((n, lambda r=rows: legacy_batch(r, schema.names), None))
+            cases.append((n, lambda r=rows: schema.validate_batch(r), None))
+
+        for i, (n, fn, _) in enumerate(cases):
+            path = "antes" if i % 2 == 0 else "después"
+            p50, p99 = bench(fn, repeat if n == 1 else max(repeat // n, 20))
+            print(f"{router:<7} {n:>6} {path:<8} {p50:>10.1f} {p99:>10.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validación original vs schema")
+    parser.add_argument("--repeat", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+
+    main(args.repeat, args.batch_sizes)
@@ -0,0 +1,142 @@
+"""
+bench_workers.py
+================
+Prueba de carga de src/api/serve.py: levanta el servidor con 1, 2, ..., N
+workers y le pega con clientes concurrentes (procesos separados, para que el
+GIL del cliente no sea el cuello de botella) durante un tiempo fijo.
+Reporta throughput y latencias por cantidad de workers.
+
+Cada worker corre con API_THREADS_PER_WORKER threads (1 por defecto), así
+que la escala esperada es ~lineal hasta la cantidad de cores físicos.
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/bench_workers.py
+    python src/benchmarks/bench_workers.py --workers 1 2 4 8 --clients 16 --seconds 15
+    python src/benchmarks/bench_workers.py --endpoint /prods/predict
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import requests
+from schemas import HorsePredictRequest, ProdsPredictRequest
+
+ROOT = Path(__file__).resolve().parents[2]
+EXAMPLES = {
+    "/horse/predict": HorsePredictRequest,
+    "/prods/predict": ProdsPredictRequest,
+}
+
+
+def example_body(endpoint: str) -> dict:
+    example = EXAMPLES[endpoint].model_config["json_schema_extra"]["example"]
+    features = {
+        k: 1 if isinstance(v, str) else v for k, v in example["features"].items()
+    }
+    return {**example, "features": features}
+
+
+def start_server(workers: int, threads: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "API_WORKERS": str(workers),
+        "API_THREADS_PER_WORKER": str(threads),
+        "API_PORT": str(port),
+        "API_HOST": "127.0.0.1",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, str(ROOT / "src" / "api" / "serve.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/models/status"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).ok:
+                return proc
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"El servidor con {workers} workers no levantó")
+
+
+def client_loop(url: str, body: dict, seconds: float) -> tuple[list[float], int]:
+    """Loop cerrado: un request tras otro hasta agotar el tiempo."""
+    session = requests.Session()
+    latencies, errors = [], 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        r = session.post(url, json=body)
+        latencies.append(time.perf_counter() - t0)
+        errors += not r.ok
+    return latencies, errors
+
+
+def run_load(url: str, body: dict, clients: int, seconds: float) -> dict:
+    client_loop(url, body, 1.0)  # warm-up de todos los workers
+    with ProcessPoolExecutor(clients) as pool:
+        futures = [pool.submit(client_loop, url, body, seconds) for _ in range(clients)]
+        results = [f.result() for f in futures]
+    latencies = np.concatenate([r[0] for r in results])
+    return {
+        "rps": len(latencies) / seconds,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1e3,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1e3,
+        "errors": sum(r[1] for r in results),
+    }
+
+
+def main(args):
+    body = example_body(args.endpoint)
+    print(
+        f"cores={os.cpu_count()} clients={args.clients} "
+        f"threads/worker={args.threads} endpoint={args.endpoint}\n"
+    )
+    print(f"{'workers':>7} {'req/s':>9} {'escala':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    base = None
+    for workers in args.workers:
+        proc = start_server(workers, args.threads, args.port)
+        try:
+            url = f"http://127.0.0.1:{args.port}{args.endpoint}"
+            result = run_load(url, body, args.clients, args.seconds)
+        finally:
+            proc.terminate()
+            proc.wait()
+        base = base or result["rps"]
+        print(
+            f"{workers:>7} {result['rps']:>9.0f} {result['rps'] / base:>6.2f}x "
+            f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+            + (f"  errores={result['errors']}" if result["errors"] else "")
+        )
+
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Throughput de la API por workers")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))),
+    )
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=2 * cores)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--endpoint", choices=list(EXAMPLES), default="/horse/predict")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,89 @@
+"""
+parity_recommender.py
+=====================
+Paridad del NumpyRecommender (sin pickle) contra el bundle sklearn
+cloudpickle de model_engine: compara transform_input y kneighbors sobre
+combinaciones de breed/color del vocabulario, palabras desconocidas, nulos
+y precios dentro y fuera del rango de entrenamiento.
+
+Uso (desde la raíz donde está ./models/production, con el bundle .pkl y el
+model pack o los arrays exportados):
+    python src/benchmarks/parity_recommender.py --queries 500
+
+Sale con código 1 si algo difiere más de --atol.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import time
+
+import numpy as np
+from recommender import BundleRecommender, NumpyRecommender
+from utils import load_bundle, load_recommender
+
+
+def sample_queries(vocabulary: list[str], n: int, seed: int = 42) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    words = vocabulary + ["zzz-unknown", "Bay", "PAINT horse"]
+    queries = []
+    for _ in range(n):
+        queries.append(
+            {
+                "breed": str(rng.choice(words)) if rng.random() > 0.05 else None,
+                "color": str(rng.choice(words)) if rng.random() > 0.05 else None,
+                "price": float(rng.choice([0, 1e3, 5e3, 22e3, 1e5, 5e6, -10])),
+            }
+        )
+    return queries
+
+
+def main(n_queries: int, atol: float) -> bool:
+    reference = BundleRecommender(load_bundle("model_engine"))
+    candidate = load_recommender("model_engine")
+    if not isinstance(candidate, NumpyRecommender):
+        print("✗ No hay model pack ni arrays exportados para model_engine")
+        return False
+
+    queries = sample_queries(list(candidate.vocabulary), n_queries)
+
+    diff_x = diff_d = 0.0
+    same_idx = 0
+    t_ref = t_np = 0.0
+    for q in queries:
+        t0 = time.perf_counter()
+        X_ref = reference.transform_input(q)
+        d_ref, i_ref = reference.kneighbors(X_ref)
+        t1 = time.perf_counter()
+        X_np = candidate.transform_input(q)
+        d_np, i_np = candidate.kneighbors(X_np)
+        t2 = time.perf_counter()
+
+        t_ref += t1 - t0
+        t_np += t2 - t1
+        diff_x = max(diff_x, np.abs(X_ref.toarray() - X_np).max())
+        diff_d = max(diff_d, np.abs(d_ref - d_np).max())
+        # Con distancias empatadas el orden puede variar: se comparan conjuntos
+        same_idx += set(i_ref[0]) == set(i_np[0])
+
+    ok = diff_x <= atol and diff_d <= atol
+    print(f"queries               : {n_queries}")
+    print(f"max |Δ| transform     : {diff_x:.2e}")
+    print(f"max |Δ| distancias    : {diff_d:.2e}")
+    print(f"vecinos idénticos     : {same_idx / n_queries:.2%} (resto: empates)")
+    print(f"latencia sklearn      : {t_ref / n_queries * 1e6:.1f} µs/query")
+    print(f"latencia numpy        : {t_np / n_queries * 1e6:.1f} µs/query")
+    print("\n✓ Paridad OK" if ok else f"\n✗ Diferencias mayores a {atol}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paridad recomendador NumPy")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--atol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.queries, args.atol) else 1)
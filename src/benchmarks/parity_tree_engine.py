@@ -0,0 +1,86 @@
+"""
+parity_tree_engine.py
+=====================
+Chequeo de paridad y latencia del backend NumpyForest contra el booster
+nativo para los 4 modelos de la cascada.
+
+Uso (desde la raíz donde está ./models/production):
+    python src/benchmarks/parity_tree_engine.py
+    python src/benchmarks/parity_tree_engine.py --rows 5000 --atol 1e-5
+
+Sale con código 1 si alguna probabilidad difiere más de --atol.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
+
+import argparse
+import time
+
+import numpy as np
+from utils import load_model
+
+MODELS = ["HORSE_P1", "HORSE_P2", "PRODS_P1", "PRODS_P2"]
+
+
+def sample_matrix(forest, n_rows: int, seed: int = 42) -> np.ndarray:
+    """
+    Genera filas que recorren ambas ramas de los splits: cada feature toma
+    valores alrededor de los umbrales reales del modelo, con ~5% de NaN
+    para ejercitar default_left.
+    """
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n_rows, forest.n_features_in_), dtype=np.float32)
+    is_split = forest.left != np.arange(len(forest.left))
+    for f in range(forest.n_features_in_):
+        thr = forest.threshold[is_split & (forest.split_feature == f)]
+        if len(thr):
+            X[:, f] = rng.choice(thr, n_rows) + rng.normal(0, 1, n_rows)
+        else:
+            X[:, f] = rng.normal(0, 1, n_rows)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def timeit(fn, X, repeat: int) -> float:
+    fn(X)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main(n_rows: int, atol: float, repeat: int) -> bool:
+    ok = True
+    print(f"{'modelo':<10} {'max |Δ|':>10} {'xgb 1 fila':>12} {'numpy 1 fila':>13}")
+    for name in MODELS:
+        native = load_model(name, backend="xgboost")
+        forest = load_model(name, backend="numpy")
+
+        X = sample_matrix(forest, n_rows)
+        diff = np.abs(native.predict_proba(X) - forest.predict_proba(X)).max()
+        same_label = (native.predict(X) == forest.predict(X)).mean()
+        ok &= bool(diff <= atol)
+
+        row = X[:1]
+        t_xgb = timeit(native.predict_proba, row, repeat)
+        t_np = timeit(forest.predict_proba, row, repeat)
+        print(
+            f"{name:<10} {diff:>10.2e} {t_xgb:>10.1f}µs {t_np:>11.1f}µs"
+            f"  (labels iguales: {same_label:.2%})"
+        )
+
+    print("\n✓ Paridad OK" if ok else f"\n✗ Diferencias mayores a {atol}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paridad NumpyForest vs XGBoost")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--atol", type=float, default=1e-5)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.rows, args.atol, args.repeat) else 1)
@@ -1,10 +1,112 @@
-from typing import Tuple
+import math
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Iterable, Tuple
 
+import numpy as np
 import pandas as pd
 from scipy.sparse import csr_matrix, hstack
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import MinMaxScaler
 
+TEXT_CACHE_SIZE = 4096
+
+
+class TextRowCache:
+    """
+    Bounded LRU of TF-IDF rows keyed by the normalized "breed color" string.
+
+    The breed × color space is small, so after warm-up almost every request
+    skips TfidfVectorizer.transform. Misses in a batch are transformed
+    together in a single call. One cache per fitted vectorizer lives in a
+    module-level registry, so the estimator itself is never modified.
+    """
+
+    def __init__(self, tfidf: TfidfVectorizer, maxsize: int = TEXT_CACHE_SIZE):
+        # Weak: the registry keys on the vectorizer, a strong ref would pin it
+        self._tfidf = weakref.ref(tfidf)
+        self.maxsize = maxsize
+        self.n_features = len(tfidf.vocabulary_)
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_vectorizer(cls, tfidf: TfidfVectorizer) -> "TextRowCache":
+        """Cache of the fitted vectorizer (created on first use)."""
+        return _CACHES.get(tfidf, cls)
+
+    def _get(self, text: str):
+        with self._lock:
+            row = self._rows.get(text)
+            if row is not None:
+                self._rows.move_to_end(text)
+            return row
+
+    def _put(self, text: str, row: Tuple[np.ndarray, np.ndarray]):
+        with self._lock:
+            self._rows[text] = row
+            while len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+
+    def transform(self, texts: Iterable[str]) -> csr_matrix:
+        """Same output as tfidf.transform(texts) for already-normalized texts."""
+        texts = list(texts)
+        rows = [self._get(t) for t in texts]
+
+        missing = list(dict.fromkeys(t for t, r in zip(texts, rows) if r is None))
+        if missing:
+            fresh = self._tfidf().transform(missing).tocsr()
+            computed = {}
+            for i, text in enumerate(missing):
+                start, end = fresh.indptr[i], fresh.indptr[i + 1]
+                computed[text] = (fresh.indices[start:end], fresh.data[start:end])
+                self._put(text, computed[text])
+            rows = [r if r is not None else computed[t] for t, r in zip(texts, rows)]
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(idx) for idx, _ in rows], out=indptr[1:])
+        if rows:
+            indices = np.concatenate([idx for idx, _ in rows])
+            data = np.concatenate([val for _, val in rows])
+        else:
+            indices, data = np.empty(0, np.int32), np.empty(0)
+        return csr_matrix((data, indices, indptr), shape=(len(rows), self.n_features))
+
+
+class _CacheRegistry:
+    """
+    TextRowCache per vectorizer, weakly keyed so it goes away with the
+    estimator. Pickles as an empty registry: the bundle serializes this
+    module by value, and the memo must not travel with it.
+    """
+
+    def __init__(self):
+        self._caches = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, tfidf: TfidfVectorizer, factory=TextRowCache) -> TextRowCache:
+        with self._lock:
+            cache = self._caches.get(tfidf)
+            if cache is None:
+                cache = self._caches[tfidf] = factory(tfidf)
+            return cache
+
+    def __reduce__(self):
+        return (_CacheRegistry, ())
+
+
+_CACHES = _CacheRegistry()
+
+
+def scale_price(price, scaler: MinMaxScaler) -> np.ndarray:
+    """MinMaxScaler.transform on one price column, without a DataFrame."""
+    scaled = np.asarray(price, dtype=np.float64).reshape(-1, 1) * scaler.scale_
+    scaled += scaler.min_
+    if scaler.clip:
+        np.clip(scaled, *scaler.feature_range, out=scaled)
+    return scaled
+
 
 def build_features(
     df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42
@@ -61,20 +163,35 @@ def transform_input(
         distances, indices = artifacts["model"].kneighbors(X)
     """
     if isinstance(data, dict):
-        df = pd.DataFrame([data])
+        row = {str(k).lower().strip(): v for k, v in data.items()}
+        texts = [f"{_fill_text(row['breed'])} {_fill_text(row['color'])}".lower()]
+        prices = [_to_price(row["price"])]
     else:
-        df = data.copy()
+        df = data.rename(columns=lambda c: str(c).lower().strip())
+        # Text features — same logic as training
+        texts = (
+            df["breed"].fillna("desconocido") + " " + df["color"].fillna("desconocido")
+        ).str.lower()
+        prices = pd.to_numeric(df["price"], errors="coerce").fillna(0)
 
-    df.columns = [c.lower().strip() for c in df.columns]
+    # TF-IDF rows come from the memo; only the price column is computed per call
+    matrix_text = TextRowCache.for_vectorizer(tfidf).transform(texts)
+    price_scaled = scale_price(prices, scaler)  # transform, NOT fit_transform
 
-    # Text features — same logic as training
-    df["caracteristicas"] = (
-        df["breed"].fillna("desconocido") + " " + df["color"].fillna("desconocido")
-    ).str.lower()
-    matrix_text = tfidf.transform(df["caracteristicas"])  # transform, NOT fit_transform
+    return hstack([matrix_text, price_scaled]).tocsr()
 
-    # Numeric features — same logic as training
-    df["price"] = pd.to_numeric(df["price"], errors="coerce").fillna(0)
-    price_scaled = scaler.transform(df[["price"]])  # transform, NOT fit_transform
 
-    return hstack([matrix_text, price_scaled]).tocsr()
+def _fill_text(value) -> str:
+    # Same as .fillna("desconocido"): only None / NaN are replaced
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "desconocido"
+    return value
+
+
+def _to_price(value) -> float:
+    # Same as pd.to_numeric(errors="coerce").fillna(0)
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(price) else price
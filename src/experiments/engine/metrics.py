@@ -1,12 +1,18 @@
-from typing import Dict
+import time
+from typing import Dict, Sequence
 
 from scipy.sparse import csr_matrix
+from sklearn.neighbors import NearestNeighbors
+
+PROBE_SWEEP = (1, 2, 4, 8, 16, 32)
 
 
 def evaluate(model, X_val: csr_matrix, y_val=None) -> Dict[str, float]:
     """
     Evaluate KNN recommender reliability.
     Excludes first neighbor (self-match) when evaluating on training data.
+    For approximate backends (with `n_probe`), also adds the recall@k vs
+    latency report from `recall_latency_report`.
     """
 
     distancias, _ = model.kneighbors(X_val)
@@ -15,7 +21,42 @@ def evaluate(model, X_val: csr_matrix, y_val=None) -> Dict[str, float]:
     avg_distance = distancias[:, 1:].mean()
     reliability = (1 - avg_distance) * 100
 
-    return {
+    metrics = {
         "avg_cosine_distance": avg_distance,
         "model_reliability_score": reliability,
     }
+    if hasattr(model, "n_probe"):
+        metrics.update(recall_latency_report(model, X_val))
+    return metrics
+
+
+def recall_latency_report(
+    model, X_val: csr_matrix, probes: Sequence[int] = PROBE_SWEEP
+) -> Dict[str, float]:
+    """
+    recall@k and per-query latency of an approximate index for each n_probe,
+    against exact brute-force cosine KNN over the same fit matrix.
+    Tie-aware recall@k: an approximate neighbor is a hit when it is no farther
+    than the exact k-th neighbor (duplicated breed/color/price listings make
+    many items equidistant, so comparing index sets would undercount).
+    """
+    k = model.n_neighbors
+    exact = NearestNeighbors(n_neighbors=k, metric="cosine", algorithm="brute")
+    exact.fit(model._fit_X)
+
+    t0 = time.perf_counter()
+    true_dist, _ = exact.kneighbors(X_val)
+    brute_ms = (time.perf_counter() - t0) / X_val.shape[0] * 1e3
+    # float32 slack: the IVF index ranks normalized float32 vectors
+    kth = true_dist[:, -1:] + 1e-6
+
+    report = {"latency_ms_brute": brute_ms}
+    for n_probe in probes:
+        if n_probe > model.n_lists_:
+            break
+        t0 = time.perf_counter()
+        approx_dist, _ = model.kneighbors(X_val, n_probe=n_probe)
+        latency_ms = (time.perf_counter() - t0) / X_val.shape[0] * 1e3
+        report[f"recall_at_{k}_nprobe_{n_probe}"] = float((approx_dist <= kth).mean())
+        report[f"latency_ms_nprobe_{n_probe}"] = latency_ms
+    return report
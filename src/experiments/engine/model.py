@@ -1,16 +1,122 @@
-from typing import Any
+from typing import Any, Dict, Tuple
 
+import numpy as np
+from ann import IVFIndex
 from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import MinMaxScaler
 
+BACKENDS = ("brute", "ivf")
 
-def train_model(X_train: csr_matrix, y_train=None, random_state: int = 42) -> Any:
+# TfidfVectorizer settings the NumPy reader (src/api/recommender.py) only
+# implements with these values; export_arrays refuses anything else
+SUPPORTED_TFIDF = {
+    "analyzer": "word",
+    "ngram_range": (1, 1),
+    "stop_words": None,
+    "strip_accents": None,
+    "preprocessor": None,
+    "tokenizer": None,
+}
+
+
+def train_model(
+    X_train: csr_matrix,
+    y_train=None,
+    random_state: int = 42,
+    backend: str = "brute",
+    **ann_params,
+) -> Any:
     """
     Train and return a KNN model with cosine similarity over sparse feature matrix.
     y_train is unused (unsupervised), kept for API consistency.
+
+    backend:
+        - "brute": exact sklearn NearestNeighbors, O(N) per query
+        - "ivf":   approximate IVFIndex (ann.py); ann_params go to its
+                   constructor (n_lists, n_probe, n_iter)
     """
 
-    model = NearestNeighbors(n_neighbors=5, metric="cosine", algorithm="brute")
+    if backend == "brute":
+        model = NearestNeighbors(n_neighbors=5, metric="cosine", algorithm="brute")
+    elif backend == "ivf":
+        model = IVFIndex(n_neighbors=5, random_state=random_state, **ann_params)
+    else:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
     model.fit(X_train)
 
     return model
+
+
+def export_arrays(
+    model: NearestNeighbors | IVFIndex,
+    tfidf: TfidfVectorizer,
+    scaler: MinMaxScaler,
+    dataset_sha256: str | None = None,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Export the fitted recommender as plain arrays + JSON metadata, so the API
+    can rebuild transform_input and kneighbors in NumPy without unpickling
+    sklearn objects (see src/api/recommender.py for the reader).
+    With the "ivf" backend the inverted lists (centroids, list offsets, list
+    item ids) and n_probe are exported too, and the API probes them instead
+    of scanning every item.
+
+    dataset_sha256 is the SHA-256 of the training parquet. Neighbor indices
+    are row positions into that dataset, so the API refuses to join them
+    against a listings table with a different digest (or fewer than n_items
+    rows).
+
+    Raises ValueError if the vectorizer uses a setting in SUPPORTED_TFIDF
+    that the reader does not implement, instead of exporting vectors that
+    would silently diverge from the sklearn pipeline.
+    """
+    unsupported = {
+        key: getattr(tfidf, key)
+        for key, value in SUPPORTED_TFIDF.items()
+        if getattr(tfidf, key) != value
+    }
+    if unsupported:
+        raise ValueError(
+            f"TfidfVectorizer settings not supported by the API reader: {unsupported}"
+        )
+
+    items = csr_matrix(model._fit_X)
+    arrays = {
+        "idf": tfidf.idf_,
+        "scaler_min": scaler.min_,
+        "scaler_scale": scaler.scale_,
+        "items_data": items.data,
+        "items_indices": items.indices,
+        "items_indptr": items.indptr,
+    }
+    meta = {
+        "vocabulary": sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get),
+        "token_pattern": tfidf.token_pattern,
+        "lowercase": tfidf.lowercase,
+        "analyzer": tfidf.analyzer,
+        "ngram_range": list(tfidf.ngram_range),
+        "stop_words": tfidf.stop_words,
+        "strip_accents": tfidf.strip_accents,
+        "norm": tfidf.norm,
+        "use_idf": tfidf.use_idf,
+        "binary": tfidf.binary,
+        "sublinear_tf": tfidf.sublinear_tf,
+        "scaler_clip": bool(scaler.clip),
+        "scaler_feature_range": [float(v) for v in scaler.feature_range],
+        "n_items": items.shape[0],
+        "dataset_sha256": dataset_sha256,
+        "n_features": items.shape[1],
+        "n_neighbors": model.n_neighbors,
+        "metric": model.metric,
+        "knn_backend": "brute",
+    }
+    if isinstance(model, IVFIndex):
+        arrays.update(
+            ivf_centroids=model.centroids_,
+            ivf_list_offsets=model.list_offsets_,
+            ivf_list_items=model.list_items_,
+        )
+        meta.update(knn_backend="ivf", n_probe=model.n_probe)
+    return arrays, meta
@@ -1,4 +1,6 @@
+import hashlib
 import io
+import json
 import sys
 import tempfile
 from pathlib import Path
@@ -8,14 +10,15 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 import datetime
 import platform
 
+import ann
 import cloudpickle
+import features
 import mlflow
 import numpy as np
 import pandas as pd
 from features import build_features
 from metrics import evaluate
-from model import train_model
-from scipy.sparse import hstack
+from model import export_arrays, train_model
 
 from misc.config import MLFLOW_EXPERIMENT_ENGINE_NAME, SEED, init_mlflow, start_run
 from misc.utils import load_dataset, log_dataset_metadata
@@ -30,21 +33,26 @@ RUN_NAME = f"knn_cosine_recommender_{datetime.datetime.now():%Y%m%d_%H%M%S}"
 DS_NAME = "Daisy Quinteros Silva"
 STAGE = "training"
 
+# "brute" (exacto) o "ivf" (aproximado, ver ann.py) + sus parámetros
+KNN_BACKEND = "brute"
+ANN_PARAMS = {"n_probe": 8}
+
+# El índice IVF y el código de TextRowCache viajan dentro del bundle: se
+# serializan por valor para que la API los deserialice sin tener `ann` ni
+# `features` (el memo en sí no se serializa, queda fuera del vectorizador)
+cloudpickle.register_pickle_by_value(ann)
+cloudpickle.register_pickle_by_value(features)
+
 
 def transform_input(data, tfidf, scaler):
     """
-    Definida inline en train.py para que cloudpickle serialice el bytecode
-    sin referenciar el módulo `features`, que no existe en el contenedor API.
+    Función que viaja en el bundle como `transform_fn`. Delega en
+    features.transform_input, que se serializa por valor junto con el bundle:
+    las filas TF-IDF salen de TextRowCache (memo acotado por "breed color"
+    normalizado) y por request solo se calcula el precio. Acepta un dict o un
+    DataFrame.
     """
-    df = pd.DataFrame([data]) if isinstance(data, dict) else data.copy()
-    df.columns = [c.lower().strip() for c in df.columns]
-    df["caracteristicas"] = (
-        df["breed"].fillna("desconocido") + " " + df["color"].fillna("desconocido")
-    ).str.lower()
-    matrix_text = tfidf.transform(df["caracteristicas"])
-    df["price"] = pd.to_numeric(df["price"], errors="coerce").fillna(0)
-    price_scaled = scaler.transform(df[["price"]])
-    return hstack([matrix_text, price_scaled]).tocsr()
+    return features.transform_input(data, tfidf, scaler)
 
 
 def main():
@@ -65,7 +73,10 @@ def main():
         # =====================
         # Train
         # =====================
-        model = train_model(X_train, y_train, random_state=SEED)
+        ann_params = ANN_PARAMS if KNN_BACKEND != "brute" else {}
+        model = train_model(
+            X_train, y_train, random_state=SEED, backend=KNN_BACKEND, **ann_params
+        )
 
         # =====================
         # Evaluate
@@ -101,6 +112,9 @@ def main():
         # =====================
         mlflow.log_param("model_type", model.__class__.__name__)
         mlflow.log_param("metric", "cosine")
+        mlflow.log_param("knn_backend", KNN_BACKEND)
+        for k, v in ann_params.items():
+            mlflow.log_param(f"ann_{k}", v)
         mlflow.log_param("n_neighbors", 5)
         mlflow.log_param("features_used", "price, breed, color")
         mlflow.log_param("vectorizer_type", "TfidfVectorizer")
@@ -173,7 +187,27 @@ def main():
             bundle_path.unlink(missing_ok=True)
             tmp_dir.rmdir()
 
-        # 3. Input example como CSV en memoria
+        # 3. Arrays NumPy + metadata JSON: la API los carga sin pickle
+        # Con el SHA-256 del parquet: la API verifica que su tabla de
+        # listings sea este mismo dataset (los vecinos son filas de él)
+        dataset_sha256 = hashlib.sha256(
+            (PATH_DATA / DATASET_NAME).read_bytes()
+        ).hexdigest()
+        arrays, meta = export_arrays(model, tfidf, scaler, dataset_sha256)
+        tmp_dir = Path(tempfile.mkdtemp())
+        arrays_path = tmp_dir / "recommender_arrays.npz"
+        meta_path = tmp_dir / "recommender_meta.json"
+        try:
+            np.savez(arrays_path, **arrays)
+            meta_path.write_text(json.dumps(meta))
+            mlflow.log_artifact(str(arrays_path), artifact_path="artifacts_bundle")
+            mlflow.log_artifact(str(meta_path), artifact_path="artifacts_bundle")
+        finally:
+            arrays_path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            tmp_dir.rmdir()
+
+        # 4. Input example como CSV en memoria
         csv_buffer = io.StringIO()
         input_example.to_csv(csv_buffer, index=False)
         mlflow.log_text(
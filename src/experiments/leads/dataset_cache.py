@@ -0,0 +1,188 @@
+"""
+dataset_cache.py
+================
+Cache direccionado por contenido de los datasets de build_datasets().
+
+La clave es un SHA-256 de:
+  - el contenido del archivo de entrada (parquet o csv)
+  - COLS_TARGET_ENCODE, COLS_USER, COLS_HORSE, COLS_PRODS y COLS_CAPPING_FIJAS
+  - el código fuente de features.py y preprocessor.py (build_datasets y el
+    capping): cualquier cambio en el split, la semilla o el capping invalida
+    el cache sin tener que acordarse de nada
+  - CACHE_VERSION (para forzar una invalidación por otros motivos, p. ej. un
+    cambio de versión de pandas / category_encoders)
+
+Cada entrada es un directorio <cache_dir>/<clave>/ con:
+  - <nombre>.parquet  X_train_horse, X_test_horse, X_train_prods,
+                      X_test_prods, y_train, y_test
+  - <nombre>.npy      mask_p2_horse, mask_p2_prods (filas de y_train que no
+                      son Lead Bronce; X_p2h_raw / X_p2p_raw se recortan al
+                      cargar)
+  - artifacts.pkl     TargetEncoder, límites de capping y columnas
+
+El hash del archivo de entrada se memoiza por (ruta, tamaño, mtime) en
+<cache_dir>/digests.json, así un hit no vuelve a leer el dataset completo.
+
+Uso:
+    datasets = load_datasets("../../data/clean/df_final.parquet")
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import features
+import numpy as np
+import pandas as pd
+import preprocessor
+from features import (
+    COLS_CAPPING_FIJAS,
+    COLS_HORSE,
+    COLS_PRODS,
+    COLS_TARGET_ENCODE,
+    COLS_USER,
+    build_datasets,
+)
+
+CACHE_VERSION = 1
+DATASET_CACHE_DIR = os.getenv("LEADS_DATASET_CACHE", "../../data/cache/leads")
+
+FRAMES = [
+    "X_train_horse",
+    "X_test_horse",
+    "X_train_prods",
+    "X_test_prods",
+    "y_train",
+    "y_test",
+]
+MASKS = ["mask_p2_horse", "mask_p2_prods"]
+ARTIFACTS = ["te", "limites_capping", "cols_horse", "cols_prods"]
+
+
+# ── Clave ─────────────────────────────────────────────────────────────────────
+
+
+def file_digest(path: str, cache_dir: str | None = None) -> str:
+    """SHA-256 del archivo, memoizado por (tamaño, mtime) si hay cache_dir."""
+    st = os.stat(path)
+    stamp = f"{st.st_size}:{st.st_mtime_ns}"
+    index_path = os.path.join(cache_dir, "digests.json") if cache_dir else None
+    index = {}
+    if index_path and os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        entry = index.get(os.path.abspath(path))
+        if entry and entry["stamp"] == stamp:
+            return entry["sha256"]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    if index_path:
+        index[os.path.abspath(path)] = {"stamp": stamp, "sha256": digest}
+        _write_atomic(index_path, json.dumps(index, indent=1).encode())
+    return digest
+
+
+def code_digest() -> str:
+    """SHA-256 del código que arma los datasets (features.py + preprocessor.py)."""
+    h = hashlib.sha256()
+    for module in (features, preprocessor):
+        h.update(inspect.getsource(module).encode())
+    return h.hexdigest()
+
+
+def cache_key(data_digest: str) -> str:
+    spec = {
+        "version": CACHE_VERSION,
+        "data": data_digest,
+        "code": code_digest(),
+        "cols_target_encode": COLS_TARGET_ENCODE,
+        "cols_user": COLS_USER,
+        "cols_horse": COLS_HORSE,
+        "cols_prods": COLS_PRODS,
+        "cols_capping_fijas": COLS_CAPPING_FIJAS,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:32]
+
+
+# ── Lectura / escritura ───────────────────────────────────────────────────────
+
+
+def _write_atomic(path: str, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def save_entry(entry_dir: str, datasets: dict, masks: dict):
+    """Escribe en un directorio temporal y lo renombra al final (atómico)."""
+    parent = os.path.dirname(entry_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        for name in FRAMES:
+            datasets[name].to_parquet(os.path.join(tmp, f"{name}.parquet"))
+        for name in MASKS:
+            np.save(os.path.join(tmp, f"{name}.npy"), masks[name])
+        with open(os.path.join(tmp, "artifacts.pkl"), "wb") as f:
+            pickle.dump({k: datasets[k] for k in ARTIFACTS}, f)
+        os.rename(tmp, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # Otro proceso escribió la misma entrada primero: sirve igual
+        if not os.path.isdir(entry_dir):
+            raise
+
+
+def load_entry(entry_dir: str) -> dict:
+    datasets = {
+        name: pd.read_parquet(os.path.join(entry_dir, f"{name}.parquet"))
+        for name in FRAMES
+    }
+    mask_h, mask_p = (np.load(os.path.join(entry_dir, f"{n}.npy")) for n in MASKS)
+    with open(os.path.join(entry_dir, "artifacts.pkl"), "rb") as f:
+        datasets.update(pickle.load(f))
+    datasets["X_p2h_raw"] = datasets["X_train_horse"][mask_h]
+    datasets["X_p2p_raw"] = datasets["X_train_prods"][mask_p]
+    return datasets
+
+
+def read_input(data_path: str) -> pd.DataFrame:
+    if data_path.endswith(".parquet"):
+        return pd.read_parquet(data_path)
+    return pd.read_csv(data_path)
+
+
+def load_datasets(data_path: str, cache_dir: str | None = DATASET_CACHE_DIR) -> dict:
+    """
+    Mismo dict que build_datasets(read_input(data_path)). Con cache_dir lo
+    busca en el cache y solo recalcula (y guarda) si cambió alguna entrada
+    de la clave. cache_dir=None o "" desactiva el cache.
+    """
+    if not cache_dir:
+        return build_datasets(read_input(data_path))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_dir = os.path.join(cache_dir, cache_key(file_digest(data_path, cache_dir)))
+    if os.path.isdir(entry_dir):
+        print(f"      cache hit: {entry_dir}")
+        return load_entry(entry_dir)
+
+    print(f"      cache miss: {entry_dir}")
+    datasets = build_datasets(read_input(data_path))
+    y_train = datasets["y_train"]
+    masks = {
+        "mask_p2_horse": (y_train["horse_target"] != "Lead Bronce").to_numpy(),
+        "mask_p2_prods": (y_train["prods_target"] != "Lead Bronce").to_numpy(),
+    }
+    save_entry(entry_dir, datasets, masks)
+    return datasets
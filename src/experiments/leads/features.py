@@ -8,10 +8,14 @@ Campeón: XGB Tuneado v1 (27 features horse, 22 features prods)
   — El XGB v2 reducido fue descartado: Δ F2 Oro horse = -0.0478 (< umbral -0.01)
 """
 
+import os
 import pickle
+import warnings
 
+import numpy as np
 import pandas as pd
 from category_encoders import TargetEncoder
+from preprocessor import LeadPreprocessor
 from sklearn.model_selection import train_test_split
 
 # ── 1. Columnas con Target Encoding ──────────────────────────────────────────
@@ -127,23 +131,101 @@ COLS_PRODS = [
 COLS_CAPPING_FIJAS = ["max_horse_price_viewed", "viewed_sport_elite"]
 
 
+class CappingTransformer:
+    """
+    Capping P99 vectorizado. fit() calcula los P99 y máximos de todo el
+    bloque numérico en una pasada (np.nanquantile / np.nanmax por eje) y
+    transform() recorta todas las columnas con un solo np.minimum con
+    broadcasting. Los límites son dos arrays paralelos (columns, limits), así
+    se serializan sin pickle (to_arrays / capping.npz) y se usan en
+    inferencia sin importar este módulo.
+    """
+
+    def __init__(self, columns, limits):
+        self.columns = np.asarray(columns, dtype=str)
+        self.limits = np.asarray(limits, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, X_train: pd.DataFrame, ratio: float = 2.0) -> "CappingTransformer":
+        """
+        P99 sobre X_train (solo datos de train, no leakage). Se recortan las
+        columnas de COLS_CAPPING_FIJAS y las numéricas con P99 > 0 y
+        max / P99 > ratio.
+        """
+        numeric = X_train.select_dtypes(include="number")
+        block = numeric.to_numpy(dtype=np.float64)
+        with warnings.catch_warnings():
+            # Columnas todo NaN: P99 NaN, quedan fuera igual que con pandas
+            warnings.simplefilter("ignore", RuntimeWarning)
+            p99 = np.nanquantile(block, 0.99, axis=0)
+            maxs = np.nanmax(block, axis=0)
+
+        auto = np.zeros(len(p99), dtype=bool)
+        positive = p99 > 0
+        auto[positive] = maxs[positive] / p99[positive] > ratio
+        keep = auto | numeric.columns.isin(COLS_CAPPING_FIJAS)
+        return cls(numeric.columns[keep], p99[keep])
+
+    @classmethod
+    def from_dict(cls, limites) -> "CappingTransformer":
+        if isinstance(limites, cls):
+            return limites
+        return cls(list(limites), list(limites.values()))
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "CappingTransformer":
+        return cls(arrays["columns"], arrays["limits"])
+
+    def to_dict(self) -> dict:
+        return dict(zip(self.columns.tolist(), self.limits.tolist()))
+
+    def to_arrays(self) -> dict:
+        return {"columns": self.columns, "limits": self.limits}
+
+    def upper_bounds(self, columns) -> np.ndarray:
+        """Límite por columna en el orden de `columns` (inf si no se recorta)."""
+        upper = np.full(len(columns), np.inf)
+        position = {c: i for i, c in enumerate(columns)}
+        for col, lim in zip(self.columns, self.limits):
+            if col in position:
+                upper[position[col]] = lim
+        return upper
+
+    def clip_array(self, A: np.ndarray, columns) -> np.ndarray:
+        """Recorta in place una matriz cuyas columnas son `columns`."""
+        return np.minimum(A, self.upper_bounds(columns), out=A)
+
+    def transform(self, X: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+        """
+        Columnas float: un np.minimum sobre el bloque y una sola asignación.
+        Las enteras pasan por Series.clip para conservar el dtype que daba
+        apply_capping. Con copy=True alcanza una copia superficial: las
+        columnas recortadas se reemplazan, nunca se escriben in place.
+        """
+        if copy:
+            X = X.copy(deep=False)
+        present = np.isin(self.columns, X.columns)
+        cols, limits = self.columns[present].tolist(), self.limits[present]
+        is_float = np.array([X[c].dtype.kind == "f" for c in cols], dtype=bool)
+
+        floats = [c for c, f in zip(cols, is_float) if f]
+        if floats:
+            # np.minimum conserva NaN, igual que Series.clip
+            X[floats] = np.minimum(X[floats].to_numpy(), limits[is_float])
+        for col, lim in zip(cols, limits):
+            if X[col].dtype.kind != "f":
+                X[col] = X[col].clip(upper=lim)
+        return X
+
+
 def compute_capping_limits(X_train: pd.DataFrame) -> dict:
     """Calcula límites P99 sobre X_train. Solo usar datos de train (no leakage)."""
-    cols_auto = [
-        col
-        for col in X_train.select_dtypes(include="number").columns
-        if (p99 := X_train[col].quantile(0.99)) > 0 and X_train[col].max() / p99 > 2
-    ]
-    cols = list(set(COLS_CAPPING_FIJAS + cols_auto))
-    return {col: X_train[col].quantile(0.99) for col in cols if col in X_train.columns}
+    return CappingTransformer.fit(X_train).to_dict()
 
 
-def apply_capping(X: pd.DataFrame, limites: dict) -> pd.DataFrame:
-    X = X.copy()
-    for col, lim in limites.items():
-        if col in X.columns:
-            X[col] = X[col].clip(upper=lim)
-    return X
+def apply_capping(X: pd.DataFrame, limites) -> pd.DataFrame:
+    """Recorta con un dict {col: límite} o un CappingTransformer."""
+    return CappingTransformer.from_dict(limites).transform(X)
 
 
 # ── 5. Pipeline completo ──────────────────────────────────────────────────────
@@ -164,9 +246,11 @@ def build_datasets(df_final: pd.DataFrame) -> dict:
     X_train[cols_te] = te.fit_transform(X_train[cols_te], target_ord)
     X_test[cols_te] = te.transform(X_test[cols_te])
 
-    limites_capping = compute_capping_limits(X_train)
-    X_train = apply_capping(X_train, limites_capping)
-    X_test = apply_capping(X_test, limites_capping)
+    capping = CappingTransformer.fit(X_train)
+    # X_train / X_test ya son copias del split: se recortan sin otra copia
+    X_train = capping.transform(X_train, copy=False)
+    X_test = capping.transform(X_test, copy=False)
+    limites_capping = capping.to_dict()
 
     cols_user = [c for c in COLS_USER if c in X_train.columns]
     cols_horse = [c for c in COLS_HORSE if c in X_train.columns]
@@ -204,8 +288,6 @@ def build_datasets(df_final: pd.DataFrame) -> dict:
 def save_preprocessing_artifacts(
     outdir: str, te, limites_capping: dict, cols_horse: list, cols_prods: list
 ):
-    import os
-
     os.makedirs(outdir, exist_ok=True)
     artifacts = {
         "target_encoder.pkl": te,
@@ -218,6 +300,16 @@ def save_preprocessing_artifacts(
         path = os.path.join(outdir, fname)
         with open(path, "wb") as f:
             pickle.dump(obj, f)
+    # Mismos límites como arrays planos, para inferencia sin pickle
+    np.savez(
+        os.path.join(outdir, "capping.npz"),
+        **CappingTransformer.from_dict(limites_capping).to_arrays(),
+    )
+    # TE + capping + orden de columnas fusionados, uno por dominio
+    for domain, cols in (("horse", cols_horse), ("prods", cols_prods)):
+        LeadPreprocessor.from_fitted(te, limites_capping, cols).save(
+            os.path.join(outdir, f"preprocessor_{domain}.npz")
+        )
 
 
 def load_preprocessing_artifacts(outdir: str) -> dict:
@@ -232,4 +324,9 @@ def load_preprocessing_artifacts(outdir: str) -> dict:
     for key in keys:
         with open(f"{outdir}/{key}.pkl", "rb") as f:
             result[key] = pickle.load(f)
+    result["capping"] = CappingTransformer.from_dict(result["limites_capping"])
+    for domain in ("horse", "prods"):
+        path = f"{outdir}/preprocessor_{domain}.npz"
+        if os.path.exists(path):
+            result[f"preprocessor_{domain}"] = LeadPreprocessor.load(path)
     return result
@@ -0,0 +1,231 @@
+"""
+preprocessor.py
+===============
+Preprocesamiento fusionado de leads: Target Encoding + capping + orden de
+columnas en una sola pasada que escribe directo en la matriz de salida.
+
+Reemplaza en inferencia la cadena de build_datasets / preprocess_horse
+(TargetEncoder.transform → apply_capping → selección de columnas), que copia
+el DataFrame en cada paso. Se arma en entrenamiento a partir del
+TargetEncoder ya ajustado y los límites de capping, y se guarda como arrays
+planos (preprocessor_<dominio>.npz, sin pickle) junto a los modelos. Solo
+depende de numpy y pandas: cargarlo no requiere category_encoders.
+
+transform() (DataFrame) y transform_array() (matriz NumPy 2D, sin armar un
+DataFrame) reservan una sola matriz (n_filas × n_columnas, en orden de
+columnas del modelo), o escriben en `out` si se pasa, y la llenan columna
+por columna:
+  - columnas con Target Encoding: lookup categoría → valor con un índice
+    hash (pd.Index.get_indexer) y np.take sobre la tabla de valores. Las
+    categorías se comparan como str, normalizadas igual al armar el
+    preprocesador y al transformar (_category_keys), así las columnas int,
+    bool o float matchean con las categorías guardadas
+  - columnas numéricas: copia directa
+  - columnas faltantes: fill_value
+Al final aplica el capping con un np.minimum in place contra el vector de
+límites (inf donde no se recorta).
+
+Uso:
+    pre = LeadPreprocessor.from_fitted(te, limites_capping, cols_horse)
+    pre.save("models/champion/preprocessor_horse.npz")
+
+    pre = LeadPreprocessor.load("models/champion/preprocessor_horse.npz")
+    X = pre.transform(df_raw)            # np.ndarray float64
+    X = pre.transform_frame(df_raw)      # DataFrame con cols_horse
+    X = pre.transform_array(M, columns)  # desde una matriz 2D (dtype object
+                                         # si trae categorías str)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _category_keys(values) -> np.ndarray:
+    """
+    Categorías como str, con la misma normalización en el fit y en
+    transform. Los floats enteros se escriben sin decimales (1.0 → "1"), igual
+    que el int que suele haber en el fit: una columna int que llega como
+    float por tener NaN sigue matcheando.
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind != "f":
+        return arr.astype(str)
+    keys = arr.astype(str).astype(object)
+    whole = np.isfinite(arr) & (arr == np.round(arr))
+    keys[whole] = arr[whole].astype(np.int64).astype(str)
+    return keys.astype(str)
+
+
+def _as_float(values) -> np.ndarray:
+    """Columna numérica como float64 (None / pd.NA → NaN)."""
+    if isinstance(values, np.ndarray) and values.dtype.kind in "biuf":
+        return values.astype(np.float64, copy=False)
+    return pd.Series(values).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class LeadPreprocessor:
+    def __init__(
+        self,
+        columns,
+        upper,
+        te_columns,
+        te_categories: list,
+        te_values: list,
+        te_unknown,
+        te_missing,
+        fill_value: float = 0.0,
+    ):
+        self.columns = np.asarray(columns, dtype=str)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.te_columns = np.asarray(te_columns, dtype=str)
+        self.te_unknown = np.asarray(te_unknown, dtype=np.float64)
+        self.te_missing = np.asarray(te_missing, dtype=np.float64)
+        self.fill_value = float(fill_value)
+
+        # Por columna TE: índice hash de categorías y tabla de valores con el
+        # valor de "desconocida" al final (get_indexer devuelve -1)
+        self._te = {}
+        for i, col in enumerate(self.te_columns.tolist()):
+            index = pd.Index(_category_keys(te_categories[i]), dtype=object)
+            table = np.append(
+                np.asarray(te_values[i], dtype=np.float64), self.te_unknown[i]
+            )
+            self._te[col] = (index, table, self.te_missing[i])
+
+    # ── Construcción ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_fitted(cls, te, limites_capping: dict, columns: list):
+        """
+        A partir de un category_encoders.TargetEncoder ajustado, los límites
+        de capping ({col: límite}) y las columnas de entrada del modelo.
+        """
+        ordinal = {m["col"]: m["mapping"] for m in te.ordinal_encoder.mapping}
+        te_columns, categories, values, unknown, missing = [], [], [], [], []
+        for col in te.cols:
+            if col not in columns:
+                continue
+            codes = ordinal[col]
+            encoded = te.mapping[col]
+            is_nan = codes.index.isna()
+            te_columns.append(col)
+            categories.append(_category_keys(codes.index[~is_nan]))
+            values.append(encoded.loc[codes[~is_nan].to_numpy()].to_numpy())
+            unknown.append(encoded.loc[-1])
+            # NaN visto en el fit tiene su propio código; si no, va a -2
+            missing.append(encoded.loc[codes[is_nan].iloc[0] if is_nan.any() else -2])
+
+        upper = np.full(len(columns), np.inf)
+        position = {c: i for i, c in enumerate(columns)}
+        for col, lim in limites_capping.items():
+            if col in position:
+                upper[position[col]] = lim
+        return cls(columns, upper, te_columns, categories, values, unknown, missing)
+
+    # ── Serialización (arrays planos) ─────────────────────────────────────────
+
+    def to_arrays(self) -> dict:
+        categories = [self._te[c][0].to_numpy(dtype=str) for c in self.te_columns]
+        values = [self._te[c][1][:-1] for c in self.te_columns]
+        return {
+            "columns": self.columns,
+            "upper": self.upper,
+            "fill_value": np.float64(self.fill_value),
+            "te_columns": self.te_columns,
+            "te_unknown": self.te_unknown,
+            "te_missing": self.te_missing,
+            # Categorías y valores de todas las columnas TE concatenados;
+            # te_offsets[i]:te_offsets[i + 1] es el tramo de la columna i
+            "te_offsets": np.cumsum([0] + [len(v) for v in values]),
+            "te_categories": np.concatenate(categories or [np.empty(0, str)]),
+            "te_values": np.concatenate(values or [np.empty(0)]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "LeadPreprocessor":
+        offsets = arrays["te_offsets"]
+        spans = list(zip(offsets[:-1], offsets[1:]))
+        return cls(
+            columns=arrays["columns"],
+            upper=arrays["upper"],
+            te_columns=arrays["te_columns"],
+            te_categories=[arrays["te_categories"][a:b] for a, b in spans],
+            te_values=[arrays["te_values"][a:b] for a, b in spans],
+            te_unknown=arrays["te_unknown"],
+            te_missing=arrays["te_missing"],
+            fill_value=float(arrays["fill_value"]),
+        )
+
+    def save(self, path: str):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "LeadPreprocessor":
+        with np.load(path) as npz:
+            return cls.from_arrays({key: npz[key] for key in npz.files})
+
+    # ── Inferencia ────────────────────────────────────────────────────────────
+
+    def missing_columns(self, X: pd.DataFrame) -> list:
+        return [c for c in self.columns.tolist() if c not in X.columns]
+
+    def transform(self, X: pd.DataFrame, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Matriz (len(X), len(columns)) lista para el modelo. La salida es
+        Fortran-order: cada columna se escribe contigua y el DataFrame de
+        transform_frame la envuelve sin copiar.
+        """
+        return self._transform(
+            len(X), lambda col: X[col] if col in X.columns else None, out
+        )
+
+    def transform_array(
+        self, X: np.ndarray, columns=None, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Igual que transform pero desde una matriz 2D: la columna i de X es
+        columns[i] (por defecto, las columnas del modelo en orden). Con
+        columnas TE de texto X tiene que ser dtype object.
+        """
+        X = np.asarray(X)
+        names = self.columns.tolist() if columns is None else list(columns)
+        if X.ndim != 2 or X.shape[1] != len(names):
+            raise ValueError(
+                f"X tiene forma {X.shape}, se esperaban {len(names)} columnas"
+            )
+        position = {c: i for i, c in enumerate(names)}
+        return self._transform(
+            len(X), lambda col: X[:, position[col]] if col in position else None, out
+        )
+
+    def _transform(self, n: int, column, out: np.ndarray | None) -> np.ndarray:
+        # `column(nombre)` devuelve los valores de esa columna o None si falta
+        if out is None:
+            out = np.empty((n, len(self.columns)), dtype=np.float64, order="F")
+        elif out.shape != (n, len(self.columns)):
+            raise ValueError(
+                f"out tiene forma {out.shape}, se esperaba {(n, len(self.columns))}"
+            )
+
+        for j, col in enumerate(self.columns.tolist()):
+            values = column(col)
+            if values is None:
+                out[:, j] = self.fill_value
+                continue
+            if col in self._te:
+                index, table, missing = self._te[col]
+                np.take(table, index.get_indexer(_category_keys(values)), out=out[:, j])
+                nan = np.asarray(pd.isna(values), dtype=bool)
+                if nan.any():
+                    out[nan, j] = missing
+            else:
+                out[:, j] = _as_float(values)
+
+        # Capping: un solo np.minimum con broadcasting (NaN se conserva)
+        np.minimum(out, self.upper, out=out)
+        return out
+
+    def transform_frame(self, X: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.transform(X), index=X.index, columns=self.columns.tolist(), copy=False
+        )
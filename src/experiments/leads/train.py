@@ -8,6 +8,11 @@ Uso:
 
     # Solo tuning de hiperparámetros (luego copiarlos en model.py):
     python train.py --data ../../data/df_final.parquet --tune
+    python train.py --data ../../data/df_final.parquet --tune --tune-threads 2
+    python train.py --data ../../data/df_final.parquet --tune --tune-mode halving
+
+    # Los datasets preprocesados se cachean en --cache-dir (ver dataset_cache.py);
+    # --no-cache los recalcula siempre
 
 Qué cambia en cada archivo si necesitamos actualizar el campeón:
     Hiperparámetros      → model.py  (PARAMS_P1H/P1P/P2H/P2P)
@@ -20,8 +25,8 @@ import argparse
 import os
 
 import mlflow
-import pandas as pd
-from features import build_datasets, save_preprocessing_artifacts
+from dataset_cache import DATASET_CACHE_DIR, load_datasets
+from features import save_preprocessing_artifacts
 from metrics import (
     calcular_metricas_cascada,
     check_overfitting,
@@ -57,19 +62,16 @@ def setup_mlflow():
 # ── Pipeline principal ────────────────────────────────────────────────────────
 
 
-def train(data_path: str, outdir: str):
+def train(data_path: str, outdir: str, cache_dir: str | None = DATASET_CACHE_DIR):
 
-    # 1. Carga
+    # 1-2. Carga y preprocesamiento (o lectura del cache de datasets)
     print(f"\n[1/6] Cargando {data_path}...")
-    if data_path.endswith(".parquet"):
-        df_final = pd.read_parquet(data_path)
-    else:
-        df_final = pd.read_csv(data_path)
-    print(f"      {df_final.shape[0]:,} filas × {df_final.shape[1]} cols")
-
-    # 2. Preprocesamiento
     print("\n[2/6] Preprocesamiento...")
-    datasets = build_datasets(df_final)
+    datasets = load_datasets(data_path, cache_dir)
+    print(
+        f"      train {len(datasets['y_train']):,} filas | "
+        f"test {len(datasets['y_test']):,} filas"
+    )
     # y_train eliminado para evitar F841 (variable no usada)
     y_test = datasets["y_test"]
 
@@ -196,21 +198,32 @@ def train(data_path: str, outdir: str):
 # ── Tuning de hiperparámetros (opcional) ─────────────────────────────────────
 
 
-def tune(data_path: str):
-    from imblearn.over_sampling import SMOTE
-    from imblearn.pipeline import Pipeline as ImbPipeline
+def tune(
+    data_path: str,
+    threads: int = 1,
+    workers: int | None = None,
+    mode: str = "random",
+    cache_dir: str | None = DATASET_CACHE_DIR,
+):
+    """
+    Las cuatro búsquedas (P1/P2 × horse/prods) corren a la vez en un pool de
+    procesos compartido (ver tuning.py). Cada fold/candidato entrena con
+    `threads` threads de XGBoost; los resultados son los mismos para una
+    misma semilla sin importar `workers`.
+
+    mode="random": RandomizedSearchCV de 15 candidatos × 3 folds.
+    mode="halving": successive halving de 27 candidatos con rondas de
+    boosting como presupuesto y early stopping sobre aucpr.
+    """
+    import time
+
     from model import PARAMS_XGB_COMUNES
     from sklearn.metrics import fbeta_score, make_scorer
-    from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold
-    from xgboost import XGBClassifier
+    from sklearn.model_selection import StratifiedKFold
+    from tuning import SearchSpec, print_report, run_halving, run_searches
 
     print(f"\n[TUNE] Cargando {data_path}...")
-    df_final = (
-        pd.read_parquet(data_path)
-        if data_path.endswith(".parquet")
-        else pd.read_csv(data_path)
-    )
-    datasets = build_datasets(df_final)
+    datasets = load_datasets(data_path, cache_dir)
     y_train = datasets["y_train"]
 
     y_tr_p1h = (y_train["horse_target"] != "Lead Bronce").astype(int)
@@ -242,59 +255,51 @@ def tune(data_path: str):
         "reg_lambda": [1.0, 5.0],
     }
 
-    def _p1(X_tr, y_tr, spw, label):
-        rs = RandomizedSearchCV(
-            XGBClassifier(scale_pos_weight=spw, **PARAMS_XGB_COMUNES),
+    searches = [
+        SearchSpec("P1 horse", "p1", datasets["X_train_horse"], y_tr_p1h, spw_p1h),
+        SearchSpec("P1 prods", "p1", datasets["X_train_prods"], y_tr_p1p, spw_p1p),
+        SearchSpec("P2 horse", "p2", datasets["X_p2h_raw"], y_p2h_raw, spw_p2h),
+        SearchSpec("P2 prods", "p2", datasets["X_p2p_raw"], y_p2p_raw, spw_p2p),
+    ]
+    t0 = time.time()
+    if mode == "halving":
+        results = run_halving(
+            searches,
             param_dist,
-            n_iter=15,
-            scoring=f2_scorer,
+            n_candidates=27,
             cv=cv3,
-            n_jobs=-1,
-            verbose=0,
+            scoring=f2_scorer,
+            base_params=PARAMS_XGB_COMUNES,
+            max_rounds=max(param_dist["n_estimators"]),
+            eta=3,
+            threads=threads,
+            max_workers=workers,
             random_state=42,
         )
-        rs.fit(X_tr, y_tr)
-        print(f"  {label}: {rs.best_params_}  CV F2={rs.best_score_:.4f}")
-        return rs.best_params_
-
-    def _p2(X_tr, y_tr, spw, label):
-        pd2 = {f"xgb__{k}": v for k, v in param_dist.items()}
-        pipe = ImbPipeline(
-            [
-                ("smote", SMOTE(random_state=42)),
-                ("xgb", XGBClassifier(scale_pos_weight=spw, **PARAMS_XGB_COMUNES)),
-            ]
-        )
-        rs = RandomizedSearchCV(
-            pipe,
-            pd2,
+    else:
+        results = run_searches(
+            searches,
+            param_dist,
             n_iter=15,
-            scoring=f2_scorer,
             cv=cv3,
-            n_jobs=-1,
-            verbose=0,
+            scoring=f2_scorer,
+            base_params=PARAMS_XGB_COMUNES,
+            threads=threads,
+            max_workers=workers,
             random_state=42,
         )
-        rs.fit(X_tr, y_tr)
-        best = {k.replace("xgb__", ""): v for k, v in rs.best_params_.items()}
-        print(f"  {label}: {best}  CV F2={rs.best_score_:.4f}")
-        return best
-
-    print("\n── Paso 1 ──")
-    bp1h = _p1(datasets["X_train_horse"], y_tr_p1h, spw_p1h, "P1 horse")
-    bp1p = _p1(datasets["X_train_prods"], y_tr_p1p, spw_p1p, "P1 prods")
-    print("\n── Paso 2 ──")
-    bp2h = _p2(datasets["X_p2h_raw"], y_p2h_raw, spw_p2h, "P2 horse")
-    bp2p = _p2(datasets["X_p2p_raw"], y_p2p_raw, spw_p2p, "P2 prods")
+    total_wall = time.time() - t0
+
+    print("\n── Pasos 1 y 2 ──")
+    for r in results:
+        print(f"  {r.label}: {r.best_params}  CV F2={r.best_score:.4f}")
+    print_report(results, total_wall)
 
     print("\n── Copiá esto en model.py ──")
-    for label, params in [
-        ("PARAMS_P1H", bp1h),
-        ("PARAMS_P1P", bp1p),
-        ("PARAMS_P2H", bp2h),
-        ("PARAMS_P2P", bp2p),
-    ]:
-        print(f"{label} = {params}")
+    for label, r in zip(
+        ["PARAMS_P1H", "PARAMS_P1P", "PARAMS_P2H", "PARAMS_P2P"], results
+    ):
+        print(f"{label} = {r.best_params}")
 
 
 # ── Entrypoint ────────────────────────────────────────────────────────────────
@@ -309,17 +314,52 @@ if __name__ == "__main__":
         default="../../models/champion",
         help="Directorio de salida de modelos y artefactos",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=DATASET_CACHE_DIR,
+        help="Cache de datasets preprocesados (LEADS_DATASET_CACHE)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recalcular los datasets sin leer ni escribir el cache",
+    )
     parser.add_argument(
         "--tune", action="store_true", help="Ejecutar tuning antes de entrenar"
     )
+    parser.add_argument(
+        "--tune-threads",
+        type=int,
+        default=1,
+        help="Threads de XGBoost por fold/candidato en el tuning",
+    )
+    parser.add_argument(
+        "--tune-mode",
+        choices=["random", "halving"],
+        default="random",
+        help="RandomizedSearchCV o successive halving con early stopping",
+    )
+    parser.add_argument(
+        "--tune-workers",
+        type=int,
+        default=None,
+        help="Procesos del pool de tuning (por defecto cores // --tune-threads)",
+    )
     args = parser.parse_args()
 
     print("=" * 60)
     print(" Lead Scoring — XGB Tuneado v1")
     print("=" * 60)
 
+    cache_dir = None if args.no_cache else args.cache_dir
     if args.tune:
-        tune(args.data)
+        tune(
+            args.data,
+            threads=args.tune_threads,
+            workers=args.tune_workers,
+            mode=args.tune_mode,
+            cache_dir=cache_dir,
+        )
         print("\nActualizá PARAMS_* en model.py y corré sin --tune.")
     else:
-        train(data_path=args.data, outdir=args.outdir)
+        train(data_path=args.data, outdir=args.outdir, cache_dir=cache_dir)
@@ -0,0 +1,395 @@
+"""
+tuning.py
+=========
+Planificador de búsquedas de hiperparámetros que corre varias
+RandomizedSearchCV en paralelo sobre un único pool de procesos.
+
+Cada búsqueda se descompone en tareas (candidato × fold) con los mismos
+candidatos (ParameterSampler) y los mismos folds que usaría
+RandomizedSearchCV con esos random_state. Todas las tareas de todas las
+búsquedas comparten el pool y cada una entrena con un presupuesto fijo de
+`threads` para XGBoost, así no hay paralelismo anidado (joblib n_jobs=-1 ×
+XGBoost n_jobs=-1) compitiendo por los cores.
+
+El resultado no depende de cuántos workers haya ni del orden en que
+terminen las tareas: el score de cada candidato es el promedio de sus folds
+y el mejor se elige igual que RandomizedSearchCV (el primero entre empates).
+
+run_halving() es la alternativa por successive halving: el presupuesto es la
+cantidad de rondas de boosting (n_estimators deja de ser un hiperparámetro
+muestreado). Todos los candidatos arrancan con pocas rondas, solo el mejor
+1/eta pasa al siguiente escalón con eta veces más rondas, y cada fit usa
+early stopping sobre aucpr contra un 10% del fold de entrenamiento, así las
+configuraciones malas se cortan a las pocas rondas. El n_estimators que
+devuelve es el promedio de best_iteration + 1 del último escalón.
+
+Uso:
+    searches = [
+        SearchSpec("P1 horse", "p1", X_tr, y_tr, spw),
+        SearchSpec("P2 horse", "p2", X_p2, y_p2, spw2),
+    ]
+    results = run_searches(searches, param_dist, n_iter=15, cv=cv3,
+                           scoring=f2_scorer, base_params=PARAMS_XGB_COMUNES)
+    print_report(results)
+
+    # Successive halving: 27 candidatos → 9 → 3 → 1, hasta 400 rondas
+    results = run_halving(searches, param_dist, n_candidates=27, cv=cv3,
+                          scoring=f2_scorer, base_params=PARAMS_XGB_COMUNES,
+                          max_rounds=400, eta=3)
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+from sklearn.model_selection import ParameterSampler, train_test_split
+from threadpoolctl import threadpool_limits
+from xgboost import XGBClassifier
+
+
+@dataclass
+class SearchSpec:
+    label: str
+    kind: str  # "p1" (XGB solo) | "p2" (SMOTE + XGB)
+    X: object
+    y: object
+    spw: float
+
+
+@dataclass
+class SearchResult:
+    label: str
+    best_params: dict
+    best_score: float
+    cv_scores: np.ndarray  # (n_candidatos, n_folds)
+    n_tasks: int
+    wall_s: float
+    cpu_s: float
+    task_wall_s: float = 0.0
+    timeline: list = field(default_factory=list, repr=False)
+    # Successive halving: (rondas, candidatos) de cada escalón
+    rungs: list = field(default_factory=list)
+
+
+# ── Estimadores (a nivel de módulo para que se puedan usar desde el pool) ────
+
+
+def _p1(spw: float, base_params: dict, threads: int) -> XGBClassifier:
+    return XGBClassifier(scale_pos_weight=spw, **{**base_params, "n_jobs": threads})
+
+
+def _p2(spw: float, base_params: dict, threads: int):
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline as ImbPipeline
+
+    return ImbPipeline(
+        [
+            ("smote", SMOTE(random_state=42)),
+            ("xgb", _p1(spw, base_params, threads)),
+        ]
+    )
+
+
+BUILDERS = {"p1": _p1, "p2": _p2}
+
+
+def _prefixed(kind: str, params: dict) -> dict:
+    return {f"xgb__{k}": v for k, v in params.items()} if kind == "p2" else params
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+
+# Estado por proceso: las búsquedas se envían una vez en el initializer y las
+# tareas solo llevan índices
+_WORKER = {}
+
+
+def _init_worker(searches, candidates, splits, scoring, base_params, threads):
+    # Con fork numpy / xgboost ya están cargados (y sus pools de threads
+    # creados) cuando corre el initializer: exportar OMP_NUM_THREADS acá no
+    # tendría efecto. threadpoolctl ajusta en caliente los pools de OpenMP y
+    # BLAS ya cargados (p. ej. el BLAS que usa SMOTE); XGBoost además recibe
+    # n_jobs=threads en cada estimador (_p1).
+    threadpool_limits(limits=threads)
+    _WORKER.update(
+        searches=searches,
+        candidates=candidates,
+        splits=splits,
+        scoring=scoring,
+        base_params=base_params,
+        threads=threads,
+    )
+
+
+def _fit_task(s: int, c: int, f: int) -> tuple:
+    """Entrena el candidato `c` de la búsqueda `s` en el fold `f`."""
+    spec = _WORKER["searches"][s]
+    train_idx, test_idx = _WORKER["splits"][s][f]
+    params = _WORKER["candidates"][c]
+
+    t_start, cpu0 = time.time(), time.process_time()
+    est = BUILDERS[spec.kind](spec.spw, _WORKER["base_params"], _WORKER["threads"])
+    est.set_params(**_prefixed(spec.kind, params))
+    est.fit(_rows(spec.X, train_idx), _rows(spec.y, train_idx))
+    score = _WORKER["scoring"](est, _rows(spec.X, test_idx), _rows(spec.y, test_idx))
+    return s, c, f, float(score), t_start, time.time(), time.process_time() - cpu0
+
+
+def _rows(data, idx):
+    return data.iloc[idx] if hasattr(data, "iloc") else data[idx]
+
+
+def _fit_halving_task(s: int, c: int, f: int, rounds: int, patience: int) -> tuple:
+    """
+    Como _fit_task, pero con a lo sumo `rounds` rondas y early stopping sobre
+    aucpr contra la parte de early stopping del fold. Devuelve además la
+    cantidad de rondas útiles (best_iteration + 1).
+    """
+    spec = _WORKER["searches"][s]
+    fit_idx, es_idx, test_idx = _WORKER["splits"][s][f]
+    params = {
+        **_WORKER["candidates"][c],
+        "n_estimators": rounds,
+        "early_stopping_rounds": patience,
+    }
+
+    t_start, cpu0 = time.time(), time.process_time()
+    est = BUILDERS[spec.kind](spec.spw, _WORKER["base_params"], _WORKER["threads"])
+    est.set_params(**_prefixed(spec.kind, params))
+    # El conjunto de early stopping no pasa por SMOTE (solo el de entrenamiento)
+    eval_key = "xgb__eval_set" if spec.kind == "p2" else "eval_set"
+    verbose_key = "xgb__verbose" if spec.kind == "p2" else "verbose"
+    est.fit(
+        _rows(spec.X, fit_idx),
+        _rows(spec.y, fit_idx),
+        **{
+            eval_key: [(_rows(spec.X, es_idx), _rows(spec.y, es_idx))],
+            verbose_key: False,
+        },
+    )
+    booster = est.named_steps["xgb"] if spec.kind == "p2" else est
+    # predict usa las rondas hasta best_iteration
+    score = _WORKER["scoring"](est, _rows(spec.X, test_idx), _rows(spec.y, test_idx))
+    return (
+        s,
+        c,
+        f,
+        float(score),
+        booster.best_iteration + 1,
+        t_start,
+        time.time(),
+        time.process_time() - cpu0,
+    )
+
+
+# ── Planificador ──────────────────────────────────────────────────────────────
+
+
+def run_searches(
+    searches: list[SearchSpec],
+    param_dist: dict,
+    n_iter: int,
+    cv,
+    scoring,
+    base_params: dict,
+    threads: int = 1,
+    max_workers: int | None = None,
+    random_state: int = 42,
+) -> list[SearchResult]:
+    """
+    Corre todas las búsquedas en un ProcessPoolExecutor de
+    `max_workers` procesos (por defecto cores // threads), cada tarea con
+    `threads` threads de XGBoost.
+    """
+    cores = os.cpu_count() or 1
+    max_workers = max_workers or max(1, cores // threads)
+    candidates = list(ParameterSampler(param_dist, n_iter, random_state=random_state))
+    splits = [list(cv.split(spec.X, spec.y)) for spec in searches]
+    n_folds = [len(sp) for sp in splits]
+
+    tasks = [
+        (s, c, f)
+        for c in range(len(candidates))
+        for s in range(len(searches))
+        for f in range(n_folds[s])
+    ]
+    scores = [np.full((len(candidates), n), np.nan) for n in n_folds]
+    timeline = [[] for _ in searches]
+
+    with ProcessPoolExecutor(
+        max_workers,
+        initializer=_init_worker,
+        initargs=(searches, candidates, splits, scoring, base_params, threads),
+    ) as pool:
+        futures = [pool.submit(_fit_task, *task) for task in tasks]
+        for future in as_completed(futures):
+            s, c, f, score, t0, t1, cpu = future.result()
+            scores[s][c, f] = score
+            timeline[s].append((t0, t1, cpu))
+
+    results = []
+    for s, spec in enumerate(searches):
+        mean = scores[s].mean(axis=1)
+        best = int(np.argmax(mean))
+        starts, ends, cpus = zip(*timeline[s])
+        results.append(
+            SearchResult(
+                label=spec.label,
+                best_params=candidates[best],
+                best_score=float(mean[best]),
+                cv_scores=scores[s],
+                n_tasks=len(timeline[s]),
+                wall_s=max(ends) - min(starts),
+                cpu_s=float(sum(cpus)),
+                task_wall_s=float(sum(e - b for b, e in zip(starts, ends))),
+                timeline=timeline[s],
+            )
+        )
+    return results
+
+
+def print_report(results: list[SearchResult], total_wall_s: float | None = None):
+    """Tiempo de pared, CPU y cores ocupados en promedio por búsqueda."""
+    cores = os.cpu_count() or 1
+    print(
+        f"\n  {'búsqueda':<10} {'tareas':>6} {'pared s':>8} {'CPU s':>8} "
+        f"{'cores':>6} {'uso':>6}"
+    )
+    for r in results:
+        busy = r.cpu_s / r.wall_s if r.wall_s > 0 else 0.0
+        print(
+            f"  {r.label:<10} {r.n_tasks:>6} {r.wall_s:>8.1f} {r.cpu_s:>8.1f} "
+            f"{busy:>6.2f} {busy / cores:>6.0%}"
+        )
+    if total_wall_s is not None:
+        cpu = sum(r.cpu_s for r in results)
+        print(
+            f"  {'total':<10} {sum(r.n_tasks for r in results):>6} "
+            f"{total_wall_s:>8.1f} {cpu:>8.1f} {cpu / total_wall_s:>6.2f} "
+            f"{cpu / total_wall_s / cores:>6.0%}"
+        )
+
+
+def _early_stopping_splits(cv, X, y, fraction: float, random_state: int) -> list:
+    """(fit, early stopping, test) por fold: el ES sale del train del fold."""
+    splits = []
+    for train_idx, test_idx in cv.split(X, y):
+        fit_idx, es_idx = train_test_split(
+            train_idx,
+            test_size=fraction,
+            stratify=_rows(y, train_idx),
+            random_state=random_state,
+        )
+        splits.append((np.sort(fit_idx), np.sort(es_idx), test_idx))
+    return splits
+
+
+def run_halving(
+    searches: list[SearchSpec],
+    param_dist: dict,
+    n_candidates: int,
+    cv,
+    scoring,
+    base_params: dict,
+    max_rounds: int = 400,
+    eta: int = 3,
+    patience: int = 20,
+    es_fraction: float = 0.1,
+    threads: int = 1,
+    max_workers: int | None = None,
+    random_state: int = 42,
+) -> list[SearchResult]:
+    """
+    Successive halving sobre `n_candidates` candidatos con rondas de boosting
+    como presupuesto: el escalón i entrena los sobrevivientes con
+    max_rounds / eta^(último - i) rondas y deja pasar el mejor 1/eta (por F2
+    promedio en los folds; el primero entre empates). Los escalones de las
+    cuatro búsquedas se corren juntos en el mismo pool.
+
+    El early stopping de cada escalón usa min(patience, rondas // 4) rondas
+    de paciencia (al menos 1).
+    """
+    cores = os.cpu_count() or 1
+    max_workers = max_workers or max(1, cores // threads)
+    dist = {k: v for k, v in param_dist.items() if k != "n_estimators"}
+    candidates = list(ParameterSampler(dist, n_candidates, random_state=random_state))
+    splits = [
+        _early_stopping_splits(cv, spec.X, spec.y, es_fraction, random_state)
+        for spec in searches
+    ]
+
+    if eta < 2:
+        raise ValueError(f"eta debe ser >= 2 (recibido {eta})")
+    # Un escalón por cada potencia eta^k <= n_candidates (k = 0, 1, ...), en
+    # enteros: math.log(243, 3) da 4.999… y perdería un escalón
+    n_rungs = 1
+    while eta**n_rungs <= n_candidates:
+        n_rungs += 1
+    alive = [list(range(len(candidates))) for _ in searches]
+    timeline = [[] for _ in searches]
+    rungs = [[] for _ in searches]
+
+    with ProcessPoolExecutor(
+        max_workers,
+        initializer=_init_worker,
+        initargs=(searches, candidates, splits, scoring, base_params, threads),
+    ) as pool:
+        for rung in range(n_rungs):
+            rounds = max(1, max_rounds // eta ** (n_rungs - 1 - rung))
+            # La paciencia nunca alcanza el presupuesto del escalón: si no, el
+            # early stopping no podría cortar en los primeros escalones
+            rung_patience = min(patience, max(1, rounds // 4))
+            scores = {}
+            iterations = {}
+            futures = [
+                pool.submit(_fit_halving_task, s, c, f, rounds, rung_patience)
+                for c in range(len(candidates))
+                for s in range(len(searches))
+                if c in alive[s]
+                for f in range(len(splits[s]))
+            ]
+            for future in as_completed(futures):
+                s, c, f, score, best_it, t0, t1, cpu = future.result()
+                scores.setdefault((s, c), {})[f] = score
+                iterations.setdefault((s, c), {})[f] = best_it
+                timeline[s].append((t0, t1, cpu))
+
+            means = []
+            for s in range(len(searches)):
+                rungs[s].append((rounds, len(alive[s])))
+                # Promedio en orden de fold: no depende del orden de llegada
+                means.append(
+                    {
+                        c: np.mean([scores[s, c][f] for f in range(len(splits[s]))])
+                        for c in alive[s]
+                    }
+                )
+                if rung < n_rungs - 1:
+                    keep = max(1, math.ceil(len(alive[s]) / eta))
+                    # Orden estable: entre empates pasa el de menor índice
+                    ranked = sorted(alive[s], key=lambda c: -means[s][c])
+                    alive[s] = sorted(ranked[:keep])
+
+    results = []
+    for s, spec in enumerate(searches):
+        best = max(alive[s], key=lambda c: (means[s][c], -c))
+        n_estimators = int(round(np.mean(list(iterations[s, best].values()))))
+        starts, ends, cpus = zip(*timeline[s])
+        results.append(
+            SearchResult(
+                label=spec.label,
+                best_params={**candidates[best], "n_estimators": n_estimators},
+                best_score=float(means[s][best]),
+                cv_scores=np.array([scores[s, best][f] for f in range(len(splits[s]))]),
+                n_tasks=len(timeline[s]),
+                wall_s=max(ends) - min(starts),
+                cpu_s=float(sum(cpus)),
+                task_wall_s=float(sum(e - b for b, e in zip(starts, ends))),
+                timeline=timeline[s],
+                rungs=rungs[s],
+            )
+        )
+    return results
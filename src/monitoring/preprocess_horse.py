@@ -1,8 +1,12 @@
 import pickle
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1] / "experiments" / "leads"))
+
 import numpy as np
 import pandas as pd
+from preprocessor import LeadPreprocessor
 
 # ── Carga de artefactos ───────────────────────────────────────────────────────
 
@@ -16,7 +20,9 @@ def load_artifacts(outdir: str) -> dict:
 
     Returns:
         dict con claves:
-            target_encoder, limites_capping, cols_horse, cols_prods, cols_user
+            target_encoder, limites_capping, cols_horse, cols_prods, cols_user,
+            capping (columnas y límites como arrays) y preprocessor_horse
+            (LeadPreprocessor, si existe preprocessor_horse.npz)
     """
     keys = [
         "target_encoder",
@@ -30,6 +36,25 @@ def load_artifacts(outdir: str) -> dict:
         path = Path(outdir) / f"{key}.pkl"
         with open(path, "rb") as f:
             arts[key] = pickle.load(f)
+
+    # Límites de capping como arrays (columns, limits); los artefactos
+    # anteriores a capping.npz solo tienen el dict
+    capping_path = Path(outdir) / "capping.npz"
+    if capping_path.exists():
+        with np.load(capping_path) as npz:
+            arts["capping"] = (npz["columns"], npz["limits"])
+    else:
+        limites = arts["limites_capping"]
+        arts["capping"] = (
+            np.array(list(limites), dtype=str),
+            np.array(list(limites.values()), dtype=np.float64),
+        )
+
+    # Preprocesador fusionado (TE + capping + orden de columnas), si el
+    # entrenamiento lo guardó
+    pre_path = Path(outdir) / "preprocessor_horse.npz"
+    if pre_path.exists():
+        arts["preprocessor_horse"] = LeadPreprocessor.load(str(pre_path))
     print(f"✅ Artefactos cargados desde: {outdir}")
     return arts
 
@@ -46,6 +71,9 @@ def preprocess_horse(df: pd.DataFrame, arts: dict) -> pd.DataFrame:
         2. Capping con límites P99 del entrenamiento
         3. Selección de cols_user + cols_horse
 
+    Si los artefactos traen preprocessor_horse, los tres pasos se hacen en
+    una sola pasada con LeadPreprocessor (ver experiments/leads/preprocessor.py).
+
     Args:
         df:   DataFrame con las features crudas (sin columnas target)
         arts: dict retornado por load_artifacts()
@@ -53,8 +81,16 @@ def preprocess_horse(df: pd.DataFrame, arts: dict) -> pd.DataFrame:
     Returns:
         X_horse: DataFrame con exactamente las columnas que espera HORSE_P1
     """
+    # Con el preprocesador fusionado: una sola matriz, sin copias intermedias
+    pre = arts.get("preprocessor_horse")
+    if pre is not None:
+        missing = pre.missing_columns(df)
+        if missing:
+            print(f"⚠️  Columnas faltantes (se rellenan con 0): {missing}")
+        return pre.transform_frame(df)
+
     te = arts["target_encoder"]
-    limites_capping = arts["limites_capping"]
+    cap_columns, cap_limits = arts["capping"]
     cols_horse = arts["cols_horse"]  # ya incluye cols_user (guardadas así en train)
 
     X = df.copy()
@@ -64,10 +100,13 @@ def preprocess_horse(df: pd.DataFrame, arts: dict) -> pd.DataFrame:
     if cols_te:
         X[cols_te] = te.transform(X[cols_te])
 
-    # 2. Capping
-    for col, lim in limites_capping.items():
-        if col in X.columns:
-            X[col] = X[col].clip(upper=lim)
+    # 2. Capping — un solo np.minimum con broadcasting sobre el bloque
+    present = np.isin(cap_columns, X.columns)
+    cols_cap = cap_columns[present].tolist()
+    if cols_cap:
+        X[cols_cap] = np.minimum(
+            X[cols_cap].to_numpy(dtype=np.float64), cap_limits[present]
+        )
 
     # 3. Selección de columnas — rellenar faltantes con 0 y advertir
     missing = [c for c in cols_horse if c not in X.columns]
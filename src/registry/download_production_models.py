@@ -2,10 +2,13 @@ import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "api"))
 
 import os
 
 import mlflow
+from listings import LISTINGS_PATH
+from model_pack import build_model_pack
 
 from misc.config import init_mlflow
 
@@ -33,7 +36,7 @@ def download_production_model(model_name: str, dst_path: str = "./models/product
         model_version = client.get_model_version_by_alias(model_name, "production")
     except Exception as e:
         print(f"❌ {model_name} no tiene versión en production: {e}")
-        return None
+        return None, None
 
     version = model_version.version
     run_id = model_version.run_id
@@ -62,18 +65,32 @@ def download_production_model(model_name: str, dst_path: str = "./models/product
         except Exception as e:
             print(f"⚠️  {model_name} no tiene artifacts_bundle: {e}")
 
-    return local_path
+    return local_path, version
 
 
 def download_all_production_models(dst_path: str = "./models/production/"):
-    """Descarga todos los modelos en production"""
-    paths = {}
+    """
+    Descarga todos los modelos en production y arma el model pack. Requiere
+    el parquet de listings (LISTINGS_PATH, vía `dvc pull`).
+    """
+    paths, versions = {}, {}
     for model_name in REGISTERED_MODELS:
-        path = download_production_model(model_name, dst_path=dst_path)
+        path, version = download_production_model(model_name, dst_path=dst_path)
         if path:
             paths[model_name] = path
+            versions[model_name] = version
 
     print(f"\n✅ {len(paths)}/{len(REGISTERED_MODELS)} modelos descargados")
+
+    # Un solo archivo mmap para la API (ver src/api/model_pack.py), con la
+    # tabla de listings incluida: la imagen de la API no copia ./data
+    pack_path = build_model_pack(
+        dst_path,
+        os.path.join(dst_path, "model_pack.bin"),
+        versions=versions,
+        listings_path=LISTINGS_PATH,
+    )
+    print(f"📦 Model pack generado en: {pack_path}")
     return paths
 
 